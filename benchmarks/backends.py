@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Backend resolution and map options
+"""
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+
+from treasuremap.utils import get_backend
+
+from .base import measure_time
+
+
+def run(count):
+    backend = get_backend(settings.TREASURE_MAP)
+
+    return {
+        "get_backend": measure_time(
+            lambda: [get_backend(settings.TREASURE_MAP) for _ in range(count)]
+        ),
+        "get_map_options": measure_time(lambda: [backend.get_map_options() for _ in range(count)]),
+        "get_api_js": measure_time(lambda: [backend.get_api_js() for _ in range(count)]),
+    }
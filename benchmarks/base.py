@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import timeit
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+
+    import django  # pylint: disable=import-outside-toplevel
+
+    django.setup()
+
+
+def setup_database():
+    """
+    Create the test tables in the in-memory database
+    """
+    from django.core.management import call_command  # pylint: disable=import-outside-toplevel
+    from django.db import connection  # pylint: disable=import-outside-toplevel
+
+    if "tests_mymodel" not in connection.introspection.table_names():
+        call_command("migrate", "tests", verbosity=0)
+
+
+def measure_time(stmt, repeat=5):
+    """
+    Best wall time of ``repeat`` runs, in seconds
+    """
+    return min(timeit.repeat(stmt, number=1, repeat=repeat))
+
+
+def make_values(count):
+    """
+    Deterministic coordinates in the storage format
+    """
+    return [
+        ("{:.6f}".format(i * 0.000731 % 180 - 90), "{:.6f}".format(i * 0.001137 % 360 - 180))
+        for i in range(count)
+    ]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming GeoJSON and CSV export against a list of features built from instances
+"""
+
+from __future__ import unicode_literals
+
+import json
+import tracemalloc
+
+from tests.models import MyModel
+from treasuremap.export import iter_csv, iter_geojson
+from treasuremap.fields import LatLong
+
+from .base import make_values, measure_time, setup_database
+
+
+def naive_geojson(queryset):
+    features = [
+        {
+            "type": "Feature",
+            "id": obj.pk,
+            "geometry": {
+                "type": "Point",
+                "coordinates": [float(obj.empty_point.longitude), float(obj.empty_point.latitude)],
+            },
+            "properties": {},
+        }
+        for obj in queryset
+    ]
+    return json.dumps({"type": "FeatureCollection", "features": features})
+
+
+def consume(chunks):
+    # the chunks go to the response or a file one by one
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+def peak_bytes(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(count):
+    setup_database()
+
+    MyModel.objects.all().delete()
+    MyModel.objects.bulk_create(
+        [MyModel(empty_point=LatLong(lat, lng)) for lat, lng in make_values(count)],
+        batch_size=1000,
+    )
+
+    queryset = MyModel.objects.all()
+    try:
+        return {
+            "naive_geojson": measure_time(lambda: naive_geojson(queryset.all()), repeat=3),
+            "stream_geojson": measure_time(
+                lambda: consume(iter_geojson(queryset, "empty_point")), repeat=3
+            ),
+            "stream_csv": measure_time(
+                lambda: consume(iter_csv(queryset, "empty_point")), repeat=3
+            ),
+            "naive_bytes_peak": peak_bytes(lambda: naive_geojson(queryset.all())),
+            "stream_bytes_peak": peak_bytes(lambda: consume(iter_geojson(queryset, "empty_point"))),
+        }
+    finally:
+        MyModel.objects.all().delete()
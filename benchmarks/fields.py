@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Decoding and encoding of stored values by ``LatLongField``
+"""
+
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.db.models import Field
+
+from tests.models import MyModel
+from treasuremap.fields import LatLong, LatLongField
+
+from .base import make_values, measure_time, setup_database
+from .latlong import LegacyLatLong
+
+
+def legacy_to_python(value):
+    """
+    ``to_python`` as shipped in 0.3.4, without the error handling
+    """
+    if value is None:
+        return None
+    elif not value:
+        return LegacyLatLong()
+    elif isinstance(value, LegacyLatLong):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        args = value
+    else:
+        args = value.split(";")
+    return LegacyLatLong(*args)
+
+
+def legacy_from_db_value(value):
+    """
+    ``from_db_value`` as shipped in 0.3.4
+    """
+    return legacy_to_python(value)
+
+
+def two_pass_get_db_prep_value(field, value):
+    """
+    ``get_db_prep_value`` as shipped in 0.3.4
+    """
+    value = Field.get_prep_value(field, value)
+    if value is None:
+        return None
+    return str(field.to_python(value))
+
+
+def measure_bulk_create(values, batch_size=1000):
+    objects = [MyModel(empty_point=value) for value in values]
+
+    def bulk_create():
+        MyModel.objects.bulk_create(objects, batch_size=batch_size)
+        MyModel.objects.all().delete()
+
+    return measure_time(bulk_create, repeat=3)
+
+
+def run(count):
+    setup_database()
+
+    pairs = make_values(count)
+    values = ["{};{}".format(lat, lng) for lat, lng in pairs]
+    repeated = values[:100] * (count // 100)
+    objects = [LatLong(lat, lng) for lat, lng in pairs]
+
+    field = LatLongField()
+    cached_field = LatLongField(decode_cache_size=1024)
+    interned_field = LatLongField(intern_values=True)
+
+    return {
+        # more runs, the two paths are within 20% of each other
+        "legacy_from_db_value": measure_time(
+            lambda: [legacy_from_db_value(v) for v in values], repeat=15
+        ),
+        "to_python": measure_time(lambda: [field.to_python(v) for v in values]),
+        "from_db_value": measure_time(
+            lambda: [field.from_db_value(v, None, None) for v in values], repeat=15
+        ),
+        "from_db_value_repeated": measure_time(
+            lambda: [field.from_db_value(v, None, None) for v in repeated]
+        ),
+        "from_db_value_cached_repeated": measure_time(
+            lambda: [cached_field.from_db_value(v, None, None) for v in repeated]
+        ),
+        "from_db_value_interned_repeated": measure_time(
+            lambda: [interned_field.from_db_value(v, None, None) for v in repeated]
+        ),
+        "two_pass_prep_latlong": measure_time(
+            lambda: [two_pass_get_db_prep_value(field, v) for v in objects]
+        ),
+        "prep_latlong": measure_time(
+            lambda: [field.get_db_prep_value(v, connection) for v in objects]
+        ),
+        "two_pass_prep_str": measure_time(
+            lambda: [two_pass_get_db_prep_value(field, v) for v in values]
+        ),
+        "prep_str": measure_time(lambda: [field.get_db_prep_value(v, connection) for v in values]),
+        "two_pass_prep_tuple": measure_time(
+            lambda: [two_pass_get_db_prep_value(field, v) for v in pairs]
+        ),
+        "prep_tuple": measure_time(lambda: [field.get_db_prep_value(v, connection) for v in pairs]),
+        "bulk_create_latlong": measure_bulk_create(objects),
+        "bulk_create_str": measure_bulk_create(values),
+    }
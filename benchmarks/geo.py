@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Distances from many points to many points, in Python loops and with NumPy
+"""
+
+from __future__ import unicode_literals
+
+from treasuremap import geo
+
+from .base import make_values, measure_time
+
+
+def python_matrix(origins, destinations):
+    return [[geo.haversine(a[0], a[1], b[0], b[1]) for b in destinations] for a in origins]
+
+
+def run(count):
+    points = [(float(lat), float(lng)) for lat, lng in make_values(count)]
+
+    results = {
+        "python_one_to_many": measure_time(
+            lambda: [geo.haversine(0.0, 0.0, lat, lng) for lat, lng in points], repeat=3
+        ),
+        "python_matrix": measure_time(lambda: python_matrix(points, points), repeat=1),
+    }
+    if geo.np is not None:
+        array = geo.to_array(points)
+        results.update(
+            {
+                "distance_array": measure_time(
+                    lambda: geo.distance_array(array, (0.0, 0.0)), repeat=3
+                ),
+                "distance_matrix": measure_time(
+                    lambda: geo.distance_matrix(array, array), repeat=3
+                ),
+                "distance_matrix_workers": measure_time(
+                    lambda: geo.distance_matrix(array, array, workers=2), repeat=3
+                ),
+            }
+        )
+    return results
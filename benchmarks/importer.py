@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Batched import of coordinates against per-row parsing and saving
+"""
+
+from __future__ import unicode_literals
+
+from tests.models import MyModel
+from treasuremap.importer import import_points
+
+from .base import make_values, measure_time, setup_database
+
+
+def save_rows(rows):
+    field = MyModel._meta.get_field("empty_point")  # pylint: disable=protected-access
+    for latitude, longitude in rows:
+        MyModel(empty_point=field.to_python("{};{}".format(latitude, longitude))).save()
+
+
+def to_python_bulk(rows):
+    field = MyModel._meta.get_field("empty_point")  # pylint: disable=protected-access
+    MyModel.objects.bulk_create(
+        [MyModel(empty_point=field.to_python("{};{}".format(lat, lng))) for lat, lng in rows],
+        batch_size=1000,
+    )
+
+
+def run(count):
+    setup_database()
+
+    rows = [list(row) for row in make_values(count)]
+    columns = ["latitude", "longitude"]
+
+    def measure(func):
+        def once():
+            MyModel.objects.all().delete()
+            func()
+
+        return measure_time(once, repeat=3)
+
+    try:
+        return {
+            # a tenth of the rows, saving one by one is slow
+            "save_rows_x10": measure(lambda: save_rows(rows[: count // 10])) * 10,
+            "to_python_bulk": measure(lambda: to_python_bulk(rows)),
+            "import_points": measure(
+                lambda: import_points(MyModel, "empty_point", columns, rows, workers=0)
+            ),
+            "import_points_workers": measure(
+                lambda: import_points(MyModel, "empty_point", columns, rows, workers=2)
+            ),
+        }
+    finally:
+        MyModel.objects.all().delete()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Building and querying the in-memory ``SpatialIndex``
+"""
+
+from __future__ import unicode_literals
+
+from tests.models import MyModel
+from treasuremap.fields import LatLong
+from treasuremap.index import SpatialIndex
+
+from .base import make_values, measure_time, setup_database
+
+QUERIES = 1000
+
+
+def run(count):
+    setup_database()
+
+    values = make_values(count)
+    MyModel.objects.all().delete()
+    MyModel.objects.bulk_create(
+        [MyModel(empty_point="{};{}".format(lat, lng)) for lat, lng in values], batch_size=1000
+    )
+
+    index = SpatialIndex(MyModel, "empty_point")
+    points = [LatLong(lat, lng) for lat, lng in values[:: max(1, count // QUERIES)]][:QUERIES]
+    try:
+        build = measure_time(index.rebuild, repeat=1)
+        return {
+            "build": build,
+            "index_bytes_per_row": index.stats()["memory_bytes"] / count,
+            "nearest_1000": measure_time(lambda: [index.nearest(p, k=10) for p in points]),
+            "within_1000": measure_time(lambda: [index.within(p, 50) for p in points]),
+        }
+    finally:
+        MyModel.objects.all().delete()
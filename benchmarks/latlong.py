@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Memory and throughput of ``LatLong`` compared with the 0.3.4 implementation
+"""
+
+from __future__ import unicode_literals
+
+import tracemalloc
+from decimal import Decimal
+
+from django.utils.deconstruct import deconstructible
+
+from treasuremap.fields import LatLong
+
+from .base import make_values, measure_time
+
+
+@deconstructible
+class LegacyLatLong(object):
+    """
+    ``LatLong`` as shipped in 0.3.4
+    """
+
+    def __init__(self, latitude=0.0, longitude=0.0):
+        self.latitude = Decimal(latitude)
+        self.longitude = Decimal(longitude)
+
+    @staticmethod
+    def _equals_to_the_cent(a, b):
+        return round(a, 6) == round(b, 6)
+
+    @staticmethod
+    def _no_equals_to_the_cent(a, b):
+        return round(a, 6) != round(b, 6)
+
+    @property
+    def format_latitude(self):
+        return "{:.6f}".format(self.latitude)
+
+    @property
+    def format_longitude(self):
+        return "{:.6f}".format(self.longitude)
+
+    def __repr__(self):
+        return "{}({:.6f}, {:.6f})".format(self.__class__.__name__, self.latitude, self.longitude)
+
+    def __str__(self):
+        return "{:.6f};{:.6f}".format(self.latitude, self.longitude)
+
+    def __eq__(self, other):
+        return isinstance(other, LegacyLatLong) and (
+            self._equals_to_the_cent(self.latitude, other.latitude)
+            and self._equals_to_the_cent(self.longitude, other.longitude)
+        )
+
+    def __ne__(self, other):
+        return isinstance(other, LegacyLatLong) and (
+            self._no_equals_to_the_cent(self.latitude, other.latitude)
+            or self._no_equals_to_the_cent(self.longitude, other.longitude)
+        )
+
+
+def measure_memory(cls, values):
+    """
+    Bytes allocated per object
+    """
+    tracemalloc.start()
+    objects = [cls(lat, lng) for lat, lng in values]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / float(len(values))
+
+
+def run(count):
+    values = make_values(count)
+    results = {}
+
+    for name, cls in (("legacy", LegacyLatLong), ("latlong", LatLong)):
+        a, b = cls("55.755826", "37.617300"), cls("55.755826", "37.617300")
+        results.update(
+            {
+                "{}_bytes_per_object".format(name): measure_memory(cls, values),
+                # more runs, the two classes are within 20% of each other
+                "{}_create".format(name): measure_time(
+                    lambda cls=cls: [cls(lat, lng) for lat, lng in values], repeat=15
+                ),
+                "{}_str".format(name): measure_time(lambda a=a: [str(a) for _ in values]),
+                "{}_eq".format(name): measure_time(lambda a=a, b=b: [a == b for _ in values]),
+            }
+        )
+
+    return results
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Loading ``LatLongField`` values through the ORM
+"""
+
+from __future__ import unicode_literals
+
+from tests.models import MyModel
+from treasuremap import arrays, query
+from treasuremap.fields import LatLong
+from treasuremap.functions import Distance
+from treasuremap.geo import haversine
+
+from .base import make_values, measure_time, setup_database
+
+
+def run(count):
+    setup_database()
+
+    MyModel.objects.all().delete()
+    MyModel.objects.bulk_create(
+        [MyModel(empty_point="{};{}".format(lat, lng)) for lat, lng in make_values(count)],
+        batch_size=1000,
+    )
+
+    queryset = MyModel.objects.all()
+    point = LatLong(-60, 10)
+
+    def nearest_python():
+        points = queryset.values_list("pk", "empty_point")
+        return sorted(
+            points,
+            key=lambda row: haversine(-60, 10, float(row[1].latitude), float(row[1].longitude)),
+        )[:20]
+
+    try:
+        results = {
+            "queryset_list": measure_time(lambda: list(queryset.all()), repeat=3),
+            "queryset_iterator": measure_time(
+                lambda: list(queryset.iterator(chunk_size=2000)), repeat=3
+            ),
+            "queryset_values_list": measure_time(
+                lambda: list(queryset.values_list("empty_point", flat=True)), repeat=3
+            ),
+            "nearest_python": measure_time(nearest_python, repeat=3),
+            "nearest_stream": measure_time(
+                lambda: query.nearest(queryset, "empty_point", point, k=20), repeat=3
+            ),
+            "nearest_stream_max_distance": measure_time(
+                lambda: query.nearest(queryset, "empty_point", point, k=20, max_distance=500),
+                repeat=3,
+            ),
+            "nearest_distance": measure_time(
+                lambda: list(
+                    queryset.annotate(d=Distance("empty_point", point))
+                    .order_by("d")
+                    .values_list("pk")[:20]
+                ),
+                repeat=3,
+            ),
+            "nearest_near_distance": measure_time(
+                lambda: list(
+                    queryset.filter(empty_point__near=(point, 500))
+                    .annotate(d=Distance("empty_point", point))
+                    .order_by("d")
+                    .values_list("pk")[:20]
+                ),
+                repeat=3,
+            ),
+        }
+        if arrays.np is not None:
+            results["to_numpy"] = measure_time(
+                lambda: arrays.to_numpy(queryset, "empty_point"), repeat=3
+            )
+        return results
+    finally:
+        MyModel.objects.all().delete()
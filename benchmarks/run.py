@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Run the benchmark suite against the SQLite settings in ``tests/settings.py``
+
+Usage: PYTHONPATH=. python -m benchmarks.run [--save] [--check] [--scale 0.1] [suite ...]
+
+Timings are the best wall time in seconds of several runs, ``*_bytes_*``
+values are bytes. With ``--save`` the results replace the baseline, with
+``--check`` the exit status is non-zero when any result is slower than
+the baseline by more than ``--tolerance``.
+"""
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+
+from .base import setup_django
+
+# suite name, number of objects / iterations / forms
+SUITES = (
+    ("latlong", 100000),
+    ("fields", 100000),
+    ("queryset", 100000),
+    ("storage", 100000),
+    ("geo", 1000),
+    ("index", 100000),
+    ("export", 100000),
+    ("importer", 100000),
+    ("validators", 100000),
+    ("backends", 10000),
+    ("widgets", 500),
+)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def run_suites(names, scale):
+    results = {}
+    for name, count in SUITES:
+        if names and name not in names:
+            continue
+        module = importlib.import_module("benchmarks.{}".format(name))
+        for key, value in module.run(max(int(count * scale), 100)).items():
+            results["{}.{}".format(name, key)] = value
+    return results
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path, results, scale):
+    """
+    Update the baseline, results of suites that were not run are kept
+    """
+    import django  # pylint: disable=import-outside-toplevel
+
+    data = {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "scale": scale,
+        "results": dict(load_baseline(path), **results),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def report(results, baseline, tolerance):
+    regressions = []
+    print("{:<45}{:>14}{:>14}{:>9}".format("benchmark", "baseline", "current", "ratio"))
+    for key, value in results.items():
+        base = baseline.get(key)
+        if base:
+            ratio = value / base
+            flag = " !" if ratio > 1 + tolerance else ""
+            if flag:
+                regressions.append(key)
+            print("{:<45}{:>14.4f}{:>14.4f}{:>8.2f}{}".format(key, base, value, ratio, flag))
+        else:
+            print("{:<45}{:>14}{:>14.4f}".format(key, "-", value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="django-treasuremap benchmarks")
+    parser.add_argument("suites", nargs="*", help="run only these suites")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the default sizes")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="save results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail on regressions")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="allowed slowdown, 0.3 means 30%%"
+    )
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    results = run_suites(args.suites, args.scale)
+    regressions = report(results, load_baseline(args.baseline), args.tolerance)
+
+    if args.save:
+        save_baseline(args.baseline, results, args.scale)
+
+    if args.check and regressions:
+        print("Regressions: {}".format(", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+String storage of ``LatLongField`` against the integer ``PackedLatLongField``
+"""
+
+from __future__ import unicode_literals
+
+from django.db import connection
+
+from tests.models import MyModel, PackedModel
+from treasuremap.fields import LatLong, LatLongField, PackedLatLongField
+
+from .base import make_values, measure_time, setup_database
+
+
+def used_pages():
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA page_count")
+        pages = cursor.fetchone()[0]
+        cursor.execute("PRAGMA freelist_count")
+        return pages - cursor.fetchone()[0]
+
+
+def bytes_per_row(field, db_type, values):
+    """
+    Size of an indexed table with one column, per row
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA page_size")
+        page_size = cursor.fetchone()[0]
+
+        before = used_pages()
+        cursor.execute("CREATE TABLE benchmark_storage (point {} NOT NULL)".format(db_type))
+        cursor.execute("CREATE INDEX benchmark_storage_point ON benchmark_storage (point)")
+        cursor.executemany(
+            "INSERT INTO benchmark_storage (point) VALUES (%s)",
+            [(field.get_db_prep_value(value, connection),) for value in values],
+        )
+        size = (used_pages() - before) * page_size
+        cursor.execute("DROP TABLE benchmark_storage")
+
+    return size / len(values)
+
+
+def run(count):
+    setup_database()
+
+    values = [LatLong(lat, lng) for lat, lng in make_values(count)]
+    # about a tenth of the rows
+    bbox = (-60, -180, -53, 180)
+
+    MyModel.objects.all().delete()
+    PackedModel.objects.all().delete()
+    MyModel.objects.bulk_create([MyModel(empty_point=v) for v in values], batch_size=1000)
+    PackedModel.objects.bulk_create([PackedModel(point=v) for v in values], batch_size=1000)
+
+    char = MyModel.objects.all()
+    packed = PackedModel.objects.all()
+    try:
+        return {
+            "char_bytes_per_row": bytes_per_row(LatLongField(), "varchar(24)", values),
+            "packed_bytes_per_row": bytes_per_row(PackedLatLongField(), "bigint", values),
+            "char_list": measure_time(lambda: list(char.values_list("empty_point")), repeat=3),
+            "packed_list": measure_time(lambda: list(packed.values_list("point")), repeat=3),
+            "char_within_bbox": measure_time(
+                lambda: list(char.filter(empty_point__within_bbox=bbox).values_list("pk")),
+                repeat=3,
+            ),
+            "packed_within_bbox": measure_time(
+                lambda: list(packed.filter(point__within_bbox=bbox).values_list("pk")), repeat=3
+            ),
+        }
+    finally:
+        MyModel.objects.all().delete()
+        PackedModel.objects.all().delete()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Validation of many coordinates, one by one and in one batch
+"""
+
+from __future__ import unicode_literals
+
+from treasuremap import validators
+
+from .base import make_values, measure_time, setup_django
+
+
+def run(count):
+    setup_django()
+
+    values = ["{};{}".format(lat, lng) for lat, lng in make_values(count)]
+    pairs = [(float(lat), float(lng)) for lat, lng in make_values(count)]
+
+    results = {
+        "one_by_one": measure_time(
+            lambda: [validators.check_latlong(value, precision=6) for value in values], repeat=3
+        ),
+        "batch_python": measure_time(
+            lambda: validators.check_latlongs(values, precision=6, use_numpy=False), repeat=3
+        ),
+    }
+    if validators.np is not None:
+        array = validators.np.array(pairs)
+        results.update(
+            {
+                "batch_numpy_strings": measure_time(
+                    lambda: validators.check_latlongs(values, precision=6), repeat=3
+                ),
+                "batch_numpy_array": measure_time(
+                    lambda: validators.check_latlongs(array, precision=6), repeat=3
+                ),
+            }
+        )
+    return results
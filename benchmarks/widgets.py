@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Construction, rendering and media of ``MapWidget`` in single forms and formsets
+"""
+
+from __future__ import unicode_literals
+
+from django import forms
+from django.conf import settings
+from django.forms.renderers import get_default_renderer
+from django.test.utils import override_settings
+
+from treasuremap.fields import LatLong
+from treasuremap.forms import LatLongField
+from treasuremap.widgets import AdminMapWidget, MapWidget
+
+from .base import measure_time
+
+
+class PointForm(forms.Form):
+    point = LatLongField()
+
+
+def run(count):
+    renderer = get_default_renderer()
+    widget = MapWidget()
+    admin_widget = AdminMapWidget()
+    value = LatLong(55.755826, 37.617300)
+
+    formset_class = forms.formset_factory(PointForm, extra=count)
+
+    results = {
+        "widget_init": measure_time(lambda: [MapWidget() for _ in range(count)]),
+        "widget_render": measure_time(
+            lambda: [widget.render("point", value, renderer=renderer) for _ in range(count)]
+        ),
+        "admin_widget_render": measure_time(
+            lambda: [admin_widget.render("point", value, renderer=renderer) for _ in range(count)]
+        ),
+        "widget_media": measure_time(lambda: [str(widget.media) for _ in range(count)]),
+        "formset_init": measure_time(lambda: formset_class().forms, repeat=3),
+        "formset_render": measure_time(lambda: str(formset_class()), repeat=3),
+        "formset_media": measure_time(lambda: str(formset_class().media), repeat=3),
+    }
+
+    with override_settings(TREASURE_MAP=dict(settings.TREASURE_MAP, FAST_RENDER=True)):
+        widget = MapWidget()
+        results.update(
+            {
+                "widget_render_fast": measure_time(
+                    lambda: [widget.render("point", value, renderer=renderer) for _ in range(count)]
+                ),
+                "formset_render_fast": measure_time(lambda: str(formset_class()), repeat=3),
+            }
+        )
+
+    return results
@@ -48,6 +48,7 @@ setup(
     package_data=get_package_data("treasuremap"),
     include_package_data=True,
     install_requires=[],
+    extras_require={"numpy": ["numpy"]},
     python_requires=">=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*",
     zip_safe=False,
     platforms="any",
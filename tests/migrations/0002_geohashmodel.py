@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+import treasuremap.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeohashModel",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "point",
+                    treasuremap.fields.LatLongField(
+                        blank=True, geohash_field="point_geohash", max_length=24, null=True
+                    ),
+                ),
+                ("point_geohash", models.CharField(blank=True, db_index=True, max_length=12)),
+            ],
+        ),
+    ]
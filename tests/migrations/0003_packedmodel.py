@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+import treasuremap.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests", "0002_geohashmodel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackedModel",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "point",
+                    treasuremap.fields.PackedLatLongField(blank=True, db_index=True, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+import treasuremap.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tests", "0003_packedmodel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NativePointModel",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "point",
+                    treasuremap.fields.LatLongField(
+                        blank=True, max_length=24, native_point=True, null=True
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -5,9 +5,25 @@ from __future__ import unicode_literals
 from django.db import models
 
 from treasuremap import fields
+from treasuremap.query import LatLongQuerySet
 
 
 class MyModel(models.Model):
     empty_point = fields.LatLongField()
     null_point = fields.LatLongField(blank=True, null=True)
     default_point = fields.LatLongField(default=fields.LatLong(33, 44))
+
+    objects = LatLongQuerySet.as_manager()
+
+
+class GeohashModel(models.Model):
+    point = fields.LatLongField(blank=True, null=True, geohash_field="point_geohash")
+    point_geohash = models.CharField(max_length=12, blank=True, db_index=True)
+
+
+class PackedModel(models.Model):
+    point = fields.PackedLatLongField(blank=True, null=True, db_index=True)
+
+
+class NativePointModel(models.Model):
+    point = fields.LatLongField(blank=True, null=True, native_point=True)
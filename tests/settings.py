@@ -1,3 +1,5 @@
+import os
+
 SECRET_KEY = "testkey"
 
 DATABASES = {
@@ -7,6 +9,17 @@ DATABASES = {
     }
 }
 
+# run the tests on PostgreSQL, as in CI
+if os.environ.get("POSTGRES_HOST"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "HOST": os.environ["POSTGRES_HOST"],
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "NAME": os.environ.get("POSTGRES_DB", "treasuremap"),
+        "USER": os.environ.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+    }
+
 INSTALLED_APPS = (
     "django.contrib.auth",
     "django.contrib.contenttypes",
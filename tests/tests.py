@@ -2,22 +2,51 @@
 
 from __future__ import unicode_literals
 
+import csv
+import gc
+import io
+import json
+import os
+import pickle
+import random
+import tempfile
+import time
+import unittest
 from decimal import Decimal, InvalidOperation
+from unittest import mock
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Max, Min
 from django.forms.renderers import get_default_renderer
-from django.test import TestCase
-from django.test.utils import override_settings
-
+from django.http import Http404
+from django.template import TemplateDoesNotExist
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import translation
+
+from treasuremap import arrays, clusters, export, geo, importer
+from treasuremap import index as index_module
+from treasuremap import query, tiles, validators
 from treasuremap.backends.base import BaseMapBackend
 from treasuremap.backends.google import GoogleMapBackend
 from treasuremap.backends.yandex import YandexMapBackend
-from treasuremap.fields import LatLong, LatLongField
+from treasuremap.fields import LatLong, LatLongField, LatLongPool, PackedLatLongField
 from treasuremap.forms import LatLongField as FormLatLongField
-from treasuremap.utils import get_backend, import_class
-from treasuremap.widgets import AdminMapWidget, MapWidget
+from treasuremap.functions import Distance, Latitude, Longitude
+from treasuremap.index import SpatialIndex, get_index, register_index, unregister_index
+from treasuremap.management.commands.treasuremap_import import Command
+from treasuremap.operations import BackfillGeohash, backfill_geohash
+from treasuremap.utils import get_backend, import_class, load_backend
+from treasuremap.validators import LatLongValidator, check_latlongs, validate_latlong
+from treasuremap.views import ClusterView, TileView
+from treasuremap.widgets import AdminMapWidget, ClusterMap, MapWidget
 
-from .models import MyModel
+from .models import GeohashModel, MyModel, NativePointModel, PackedModel
 
 
 class LatLongObjectTestCase(TestCase):
@@ -57,6 +86,66 @@ class LatLongObjectTestCase(TestCase):
             LatLong(latitude=33.300, longitude=44.441), LatLong(latitude=22.300, longitude=44.441)
         )
 
+    def test_latlog_object_eq_mixed_types(self):
+        self.assertEqual(LatLong(33.3, 44), LatLong("33.300000", Decimal("44.0000001")))
+        self.assertNotEqual(LatLong(33.3, 44), LatLong("33.300001", 44))
+
+    def test_latlog_object_slots(self):
+        latlong = LatLong(33.3, 44.4)
+        self.assertFalse(hasattr(latlong, "__dict__"))
+
+    def test_latlog_object_set_value(self):
+        latlong = LatLong()
+        latlong.latitude = "-12.5"
+        latlong.longitude = 7
+        self.assertEqual(latlong.latitude, Decimal("-12.5"))
+        self.assertEqual(latlong.longitude, Decimal(7))
+        self.assertEqual(str(latlong), "-12.500000;7.000000")
+
+    def test_latlog_object_keep_precision(self):
+        latlong = LatLong("0.1234567", "-0.000000")
+        self.assertEqual(latlong.latitude, Decimal("0.1234567"))
+        self.assertEqual(str(latlong), "0.123457;-0.000000")
+
+    def test_latlog_object_deconstruct(self):
+        self.assertEqual(
+            LatLong(33, 44.5).deconstruct(), ("treasuremap.fields.LatLong", (33, 44.5), {})
+        )
+        self.assertEqual(
+            LatLong("22.123456", "-1").deconstruct(),
+            ("treasuremap.fields.LatLong", (22.123456, -1), {}),
+        )
+
+    def test_latlog_object_pickle(self):
+        latlong = LatLong("22.123456", 33.654321)
+        self.assertEqual(pickle.loads(pickle.dumps(latlong)), latlong)
+
+    def test_latlog_object_hash(self):
+        self.assertEqual(hash(LatLong(33.3, 44)), hash(LatLong("33.300000", "44.0000001")))
+        self.assertEqual(
+            len({LatLong(33.3, 44), LatLong("33.300000", "44.0000001"), LatLong(33.3, 45)}), 2
+        )
+        self.assertEqual({LatLong(1, 2): "a"}[LatLong("1.0", "2.0")], "a")
+
+
+class LatLongPoolTestCase(TestCase):
+    def test_get(self):
+        pool = LatLongPool()
+
+        latlong = pool.get("33.300000", 44)
+        self.assertIs(pool.get("33.3", "44"), latlong)
+        self.assertIsNot(pool.get(33.3, 44), latlong)
+        self.assertEqual(pool.get(33.3, 44), latlong)
+
+    def test_release_unused(self):
+        pool = LatLongPool()
+
+        latlong = pool.get(1, 2)
+        self.assertEqual(len(pool), 1)
+        del latlong
+        gc.collect()
+        self.assertEqual(len(pool), 0)
+
 
 class LatLongFieldTestCase(TestCase):
     def test_latlog_field_create(self):
@@ -91,6 +180,126 @@ class LatLongFieldTestCase(TestCase):
         )
         self.assertIsNone(field.get_prep_value(None))
 
+    def test_get_db_prep_value(self):
+        field = LatLongField()
+        values = (
+            "",
+            "22.123456;33.654321",
+            "22.1;-33",
+            " 22.1234567;33.654321",
+            "-0.000000;0",
+            LatLong(22.123456, 33.654321),
+            LatLong("22.1234567", 33),
+            ("22.123456", "33.654321"),
+            [22.5, -33],
+            (Decimal("22.1234567"), 33),
+            [],
+        )
+
+        for value in values:
+            self.assertEqual(
+                field.get_db_prep_value(value, connection), str(field.to_python(value))
+            )
+        self.assertIsNone(field.get_db_prep_value(None, connection))
+
+    def test_get_db_prep_value_invalid(self):
+        field = LatLongField()
+
+        self.assertRaises(ValidationError, field.get_db_prep_value, "22.123456", connection)
+        self.assertRaises(ValidationError, field.get_db_prep_value, (1, 2, 3), connection)
+        self.assertRaises(InvalidOperation, field.get_db_prep_value, "a;1", connection)
+        self.assertRaises(InvalidOperation, field.get_db_prep_value, ("a", 1), connection)
+
+    def test_bulk_create_and_update(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=LatLong(1, 2)),
+                MyModel(empty_point="3.5;-4.25"),
+                MyModel(empty_point=(5, 6)),
+            ]
+        )
+        objects = list(MyModel.objects.order_by("pk"))
+        self.assertEqual(
+            [m.empty_point for m in objects], [LatLong(1, 2), LatLong(3.5, -4.25), LatLong(5, 6)]
+        )
+
+        for m in objects:
+            m.empty_point = (m.empty_point.longitude, m.empty_point.latitude)
+        MyModel.objects.bulk_update(objects, ["empty_point"])
+        self.assertEqual(
+            [m.empty_point for m in MyModel.objects.order_by("pk")],
+            [LatLong(2, 1), LatLong(-4.25, 3.5), LatLong(6, 5)],
+        )
+
+    def test_from_db_value(self):
+        field = LatLongField()
+
+        value = field.from_db_value("22.123456;-33.654321", None, None)
+        self.assertEqual(value, LatLong(22.123456, -33.654321))
+        self.assertEqual(value.latitude, Decimal("22.123456"))
+        self.assertEqual(str(value), "22.123456;-33.654321")
+        self.assertIsNone(field.from_db_value(None, None, None))
+
+    def test_from_db_value_legacy_format(self):
+        field = LatLongField()
+
+        self.assertEqual(field.from_db_value("", None, None), LatLong())
+        self.assertEqual(field.from_db_value("22.1;33", None, None), LatLong(22.1, 33))
+        self.assertEqual(
+            str(field.from_db_value("22.1234567;-0.000000", None, None)), "22.123457;-0.000000"
+        )
+        self.assertRaises(ValidationError, field.from_db_value, "22.123456", None, None)
+
+    def test_from_db_value_long_fraction(self):
+        field = LatLongField()
+
+        value = field.from_db_value("0.1000000000000000001;1", None, None)
+        self.assertEqual(value.latitude, Decimal("0.1000000000000000001"))
+        self.assertEqual(value, LatLong("0.1000000000000000001", 1))
+
+    def test_from_db_value_storage_format(self):
+        field = LatLongField()
+
+        value = field.from_db_value("-0.000000;0.000000", None, None)
+        self.assertEqual(str(value), "-0.000000;0.000000")
+        self.assertEqual(value.latitude, Decimal("-0.000000"))
+        self.assertEqual(field.from_db_value("1.0_0000;2.000000", None, None), LatLong(1, 2))
+        self.assertRaises(ArithmeticError, field.from_db_value, "1.00.000;2.000000", None, None)
+
+    def test_from_db_value_cache(self):
+        field = LatLongField(decode_cache_size=10)
+
+        first = field.from_db_value("22.123456;33.654321", None, None)
+        second = field.from_db_value("22.123456;33.654321", None, None)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(field._decode.cache_info().hits, 1)  # pylint: disable=protected-access
+
+    def test_from_db_value_intern(self):
+        field = LatLongField(intern_values=True)
+
+        first = field.from_db_value("22.123456;33.654321", None, None)
+        self.assertIs(field.from_db_value("22.123456;33.654321", None, None), first)
+        self.assertIsNot(field.from_db_value("22.123457;33.654321", None, None), first)
+        self.assertIs(field.from_db_value("", None, None), field.from_db_value("", None, None))
+
+        _, _, _, kwargs = field.deconstruct()
+        self.assertTrue(kwargs["intern_values"])
+
+    def test_latlog_field_intern(self):
+        MyModel.objects.bulk_create([MyModel(empty_point=LatLong(1, 2)) for _ in range(3)])
+        field = MyModel._meta.get_field("empty_point")  # pylint: disable=protected-access
+
+        self.assertEqual(len({id(m.empty_point) for m in MyModel.objects.all()}), 3)
+        with mock.patch.object(field, "_pool", LatLongPool()):
+            self.assertEqual(len({id(m.empty_point) for m in MyModel.objects.all()}), 1)
+
+    def test_deconstruct_decode_cache_size(self):
+        field = LatLongField(decode_cache_size=10)
+        _, _, _, kwargs = field.deconstruct()
+        self.assertEqual(kwargs["decode_cache_size"], 10)
+        self.assertNotIn("decode_cache_size", LatLongField().deconstruct()[3])
+
     def test_get_formfield(self):
         field = LatLongField()
         form_field = field.formfield()
@@ -104,6 +313,1446 @@ class LatLongFieldTestCase(TestCase):
         self.assertEqual(field.max_length, new_instance.max_length)
 
 
+class FunctionsTestCase(TestCase):
+    def setUp(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=LatLong(10.5, -20.25)),
+                MyModel(empty_point=LatLong(-33.123456, 151.654321)),
+                MyModel(empty_point=LatLong(55.755826, 37.6173)),
+            ]
+        )
+
+    def test_annotate(self):
+        values = MyModel.objects.annotate(
+            lat=Latitude("empty_point"), lng=Longitude("empty_point")
+        ).order_by("pk")
+
+        self.assertEqual(
+            [(v.lat, v.lng) for v in values],
+            [(10.5, -20.25), (-33.123456, 151.654321), (55.755826, 37.6173)],
+        )
+
+    def test_filter_and_order(self):
+        queryset = (
+            MyModel.objects.annotate(lat=Latitude("empty_point"), lng=Longitude("empty_point"))
+            .filter(lat__gt=0, lng__lt=100)
+            .order_by("-lat")
+        )
+
+        self.assertEqual(
+            [m.empty_point for m in queryset], [LatLong(55.755826, 37.6173), LatLong(10.5, -20.25)]
+        )
+
+    def test_aggregate(self):
+        result = MyModel.objects.aggregate(
+            min_lat=Min(Latitude("empty_point")), max_lng=Max(Longitude("empty_point"))
+        )
+
+        self.assertEqual(result, {"min_lat": -33.123456, "max_lng": 151.654321})
+
+    def test_empty_string(self):
+        MyModel.objects.all().delete()
+        MyModel.objects.create()
+
+        self.assertEqual(
+            list(MyModel.objects.values_list(Latitude("empty_point"), Longitude("empty_point"))),
+            [(0.0, 0.0)],
+        )
+
+    def test_vendor_sql(self):
+        compiler = MyModel.objects.all().query.get_compiler("default")
+        # pylint: disable=protected-access
+        column = MyModel._meta.get_field("empty_point").get_col(MyModel._meta.db_table)
+
+        sql, _ = Latitude(column).as_postgresql(compiler, connection)
+        self.assertIn("SPLIT_PART(", sql)
+        self.assertIn("';', 1)", sql)
+        self.assertIn("WHEN '' THEN 0", sql)
+        sql, _ = Longitude(column).as_mysql(compiler, connection)
+        self.assertIn("SUBSTRING_INDEX(", sql)
+        self.assertIn("';', -1)", sql)
+
+
+class LookupsTestCase(TestCase):
+    def setUp(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=LatLong(55.755826, 37.6173)),  # Moscow
+                MyModel(empty_point=LatLong(59.938784, 30.314997)),  # Saint Petersburg
+                MyModel(empty_point=LatLong(51.507351, -0.127758)),  # London
+                MyModel(empty_point=LatLong(-17.713371, 178.065032)),  # Fiji
+                MyModel(empty_point=LatLong(-14.275632, -170.702036)),  # American Samoa
+            ]
+        )
+
+    def points(self, **kwargs):
+        return {m.empty_point for m in MyModel.objects.filter(**kwargs)}
+
+    def test_within_bbox(self):
+        self.assertEqual(
+            self.points(empty_point__within_bbox=(50, 20, 60, 40)),
+            {LatLong(55.755826, 37.6173), LatLong(59.938784, 30.314997)},
+        )
+        self.assertEqual(
+            self.points(empty_point__within_bbox=("50", "-10", "52", "0")),
+            {LatLong(51.507351, -0.127758)},
+        )
+
+    def test_within_bbox_antimeridian(self):
+        self.assertEqual(
+            self.points(empty_point__within_bbox=(-20, 170, -10, -170)),
+            {LatLong(-17.713371, 178.065032), LatLong(-14.275632, -170.702036)},
+        )
+
+    def test_within_bbox_invalid(self):
+        with self.assertRaises(ValueError):
+            MyModel.objects.filter(empty_point__within_bbox=(1, 2, 3))
+
+    def test_near(self):
+        moscow = LatLong(55.755826, 37.6173)
+
+        self.assertEqual(self.points(empty_point__near=(moscow, 10)), {moscow})
+        # about 634 km
+        self.assertEqual(
+            self.points(empty_point__near=(moscow, 700)),
+            {moscow, LatLong(59.938784, 30.314997)},
+        )
+        self.assertEqual(self.points(empty_point__near=((55.755826, 37.6173), 600)), {moscow})
+        self.assertEqual(len(self.points(empty_point__near=("55.755826;37.6173", 3000))), 3)
+
+    def test_near_antimeridian(self):
+        # about 1200 km
+        self.assertEqual(
+            self.points(empty_point__near=(LatLong(-17.713371, 178.065032), 1300)),
+            {LatLong(-17.713371, 178.065032), LatLong(-14.275632, -170.702036)},
+        )
+
+    def test_near_invalid(self):
+        with self.assertRaises(ValueError):
+            MyModel.objects.filter(empty_point__near=LatLong(1, 2))
+        with self.assertRaises(ValueError):
+            MyModel.objects.filter(empty_point__near=(None, 5))
+
+    def test_near_vendor_sql(self):
+        sql_query = MyModel.objects.filter(empty_point__near=(LatLong(1, 2), 5)).query
+        compiler = sql_query.get_compiler("default")
+        lookup = sql_query.where.children[0]
+
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            sql, params = lookup.as_sql(compiler, connection)
+        self.assertIn("ASIN(LEAST(1, SQRT(", sql)
+        self.assertEqual(sql.count("%s"), len(params))
+
+    def test_haversine(self):
+        self.assertAlmostEqual(geo.haversine(55.755826, 37.6173, 59.938784, 30.314997), 634.2, 1)
+        self.assertEqual(geo.haversine(10, 20, 10, 20), 0)
+
+    def test_bounding_box(self):
+        south, west, north, east = geo.bounding_box(0, 179.5, 111.2)
+        self.assertAlmostEqual(south, -1, 2)
+        self.assertAlmostEqual(north, 1, 2)
+        self.assertGreater(west, east)
+        # the pole is inside
+        south, west, north, east = geo.bounding_box(89.5, 0, 200)
+        self.assertAlmostEqual(south, 87.7, 2)
+        self.assertEqual((west, north, east), (-180, 90, 180))
+
+
+class GeohashTestCase(TestCase):
+    def test_encode(self):
+        self.assertEqual(geo.geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geo.geohash_encode(-90, -180, 3), "000")
+        self.assertEqual(geo.geohash_encode(90, 180, 3), "zzz")
+
+    def test_cover(self):
+        self.assertEqual(
+            geo.geohash_cover(55.6, 37.4, 55.9, 37.8), [("ucfs", "ucfx"), ("ucfy", "ucfz")]
+        )
+        self.assertEqual(
+            geo.geohash_cover(80, -180, 90, 180), [("b", "d"), ("f", "h"), ("u", "w"), ("y", None)]
+        )
+        self.assertIsNone(geo.geohash_cover(-90, -180, 90, 180))
+
+        # every point of the box is in a range
+        ranges = geo.geohash_cover(-20, 170, -10, -170)
+        for latitude, longitude in ((-20, 170), (-10, -170), (-15, 179.9), (-15, -179.9)):
+            geohash = geo.geohash_encode(latitude, longitude)
+            self.assertTrue(any(a <= geohash and (b is None or geohash < b) for a, b in ranges))
+
+    def test_field(self):
+        obj = GeohashModel(point=LatLong(57.64911, 10.40744))
+        self.assertTrue(obj.point_geohash.startswith("u4pruydqqvj"))
+
+        obj.point = "55.755826;37.6173"
+        self.assertEqual(obj.point_geohash, geo.geohash_encode(55.755826, 37.6173))
+        obj.point = None
+        self.assertEqual(obj.point_geohash, "")
+
+        obj.point = LatLong(1, 2)
+        obj.save()
+        self.assertEqual(GeohashModel.objects.get().point_geohash, geo.geohash_encode(1, 2))
+
+    def test_deferred(self):
+        GeohashModel.objects.create(point=LatLong(10, 10))
+
+        for queryset in (
+            GeohashModel.objects.only("pk"),
+            GeohashModel.objects.defer("point_geohash"),
+        ):
+            obj = queryset.get()
+            obj.point = LatLong(30, 30)
+            obj.save()
+            self.assertEqual(GeohashModel.objects.get().point_geohash, geo.geohash_encode(30, 30))
+            self.assertEqual(
+                GeohashModel.objects.filter(point__near=(LatLong(30, 30), 1)).count(), 1
+            )
+            GeohashModel.objects.update(point="10;10", point_geohash=geo.geohash_encode(10, 10))
+
+    def test_update_fields(self):
+        obj = GeohashModel.objects.create(point=LatLong(10, 10))
+        obj.point = LatLong(30, 30)
+
+        with self.assertRaises(ValueError):
+            obj.save(update_fields=["point"])
+        obj.save(update_fields=["point", "point_geohash"])
+        self.assertEqual(GeohashModel.objects.get().point_geohash, geo.geohash_encode(30, 30))
+
+    def test_bulk_create(self):
+        GeohashModel.objects.bulk_create([GeohashModel(point=LatLong(1, 2)), GeohashModel()])
+
+        self.assertEqual(
+            sorted(GeohashModel.objects.values_list("point_geohash", flat=True)),
+            ["", geo.geohash_encode(1, 2)],
+        )
+
+    def test_deconstruct(self):
+        field = LatLongField(geohash_field="point_geohash", geohash_precision=8)
+        _, _, _, kwargs = field.deconstruct()
+
+        self.assertEqual(kwargs["geohash_field"], "point_geohash")
+        self.assertEqual(kwargs["geohash_precision"], 8)
+        self.assertNotIn("geohash_field", LatLongField().deconstruct()[3])
+
+    def test_lookups(self):
+        GeohashModel.objects.bulk_create(
+            [
+                GeohashModel(point=LatLong(55.755826, 37.6173)),
+                GeohashModel(point=LatLong(59.938784, 30.314997)),
+                GeohashModel(point=LatLong(-17.713371, 178.065032)),
+                GeohashModel(point=LatLong(-14.275632, -170.702036)),
+            ]
+        )
+
+        queryset = GeohashModel.objects.filter(point__near=(LatLong(55.75, 37.61), 10))
+        self.assertIn("point_geohash", str(queryset.query))
+        self.assertEqual([m.point for m in queryset], [LatLong(55.755826, 37.6173)])
+        self.assertEqual(
+            GeohashModel.objects.filter(point__within_bbox=(-20, 170, -10, -170)).count(), 2
+        )
+        self.assertEqual(
+            GeohashModel.objects.filter(point__within_bbox=(-90, -180, 90, 180)).count(), 4
+        )
+
+    def test_backfill(self):
+        GeohashModel.objects.bulk_create([GeohashModel(point=LatLong(1, 2)), GeohashModel()])
+        GeohashModel.objects.update(point_geohash="")
+
+        operation = BackfillGeohash("geohashmodel", "point", batch_size=1)
+        state = MigrationLoader(connection).project_state()
+        editor = mock.Mock(connection=connection)
+        operation.database_forwards("tests", editor, state, state)
+
+        self.assertEqual(
+            sorted(GeohashModel.objects.values_list("point_geohash", flat=True)),
+            ["", geo.geohash_encode(1, 2)],
+        )
+        self.assertEqual(
+            operation.deconstruct(),
+            ("BackfillGeohash", ["geohashmodel", "point"], {"batch_size": 1}),
+        )
+
+    def test_backfill_old_django(self):
+        GeohashModel.objects.bulk_create([GeohashModel(point=LatLong(1, 2))])
+        GeohashModel.objects.update(point_geohash="")
+
+        with mock.patch("django.VERSION", (1, 11, 0, "final", 0)):
+            backfill_geohash(GeohashModel, "point", batch_size=1)
+
+        self.assertEqual(GeohashModel.objects.get().point_geohash, geo.geohash_encode(1, 2))
+
+
+class PackedLatLongFieldTestCase(TestCase):
+    def test_save_and_load(self):
+        values = [
+            LatLong(55.755826, 37.6173),
+            LatLong(-90, -180),
+            LatLong(90, 180),
+            LatLong("0.000001", "-0.000001"),
+        ]
+        PackedModel.objects.bulk_create([PackedModel(point=v) for v in values] + [PackedModel()])
+
+        self.assertEqual([m.point for m in PackedModel.objects.order_by("pk")], values + [None])
+
+    def test_db_type(self):
+        field = PackedModel._meta.get_field("point")  # pylint: disable=protected-access
+
+        self.assertEqual(field.db_type(connection), connection.data_types["BigIntegerField"])
+        self.assertIsNone(field.max_length)
+        self.assertNotIn("max_length", field.deconstruct()[3])
+
+    def test_get_db_prep_value(self):
+        field = PackedLatLongField()
+
+        self.assertEqual(field.get_db_prep_value(LatLong(-90, -180), connection), 0)
+        self.assertEqual(
+            field.get_db_prep_value("1.5;2.25", connection),
+            field.get_db_prep_value((1.5, 2.25), connection),
+        )
+        self.assertEqual(
+            field.from_db_value(field.get_db_prep_value("1.1234567;-2", connection), None, None),
+            LatLong("1.123457", -2),
+        )
+        with self.assertRaises(ValueError):
+            field.get_db_prep_value(LatLong(91, 0), connection)
+
+    def test_validate(self):
+        field = PackedLatLongField()
+        field.clean(LatLong(90, 180), None)
+
+        with self.assertRaises(ValidationError):
+            field.clean(LatLong(0, 180.5), None)
+
+    def test_queries(self):
+        PackedModel.objects.bulk_create(
+            [
+                PackedModel(point=LatLong(55.755826, 37.6173)),
+                PackedModel(point=LatLong(59.938784, 30.314997)),
+                PackedModel(point=LatLong(-17.713371, 178.065032)),
+            ]
+        )
+
+        self.assertEqual(
+            PackedModel.objects.get(point="55.755826;37.6173").point.latitude, Decimal("55.755826")
+        )
+        self.assertEqual(
+            list(
+                PackedModel.objects.annotate(lat=Latitude("point"), lng=Longitude("point"))
+                .order_by("lat")
+                .values_list("lat", "lng")
+            ),
+            [(-17.713371, 178.065032), (55.755826, 37.6173), (59.938784, 30.314997)],
+        )
+
+        queryset = PackedModel.objects.filter(point__within_bbox=(55.755826, 30, 60, 40))
+        self.assertIn('"point" BETWEEN', str(queryset.query))
+        self.assertEqual(queryset.count(), 2)
+        self.assertEqual(
+            PackedModel.objects.filter(point__near=(LatLong(55.75, 37.61), 10)).count(), 1
+        )
+
+
+class NativePointTestCase(TestCase):
+    def test_save_and_load(self):
+        values = [LatLong(55.755826, 37.6173), LatLong(-17.713371, 178.065032)]
+        NativePointModel.objects.bulk_create([NativePointModel(point=v) for v in values])
+        NativePointModel.objects.create()
+
+        self.assertEqual(
+            [m.point for m in NativePointModel.objects.order_by("pk")], values + [None]
+        )
+        self.assertEqual(NativePointModel.objects.get(point=values[0]).point, values[0])
+        self.assertEqual(
+            NativePointModel.objects.filter(point__within_bbox=(-20, 170, -10, -170)).get().point,
+            values[1],
+        )
+        self.assertEqual(
+            NativePointModel.objects.filter(point__near=(values[0], 10)).get().point, values[0]
+        )
+        self.assertEqual(
+            NativePointModel.objects.annotate(lat=Latitude("point"))
+            .filter(lat__gt=0)
+            .values_list("lat", flat=True)
+            .get(),
+            55.755826,
+        )
+
+    def test_db_type(self):
+        field = NativePointModel._meta.get_field("point")  # pylint: disable=protected-access
+
+        self.assertEqual(field.deconstruct()[3]["native_point"], True)
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            self.assertEqual(field.db_type(connection), "point")
+            self.assertEqual(field.get_placeholder(None, None, connection), "%s::point")
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            self.assertEqual(field.db_type(connection), "varchar(24)")
+            self.assertEqual(field.get_placeholder(None, None, connection), "%s")
+
+    def test_get_db_prep_value(self):
+        field = LatLongField(native_point=True)
+
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            self.assertEqual(
+                field.get_db_prep_value("55.755826;37.6173", connection), "(37.617300,55.755826)"
+            )
+            self.assertIsNone(field.get_db_prep_value(None, connection))
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            self.assertEqual(
+                field.get_db_prep_value("55.755826;37.6173", connection), "55.755826;37.617300"
+            )
+
+    def test_from_db_value(self):
+        field = LatLongField(native_point=True)
+
+        self.assertEqual(
+            field.from_db_value("(37.6173,55.755826)", None, None), LatLong(55.755826, 37.6173)
+        )
+        self.assertEqual(field.from_db_value("(1e-06,-90)", None, None), LatLong(-90, "0.000001"))
+        self.assertEqual(field.from_db_value("1.5;2.5", None, None), LatLong(1.5, 2.5))
+
+    def test_postgresql_sql(self):
+        queryset = NativePointModel.objects.annotate(
+            lat=Latitude("point"), lng=Longitude("point")
+        ).filter(point__within_bbox=(-20, 170, -10, -170), point=LatLong(1, 2))
+
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            sql, params = queryset.query.sql_with_params()
+
+        self.assertIn('"point")[1] AS "lat"', sql)
+        self.assertIn('"point")[0] AS "lng"', sql)
+        self.assertIn('"point" <@ box(point(%s, %s), point(%s, %s)) OR', sql)
+        self.assertIn('"point" ~= %s::point', sql)
+        self.assertIn("(2.000000,1.000000)", params)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    def test_postgresql_column(self):
+        NativePointModel.objects.create(point=LatLong(1, 2))
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_typeof(point)::text FROM tests_nativepointmodel")
+            self.assertEqual(cursor.fetchone()[0], "point")
+
+
+class DistanceTestCase(TestCase):
+    moscow = LatLong(55.755826, 37.6173)
+
+    def setUp(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=LatLong(51.507351, -0.127758), null_point=None),
+                MyModel(empty_point=LatLong(59.938784, 30.314997), null_point=self.moscow),
+                MyModel(empty_point=self.moscow, null_point=None),
+            ]
+        )
+
+    def test_annotate_and_order(self):
+        queryset = MyModel.objects.annotate(d=Distance("empty_point", self.moscow)).order_by("d")
+
+        self.assertEqual(
+            [m.empty_point for m in queryset[:2]], [self.moscow, LatLong(59.938784, 30.314997)]
+        )
+        distances = [m.d for m in queryset]
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 634.2, 1)
+        self.assertAlmostEqual(distances[2], 2500.0, -2)
+
+    def test_point(self):
+        for point in (self.moscow, (55.755826, 37.6173), "55.755826;37.6173"):
+            self.assertEqual(
+                MyModel.objects.annotate(d=Distance("empty_point", point)).filter(d=0).count(), 1
+            )
+        with self.assertRaises(ValueError):
+            Distance("empty_point", "55.755826")
+
+    def test_null(self):
+        self.assertEqual(
+            sorted(
+                MyModel.objects.annotate(d=Distance("null_point", self.moscow)).values_list(
+                    "d", flat=True
+                ),
+                key=str,
+            ),
+            [0.0, None, None],
+        )
+
+    def test_packed(self):
+        PackedModel.objects.create(point=LatLong(59.938784, 30.314997))
+
+        self.assertAlmostEqual(
+            PackedModel.objects.annotate(d=Distance("point", self.moscow)).get().d, 634.2, 1
+        )
+
+    def test_sqlite_function(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT treasuremap_distance(0, 0, 0, 1), treasuremap_distance(NULL, 0, 0, 1)"
+            )
+            distance, null = cursor.fetchone()
+
+        self.assertAlmostEqual(distance, 111.195, 3)
+        self.assertIsNone(null)
+
+    def test_vendor_sql(self):
+        queryset = MyModel.objects.annotate(d=Distance("empty_point", self.moscow)).order_by("d")
+
+        with mock.patch.object(connection, "vendor", "postgresql"):
+            sql, params = queryset.query.sql_with_params()
+
+        self.assertIn("ASIN(LEAST(1, SQRT(", sql)
+        self.assertEqual(sql.count("%s"), len(params))
+
+
+@unittest.skipIf(arrays.np is None, "NumPy is not installed")
+class ToNumpyTestCase(TestCase):
+    def setUp(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=LatLong(55.755826, 37.6173), null_point=LatLong(1, 2)),
+                MyModel(empty_point=LatLong(-0.000001, 180)),
+                MyModel(empty_point=LatLong(-90, -180.5)),
+            ]
+        )
+
+    def test_to_numpy(self):
+        array = MyModel.objects.order_by("pk").to_numpy("empty_point", chunk_size=2)
+
+        self.assertEqual(array.dtype, arrays.np.float64)
+        self.assertEqual(
+            array.tolist(), [[55.755826, 37.6173], [-0.000001, 180.0], [-90.0, -180.5]]
+        )
+
+    def test_null(self):
+        array = arrays.to_numpy(MyModel.objects.order_by("pk"), "null_point")
+
+        self.assertEqual(array[0].tolist(), [1.0, 2.0])
+        self.assertTrue(arrays.np.isnan(array[1:]).all())
+
+    def test_empty_string(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tests_mymodel SET empty_point = ''")
+
+        array = MyModel.objects.order_by("pk").to_numpy("empty_point")
+        self.assertEqual(array.tolist(), [[0.0, 0.0]] * 3)
+        self.assertEqual(MyModel.objects.first().empty_point, LatLong())
+
+    def test_empty(self):
+        self.assertEqual(MyModel.objects.none().to_numpy("empty_point").shape, (0, 2))
+        self.assertEqual(MyModel.objects.filter(pk=0).to_numpy("empty_point").shape, (0, 2))
+
+    def test_packed(self):
+        PackedModel.objects.bulk_create(
+            [PackedModel(point=LatLong(55.755826, 37.6173)), PackedModel()]
+        )
+        array = arrays.to_numpy(PackedModel.objects.order_by("pk"), "point")
+
+        self.assertEqual(array[0].tolist(), [55.755826, 37.6173])
+        self.assertTrue(arrays.np.isnan(array[1]).all())
+
+    def test_points(self):
+        self.assertEqual(
+            arrays.parse_points(["(37.6173,55.755826)", None])[0].tolist(), [55.755826, 37.6173]
+        )
+
+    def test_without_numpy(self):
+        with mock.patch.object(arrays, "np", None):
+            with self.assertRaises(ImproperlyConfigured):
+                MyModel.objects.to_numpy("empty_point")
+
+
+class GeoTestCase(TestCase):
+    moscow = LatLong(55.755826, 37.6173)
+    petersburg = LatLong(59.938784, 30.314997)
+
+    def test_distance(self):
+        self.assertAlmostEqual(geo.distance(self.moscow, self.petersburg), 634.17, 2)
+        self.assertEqual(
+            geo.distance((55.755826, 37.6173), "59.938784;30.314997"),
+            geo.distance(self.moscow, self.petersburg),
+        )
+        with self.assertRaises(ValueError):
+            geo.distance(self.moscow, "59.938784")
+
+    def test_bearing(self):
+        self.assertEqual(geo.bearing((0, 0), (1, 0)), 0)
+        self.assertEqual(geo.bearing((0, 0), (0, 1)), 90)
+        self.assertEqual(geo.bearing((0, 0), (0, -1)), 270)
+        self.assertAlmostEqual(geo.bearing(self.moscow, self.petersburg), 320.16, 2)
+
+    @unittest.skipIf(geo.np is None, "NumPy is not installed")
+    def test_to_array(self):
+        self.assertEqual(geo.to_array(self.moscow).tolist(), [[55.755826, 37.6173]])
+        self.assertEqual(
+            geo.to_array([self.moscow, (1, 2), "3;4"]).tolist(),
+            [[55.755826, 37.6173], [1, 2], [3, 4]],
+        )
+        self.assertEqual(geo.to_array([]).shape, (0, 2))
+        with self.assertRaises(ValueError):
+            geo.to_array([[1, 2, 3]])
+
+    @unittest.skipIf(geo.np is None, "NumPy is not installed")
+    def test_arrays(self):
+        distances = geo.distance_array([self.moscow, self.petersburg], self.moscow)
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], geo.distance(self.moscow, self.petersburg), 9)
+
+        bearings = geo.bearing_array([(0, 0), (0, 0)], [(1, 0), (0, -1)])
+        self.assertEqual(bearings.tolist(), [0, 270])
+
+    @unittest.skipIf(geo.np is None, "NumPy is not installed")
+    def test_distance_matrix(self):
+        origins = [self.moscow, self.petersburg, (0, 0), (-33.86, 151.21), (90, 0)]
+        destinations = [self.petersburg, (0, 179.5), (-90, 0)]
+
+        matrix = geo.distance_matrix(origins, destinations, chunk_size=2)
+        self.assertEqual(matrix.shape, (5, 3))
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                self.assertAlmostEqual(matrix[i, j], geo.distance(origin, destination), 6)
+
+        self.assertTrue(
+            (geo.distance_matrix(origins, destinations, chunk_size=2, workers=2) == matrix).all()
+        )
+        self.assertEqual(
+            [start for start, _ in geo.iter_distance_matrix(origins, destinations, chunk_size=2)],
+            [0, 2, 4],
+        )
+
+    def test_without_numpy(self):
+        with mock.patch.object(geo, "np", None):
+            with self.assertRaises(ImproperlyConfigured):
+                geo.distance_matrix([self.moscow], [self.petersburg])
+
+
+class SpatialIndexTestCase(TransactionTestCase):
+    moscow = LatLong(55.755826, 37.6173)
+    petersburg = LatLong(59.938784, 30.314997)
+    london = LatLong(51.507351, -0.127758)
+
+    def setUp(self):
+        self.objects = MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=self.moscow, null_point=self.moscow),
+                MyModel(empty_point=self.petersburg, null_point=self.petersburg),
+                MyModel(empty_point=self.london),
+            ]
+        )
+        self.pks = [obj.pk for obj in MyModel.objects.order_by("pk")]
+        self.index = register_index(MyModel, "empty_point", leaf_size=1)
+
+    def tearDown(self):
+        unregister_index(MyModel, "empty_point")
+
+    def test_nearest(self):
+        self.assertIs(get_index(MyModel, "empty_point"), self.index)
+
+        result = self.index.nearest((55.7, 37.6), k=2)
+        self.assertEqual([pk for pk, _ in result], self.pks[:2])
+        self.assertAlmostEqual(result[1][1], geo.distance((55.7, 37.6), self.petersburg), 6)
+        self.assertEqual(len(self.index.nearest(self.london, k=10)), 3)
+
+    def test_within(self):
+        self.assertEqual([pk for pk, _ in self.index.within(self.moscow, 700)], self.pks[:2])
+        self.assertEqual(self.index.within(self.moscow, 1), [(self.pks[0], 0.0)])
+        self.assertEqual(len(self.index.within(self.moscow, 30000)), 3)
+
+    def test_lazy_and_nulls(self):
+        index = SpatialIndex(MyModel, "null_point")
+        self.assertEqual(index.stats()["size"], 0)
+
+        self.assertEqual([pk for pk, _ in index.nearest(self.london, k=5)], self.pks[1::-1])
+        self.assertEqual(index.stats()["size"], 2)
+
+    def test_signals(self):
+        self.index.nearest(self.moscow)
+
+        new = MyModel.objects.create(empty_point=LatLong(55.75, 37.62))
+        self.assertEqual(self.index.nearest(self.moscow, k=2)[1][0], new.pk)
+
+        new.empty_point = self.london
+        new.save()
+        self.assertEqual(
+            [pk for pk, _ in self.index.within(self.london, 10)], [self.pks[2], new.pk]
+        )
+
+        MyModel.objects.get(pk=self.pks[0]).delete()
+        self.assertEqual(self.index.nearest(self.moscow)[0][0], self.pks[1])
+        self.assertEqual(self.index.stats()["changes"], 2)
+
+    def test_empty_string(self):
+        MyModel.objects.create()
+        self.assertEqual(self.index.nearest((0, 0))[0][1], 0.0)
+
+        self.index.rebuild()
+        new = MyModel.objects.create()
+        self.assertEqual(len(self.index.within((0, 0), 1)), 2)
+        self.assertIn(new.pk, [pk for pk, _ in self.index.within((0, 0), 1)])
+
+    def test_merge(self):
+        self.index.rebuild_threshold = 1
+        self.index.nearest(self.moscow)
+
+        MyModel.objects.get(pk=self.pks[2]).delete()
+        new = MyModel.objects.create(empty_point=self.london)
+        self.assertEqual(self.index.nearest(self.london)[0][0], new.pk)
+
+        stats = self.index.stats()
+        self.assertEqual((stats["size"], stats["changes"]), (3, 0))
+        self.assertGreater(stats["memory_bytes"], 0)
+        self.assertIsNotNone(stats["build_seconds"])
+
+    def test_max_age(self):
+        self.index.max_age = 0
+        self.index.nearest(self.moscow)
+
+        MyModel.objects.filter(pk=self.pks[0]).update(empty_point=self.london)
+        time.sleep(0.01)
+        self.assertEqual(self.index.nearest(self.moscow)[0][0], self.pks[1])
+
+    def test_random_points(self):
+        rng = random.Random(1)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+        index = SpatialIndex(MyModel, "empty_point", leaf_size=4)
+        # pylint: disable=protected-access
+        index.rebuild(list(range(500)), [index_module._to_vector(*p) for p in points])
+
+        for _ in range(20):
+            point = (rng.uniform(-90, 90), rng.uniform(-180, 180))
+            expected = sorted(range(500), key=lambda i, point=point: geo.distance(point, points[i]))
+            within = [i for i in expected if geo.distance(point, points[i]) <= 2000]
+            self.assertEqual([pk for pk, _ in index.nearest(point, k=5)], expected[:5])
+            self.assertEqual([pk for pk, _ in index.within(point, 2000)], within)
+            with mock.patch.object(index_module, "np", None):
+                self.assertEqual([pk for pk, _ in index.within(point, 2000)], within)
+
+    def test_rollback(self):
+        self.index.nearest(self.moscow)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                new = MyModel.objects.create(empty_point=self.moscow)
+                MyModel.objects.get(pk=self.pks[1]).delete()
+                raise RuntimeError
+
+        self.assertNotIn(new.pk, [pk for pk, _ in self.index.within(self.moscow, 10)])
+        self.assertEqual(self.index.nearest(self.petersburg)[0][0], self.pks[1])
+        self.assertEqual(self.index.stats()["changes"], 0)
+
+
+class NearestTestCase(TestCase):
+    moscow = LatLong(55.755826, 37.6173)
+    petersburg = LatLong(59.938784, 30.314997)
+    london = LatLong(51.507351, -0.127758)
+
+    def setUp(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=self.moscow, null_point=self.london),
+                MyModel(empty_point=self.petersburg),
+                MyModel(empty_point=self.london, null_point=self.moscow),
+            ]
+        )
+        self.pks = [obj.pk for obj in MyModel.objects.order_by("pk")]
+
+    def test_nearest(self):
+        result = MyModel.objects.nearest("empty_point", (55.7, 37.6), k=2)
+
+        self.assertEqual([pk for pk, _ in result], self.pks[:2])
+        self.assertAlmostEqual(result[1][1], geo.distance((55.7, 37.6), self.petersburg), 9)
+        self.assertEqual(
+            [pk for pk, _ in query.nearest(MyModel.objects.all(), "empty_point", self.london)],
+            self.pks[::-1],
+        )
+
+    def test_nulls_and_filters(self):
+        self.assertEqual(
+            [pk for pk, _ in MyModel.objects.nearest("null_point", self.moscow)],
+            [self.pks[2], self.pks[0]],
+        )
+        self.assertEqual(
+            [
+                pk
+                for pk, _ in MyModel.objects.exclude(pk=self.pks[0]).nearest(
+                    "empty_point", self.moscow, k=1
+                )
+            ],
+            [self.pks[1]],
+        )
+
+    def test_max_distance(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = MyModel.objects.nearest("empty_point", self.moscow, max_distance=700)
+
+        self.assertEqual([pk for pk, _ in result], self.pks[:2])
+        self.assertIn("BETWEEN", queries[0]["sql"])
+        self.assertEqual(
+            MyModel.objects.nearest("empty_point", self.moscow, max_distance=600)[0][1], 0
+        )
+
+    def test_storages(self):
+        PackedModel.objects.bulk_create(
+            [PackedModel(point=self.moscow), PackedModel(point=self.london)]
+        )
+
+        self.assertEqual(
+            [round(d) for _, d in query.nearest(PackedModel.objects.all(), "point", self.moscow)],
+            [0, round(geo.distance(self.moscow, self.london))],
+        )
+
+    def test_empty_string(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tests_mymodel SET empty_point = '' WHERE id = %s", [self.pks[1]])
+
+        result = MyModel.objects.nearest("empty_point", (0, 0), k=1)
+        self.assertEqual(result, [(self.pks[1], 0.0)])
+        self.assertEqual(MyModel.objects.get(pk=self.pks[1]).empty_point, LatLong())
+
+
+class ClusterTestCase(TestCase):
+    moscow = LatLong(55.755826, 37.6173)
+    moscow_center = LatLong(55.751244, 37.618423)
+    london = LatLong(51.507351, -0.127758)
+
+    def setUp(self):
+        cache.clear()
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=self.moscow),
+                MyModel(empty_point=self.moscow_center),
+                MyModel(empty_point=self.london),
+                # on the edges of the tiles at zoom 1
+                MyModel(empty_point=LatLong(0, 0)),
+            ]
+        )
+        self.view = ClusterView.as_view(model=MyModel, field_name="empty_point")
+
+    def tearDown(self):
+        clusters.disconnect_clusters(MyModel)
+
+    def get(self, **params):
+        return self.view(RequestFactory().get("/clusters/", params))
+
+    def test_tiles(self):
+        south, west, north, east = geo.tile_bbox(0, 0, 0)
+        self.assertAlmostEqual(north, geo.TILE_MAX_LATITUDE, 9)
+        self.assertAlmostEqual(south, -geo.TILE_MAX_LATITUDE, 9)
+        self.assertEqual((west, east), (-180, 180))
+
+        self.assertEqual(geo.tile_at(10, 55.755826, 37.6173), (619, 320))
+        self.assertEqual(geo.tile_bbox(1, 1, 0), (0.0, 0.0, north, 180.0))
+        self.assertEqual(geo.bbox_tiles(2, 10, 170, 20, -170), [(3, 1), (0, 1)])
+        self.assertEqual(len(geo.bbox_tiles(2, -90, -180, 90, 180)), 16)
+
+    def test_cluster_tile(self):
+        x, y = geo.tile_at(3, 55.755826, 37.6173)
+        result = clusters.cluster_tile(MyModel.objects.all(), "empty_point", 3, x, y)
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["count"], 2)
+        self.assertAlmostEqual(result[0]["latitude"], (55.755826 + 55.751244) / 2, 6)
+        self.assertNotIn("pk", result[0])
+
+        x, y = geo.tile_at(3, 51.507351, -0.127758)
+        result = clusters.cluster_tile(MyModel.objects.all(), "empty_point", 3, x, y)
+        self.assertEqual(
+            result,
+            [
+                {
+                    "latitude": 51.507351,
+                    "longitude": -0.127758,
+                    "count": 1,
+                    "pk": MyModel.objects.get(empty_point=self.london).pk,
+                }
+            ],
+        )
+
+    def test_points_counted_once(self):
+        for zoom in range(4):
+            result = clusters.cluster(
+                MyModel.objects.all(), "empty_point", (-90, -180, 90, 180), zoom
+            )
+            self.assertEqual(sum(item["count"] for item in result), 4)
+
+    def test_packed(self):
+        PackedModel.objects.bulk_create([PackedModel(point=self.moscow), PackedModel()])
+
+        result = clusters.cluster(PackedModel.objects.all(), "point", (50, 30, 60, 40), 5)
+        self.assertEqual([(item["latitude"], item["count"]) for item in result], [(55.755826, 1)])
+
+    def test_max_tiles(self):
+        with self.assertRaises(ValueError):
+            clusters.cluster(
+                MyModel.objects.all(), "empty_point", (-90, -180, 90, 180), 3, max_tiles=63
+            )
+
+    def test_view(self):
+        response = self.get(bbox="50,-10,60,40", zoom="3")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = json.loads(response.content.decode())
+        self.assertEqual(data["zoom"], 3)
+        self.assertEqual(sorted(item["count"] for item in data["clusters"]), [1, 2])
+
+        response = self.get(bbox="55.755,37.617,55.756,37.618", zoom="30")
+        self.assertEqual(json.loads(response.content.decode())["zoom"], 20)
+
+    def test_view_invalid(self):
+        for params in (
+            {},
+            {"bbox": "50,-10,60", "zoom": "3"},
+            {"bbox": "50,-10,60,x", "zoom": "3"},
+            {"bbox": "50,-10,60,40", "zoom": "-1"},
+            {"bbox": "60,-10,50,40", "zoom": "3"},
+            {"bbox": "50,-10,60,400", "zoom": "3"},
+            {"bbox": "-90,-180,90,180", "zoom": "10"},
+        ):
+            self.assertEqual(self.get(**params).status_code, 400, params)
+
+    def test_view_cache(self):
+        content = self.get(bbox="50,-10,60,40", zoom="3").content
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get(bbox="50,-10,60,40", zoom="3").content, content)
+        self.assertEqual(len(queries), 0)
+
+        MyModel.objects.create(empty_point=LatLong(55.7, 37.6))
+        data = json.loads(self.get(bbox="50,-10,60,40", zoom="3").content.decode())
+        self.assertEqual(sorted(item["count"] for item in data["clusters"]), [1, 3])
+
+        MyModel.objects.filter(empty_point=self.london).get().delete()
+        data = json.loads(self.get(bbox="50,-10,60,40", zoom="3").content.decode())
+        self.assertEqual([item["count"] for item in data["clusters"]], [3])
+
+    def test_view_models(self):
+        PackedModel.objects.create(point=self.moscow)
+        GeohashModel.objects.create(point=self.london)
+        packed = ClusterView.as_view(model=PackedModel, field_name="point")
+        geohash = ClusterView.as_view(model=GeohashModel, field_name="point")
+        # the same version for both models
+        cache.set_many(
+            {
+                clusters._version_key(PackedModel): 1,  # pylint: disable=protected-access
+                clusters._version_key(GeohashModel): 1,  # pylint: disable=protected-access
+            }
+        )
+
+        request = RequestFactory().get("/clusters/", {"bbox": "-90,-180,90,180", "zoom": "0"})
+        for view, point in ((packed, self.moscow), (geohash, self.london)):
+            data = json.loads(view(request).content.decode())
+            self.assertEqual(
+                [(item["latitude"], item["longitude"]) for item in data["clusters"]],
+                [(float(point.latitude), float(point.longitude))],
+            )
+
+        clusters.disconnect_clusters(PackedModel)
+        clusters.disconnect_clusters(GeohashModel)
+
+    def test_view_without_model(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ClusterView.as_view(field_name="point")
+
+    def test_cluster_map(self):
+        cluster_map = ClusterMap("/clusters/")
+
+        html = str(cluster_map)
+        self.assertIn('data-clusters-url="/clusters/"', html)
+        self.assertIn('"zoom": 5', html)
+        self.assertNotIn("<input", html)
+        self.assertIn("jquery.treasuremap-google.js", str(cluster_map.media))
+
+
+class TileViewTestCase(TestCase):
+    moscow = LatLong(55.755826, 37.6173)
+    moscow_center = LatLong(55.751244, 37.618423)
+    london = LatLong(51.507351, -0.127758)
+
+    def setUp(self):
+        cache.clear()
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=self.moscow),
+                MyModel(empty_point=self.london),
+                MyModel(empty_point=self.moscow_center),
+            ]
+        )
+        self.pks = [obj.pk for obj in MyModel.objects.order_by("pk")]
+        self.view = TileView.as_view(model=MyModel, field_name="empty_point")
+        self.tile = dict(zip(("x", "y"), geo.tile_at(5, 55.755826, 37.6173)), zoom=5)
+
+    def tearDown(self):
+        tiles.disconnect_tiles(MyModel, "empty_point")
+
+    def get(self, etag=None, **tile):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.view(RequestFactory().get("/tiles/", **headers), **tile)
+
+    def content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_tile(self):
+        response = self.get(**self.tile)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        content = self.content(response)
+        self.assertEqual(
+            content,
+            '{{"tile": [5, {x}, {y}], "scale": 1000000, "points": '
+            "[{},55755826,37617300,{},-4582,1123]}}".format(self.pks[0], self.pks[2], **self.tile),
+        )
+        self.assertEqual(
+            tiles.decode_tile_json(content),
+            [(self.pks[0], 55.755826, 37.6173), (self.pks[2], 55.751244, 37.618423)],
+        )
+
+    def test_chunks(self):
+        chunks = list(
+            tiles.iter_tile_json(MyModel.objects.all(), "empty_point", 0, 0, 0, chunk_size=2)
+        )
+
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual([pk for pk, _, _ in tiles.decode_tile_json("".join(chunks))], self.pks)
+
+    def test_empty_string(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tests_mymodel SET empty_point = '' WHERE id = %s", [self.pks[1]])
+
+        content = "".join(tiles.iter_tile_json(MyModel.objects.all(), "empty_point", 0, 0, 0))
+        self.assertIn((self.pks[1], 0.0, 0.0), tiles.decode_tile_json(content))
+
+    def test_save_empty_string(self):
+        origin = {"zoom": 5, "x": 16, "y": 16}
+        etag = self.get(**origin)["ETag"]
+
+        new = MyModel.objects.create()
+        self.assertNotEqual(self.get(**origin)["ETag"], etag)
+        etag = self.get(**origin)["ETag"]
+
+        new.delete()
+        self.assertNotEqual(self.get(**origin)["ETag"], etag)
+
+    def test_not_modified(self):
+        etag = self.get(**self.tile)["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(etag=etag, **self.tile)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 0)
+
+        # another tile is not changed
+        london_tile = dict(zip(("x", "y"), geo.tile_at(5, 51.507351, -0.127758)), zoom=5)
+        london_etag = self.get(**london_tile)["ETag"]
+        MyModel.objects.create(empty_point=LatLong(55.7, 37.6))
+        self.assertEqual(self.get(etag=etag, **self.tile).status_code, 200)
+        self.assertEqual(self.get(etag=london_etag, **london_tile).status_code, 304)
+
+    def test_move_and_delete(self):
+        london_tile = dict(zip(("x", "y"), geo.tile_at(5, 51.507351, -0.127758)), zoom=5)
+        etag = self.get(**self.tile)["ETag"]
+        london_etag = self.get(**london_tile)["ETag"]
+
+        obj = MyModel.objects.get(pk=self.pks[0])
+        obj.empty_point = self.london
+        obj.save()
+        self.assertNotEqual(self.get(**self.tile)["ETag"], etag)
+        self.assertNotEqual(self.get(**london_tile)["ETag"], london_etag)
+
+        etag = self.get(**self.tile)["ETag"]
+        obj.save(update_fields=["null_point"])
+        self.assertEqual(self.get(**self.tile)["ETag"], etag)
+
+        MyModel.objects.get(pk=self.pks[2]).delete()
+        self.assertNotEqual(self.get(**self.tile)["ETag"], etag)
+
+    def test_invalid_tile(self):
+        for tile in ({"zoom": 21, "x": 0, "y": 0}, {"zoom": 1, "x": 2, "y": 0}):
+            with self.assertRaises(Http404):
+                self.get(**tile)
+
+
+class ExportTestCase(TestCase):
+    moscow = LatLong(55.755826, 37.6173)
+    london = LatLong(51.507351, -0.127758)
+
+    def setUp(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=self.moscow, null_point=self.london),
+                MyModel(empty_point=self.london),
+            ]
+        )
+        self.pks = [obj.pk for obj in MyModel.objects.order_by("pk")]
+
+    def test_geojson(self):
+        content = "".join(
+            export.iter_geojson(
+                MyModel.objects.order_by("pk"), "null_point", fields=["empty_point"]
+            )
+        )
+        data = json.loads(content)
+
+        self.assertEqual(data["type"], "FeatureCollection")
+        self.assertEqual(
+            data["features"][0],
+            {
+                "type": "Feature",
+                "id": self.pks[0],
+                "geometry": {"type": "Point", "coordinates": [-0.127758, 51.507351]},
+                "properties": {"empty_point": "55.755826;37.617300"},
+            },
+        )
+        self.assertIsNone(data["features"][1]["geometry"])
+
+    def test_csv(self):
+        content = "".join(export.iter_csv(MyModel.objects.order_by("pk"), "null_point"))
+
+        self.assertEqual(
+            list(csv.reader(io.StringIO(content))),
+            [
+                ["id", "latitude", "longitude"],
+                [str(self.pks[0]), "51.507351", "-0.127758"],
+                [str(self.pks[1]), "", ""],
+            ],
+        )
+
+    def test_chunks(self):
+        MyModel.objects.bulk_create([MyModel(empty_point=self.moscow) for _ in range(3)])
+
+        chunks = list(export.iter_csv(MyModel.objects.all(), "empty_point", chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks).count("55.755826,37.617300"), 4)
+
+        chunks = list(export.iter_geojson(MyModel.objects.all(), "empty_point", chunk_size=2))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(len(json.loads("".join(chunks))["features"]), 5)
+
+    def test_text_decoder(self):
+        # pylint: disable=protected-access
+        decode = export.get_text_decoder(MyModel._meta.get_field("empty_point"), connection)
+
+        self.assertEqual(decode("55.755826;37.617300"), ("55.755826", "37.617300"))
+        self.assertEqual(decode("+55.7;.5"), ("55.7", "0.5"))
+        self.assertRaises(ValueError, decode, "nan;1")
+
+    def test_empty_string(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE tests_mymodel SET empty_point = '' WHERE id = %s", [self.pks[1]])
+
+        content = "".join(export.iter_geojson(MyModel.objects.order_by("pk"), "empty_point"))
+        features = json.loads(content)["features"]
+        self.assertEqual(features[1]["geometry"]["coordinates"], [0, 0])
+
+    def test_storages(self):
+        PackedModel.objects.create(point=self.moscow)
+
+        content = "".join(export.iter_csv(PackedModel.objects.all(), "point", header=False))
+        self.assertTrue(content.endswith(",55.755826,37.6173\r\n"))
+
+    def test_response(self):
+        response = export.export_response(
+            MyModel.objects.all(), "empty_point", format="csv", filename="points.csv"
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="points.csv"')
+        self.assertIn(b"51.507351,-0.127758", b"".join(response.streaming_content))
+
+        self.assertRaises(
+            ValueError, export.export_response, MyModel.objects.all(), "empty_point", format="kml"
+        )
+
+    def test_command(self):
+        output = io.StringIO()
+        call_command(
+            "treasuremap_export", "tests.MyModel", "empty_point", fields="null_point", stdout=output
+        )
+        self.assertEqual(len(json.loads(output.getvalue())["features"]), 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "points.csv")
+            call_command(
+                "treasuremap_export", "tests.MyModel", "empty_point", format="csv", output=path
+            )
+            with io.open(path, encoding="utf-8", newline="") as f:
+                self.assertEqual(len(list(csv.reader(f))), 3)
+
+    def test_command_errors(self):
+        for args, kwargs in (
+            (("tests.Missing", "point"), {}),
+            (("tests.MyModel", "missing"), {}),
+            (("tests.MyModel", "id"), {}),
+            (("tests.MyModel", "empty_point"), {"fields": "missing"}),
+        ):
+            with self.assertRaises(CommandError):
+                call_command("treasuremap_export", *args, stdout=io.StringIO(), **kwargs)
+
+
+class ValidatorsTestCase(TestCase):
+    values = [
+        "55.755826;37.6173",
+        "91;0",
+        "0;-180.5",
+        "nan;0",
+        "1.1234567;2",
+        None,
+        "90;-180",
+    ]
+
+    def codes(self, errors):
+        return {index: error.code for index, error in errors.items()}
+
+    def test_validate_latlong(self):
+        validate_latlong(LatLong(90, -180))
+        validate_latlong("55.755826;37.6173")
+        validate_latlong((Decimal("1.5"), 2))
+        validate_latlong(None)
+
+        for value, code in [
+            ("1,2", "invalid_separator"),
+            ("a;2", "invalid"),
+            ("91;0", "latitude_out_of_range"),
+            (LatLong(0, 180.5), "longitude_out_of_range"),
+            ((float("inf"), 0), "latitude_out_of_range"),
+        ]:
+            with self.assertRaises(ValidationError) as cm:
+                validate_latlong(value)
+            self.assertEqual(cm.exception.code, code)
+
+        with self.assertRaisesMessage(ValidationError, "Latitude 91 must be between -90 and 90."):
+            validate_latlong("91;0")
+
+    def test_precision(self):
+        validate_latlong("1.123456;2", precision=6)
+        validate_latlong("1.1234560;2.5", precision=6)
+        validate_latlong(LatLong(55.755826, 37.6173), precision=6)
+
+        with self.assertRaises(ValidationError) as cm:
+            validate_latlong((0.1234567, 2), precision=6)
+        self.assertEqual(cm.exception.code, "precision")
+
+        validator = LatLongValidator(precision=2)
+        self.assertEqual(validator, LatLongValidator(precision=2))
+        self.assertNotEqual(validator, LatLongValidator())
+        self.assertEqual(validator.deconstruct()[2], {"precision": 2})
+        with self.assertRaises(ValidationError):
+            validator("1.234;0")
+
+    def test_check_latlongs(self):
+        errors = check_latlongs(self.values, precision=6, use_numpy=False)
+
+        self.assertEqual(
+            self.codes(errors),
+            {
+                1: "latitude_out_of_range",
+                2: "longitude_out_of_range",
+                3: "latitude_out_of_range",
+                4: "precision",
+            },
+        )
+        self.assertEqual(check_latlongs([], use_numpy=False), {})
+        self.assertEqual(self.codes(check_latlongs(["1;2", "1;2;3"])), {1: "invalid_separator"})
+
+        # strings are checked at once, the same as one by one
+        one_by_one = {
+            index: validators.check_latlong(value, precision=6)
+            for index, value in enumerate(self.values + [" 1.50000000 ;-2", "1e-7;0"])
+        }
+        errors = check_latlongs(
+            self.values + [" 1.50000000 ;-2", "1e-7;0"], precision=6, use_numpy=False
+        )
+        self.assertEqual(
+            {index: e.messages for index, e in errors.items()},
+            {index: e.messages for index, e in one_by_one.items() if e is not None},
+        )
+        self.assertEqual(
+            self.codes(check_latlongs(["1;2", "a;2", (1, 200)], use_numpy=False)),
+            {1: "invalid", 2: "longitude_out_of_range"},
+        )
+
+    @unittest.skipIf(validators.np is None, "NumPy is not installed")
+    def test_numpy(self):
+        expected = check_latlongs(self.values, precision=6, use_numpy=False)
+
+        errors = check_latlongs(self.values, precision=6, use_numpy=True)
+        self.assertEqual(self.codes(errors), self.codes(expected))
+        self.assertEqual(
+            [e.messages for e in errors.values()], [e.messages for e in expected.values()]
+        )
+
+        pairs = [None if value is None else tuple(value.split(";")) for value in self.values]
+        self.assertEqual(
+            self.codes(check_latlongs(pairs, precision=6, use_numpy=True)), self.codes(expected)
+        )
+
+        array = validators.np.array([[1.5, 2], [91, 0], [0, 181], [1.1234567, 0]])
+        self.assertEqual(
+            self.codes(check_latlongs(array, precision=6)),
+            {1: "latitude_out_of_range", 2: "longitude_out_of_range", 3: "precision"},
+        )
+
+        # values NumPy cannot parse are checked one by one
+        self.assertEqual(
+            self.codes(check_latlongs(["1;2", "a;2", "1,2"], use_numpy=True)),
+            {1: "invalid", 2: "invalid_separator"},
+        )
+
+    def test_fields(self):
+        form_field = FormLatLongField()
+        self.assertEqual(form_field.clean(["1.5", "2"]), [Decimal("1.5"), Decimal("2")])
+        with self.assertRaisesMessage(ValidationError, "Latitude 91 must be between -90 and 90."):
+            form_field.clean(["91", "0"])
+
+        field = MyModel._meta.get_field("empty_point")  # pylint: disable=protected-access
+        self.assertEqual(field.clean("1;2", None), LatLong(1, 2))
+        with self.assertRaises(ValidationError) as cm:
+            field.clean("1;200", None)
+        self.assertEqual(cm.exception.error_list[0].code, "longitude_out_of_range")
+
+
+class ImportTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with io.open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        return path
+
+    def call(self, *args, **kwargs):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            "treasuremap_import", "tests.MyModel", *args, stdout=stdout, stderr=stderr, **kwargs
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_parse_batch(self):
+        start, count, values, errors = importer.parse_batch(
+            "tests.MyModel",
+            "null_point",
+            ["latitude", "longitude", "empty_point"],
+            (
+                5,
+                [
+                    ["55.755826", "37.6173", "1;2"],
+                    ["", "", "1;2"],
+                    ["91", "0", "1;2"],
+                    ["x", "0", "1;2"],
+                    ["1", "2", "1,2"],
+                ],
+            ),
+        )
+
+        self.assertEqual((start, count), (5, 5))
+        self.assertEqual(
+            values[0], {"null_point": "55.755826;37.617300", "empty_point": LatLong(1, 2)}
+        )
+        self.assertIsNone(values[1]["null_point"])
+        self.assertEqual([number for number, _ in errors], [7, 8, 9])
+        self.assertEqual(errors[0][1], "Latitude 91 must be between -90 and 90.")
+
+    def test_csv(self):
+        path = self.write(
+            "points.csv",
+            "lat,lng,null_point\n55.755826,37.6173,1;2\n51.507351,-0.127758,\n100,0,\n",
+        )
+
+        stdout, stderr = self.call(
+            "empty_point", path, latitude_column="lat", longitude_column="lng", batch_size=2
+        )
+
+        self.assertIn("Imported 2 rows, 1 invalid", stdout)
+        self.assertIn("Row 3: Latitude 100 must be between -90 and 90.", stderr)
+        self.assertEqual(
+            list(MyModel.objects.order_by("pk").values_list("empty_point", "null_point")),
+            [(LatLong(55.755826, 37.6173), LatLong(1, 2)), (LatLong(51.507351, -0.127758), None)],
+        )
+        self.assertFalse(os.path.exists(path + ".progress"))
+
+    def test_geojson(self):
+        MyModel.objects.bulk_create(
+            [
+                MyModel(empty_point=LatLong(1, 2)),
+                MyModel(empty_point=LatLong(3, 4), null_point="5;6"),
+            ]
+        )
+        path = self.write(
+            "points.geojson",
+            "".join(
+                export.iter_geojson(MyModel.objects.all(), "empty_point", fields=["null_point"])
+            ),
+        )
+
+        self.call("empty_point", path)
+        self.assertEqual(
+            list(MyModel.objects.order_by("pk").values_list("empty_point", "null_point"))[2:],
+            [(LatLong(1, 2), None), (LatLong(3, 4), LatLong(5, 6))],
+        )
+
+    def test_workers(self):
+        path = self.write(
+            "points.csv",
+            "latitude,longitude\n" + "".join("{0},{0}\n".format(i) for i in range(50)),
+        )
+
+        self.call("empty_point", path, workers=2, batch_size=7)
+        self.assertEqual(
+            [
+                value.latitude
+                for value in MyModel.objects.order_by("pk").values_list("empty_point", flat=True)
+            ],
+            list(range(50)),
+        )
+
+    def test_resume(self):
+        path = self.write(
+            "points.csv", "latitude,longitude\n" + "".join("{},0\n".format(i) for i in range(10))
+        )
+        errors = os.path.join(self.directory.name, "errors.csv")
+        save_progress = Command.save_progress
+
+        def interrupt(progress_file, path, stats):
+            save_progress(progress_file, path, stats)
+            if stats.rows >= 4:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(Command, "save_progress", staticmethod(interrupt)):
+            with self.assertRaises(KeyboardInterrupt):
+                self.call("empty_point", path, batch_size=2, errors=errors)
+        self.assertEqual(MyModel.objects.count(), 4)
+
+        with self.assertRaises(CommandError):
+            self.call("empty_point", path)
+
+        self.call("empty_point", path, batch_size=3, resume=True, errors=errors)
+        self.assertEqual(
+            [
+                value.latitude
+                for value in MyModel.objects.order_by("pk").values_list("empty_point", flat=True)
+            ],
+            list(range(10)),
+        )
+
+        with self.assertRaises(CommandError):
+            self.call("empty_point", path, resume=True)
+
+    def test_errors(self):
+        path = self.write("points.csv", "latitude,longitude,missing\n1,2,3\n")
+
+        for args in (
+            ("missing", path),
+            ("id", path),
+            ("empty_point", path + ".none"),
+            ("empty_point", path),
+        ):
+            with self.assertRaises(CommandError):
+                self.call(*args)
+
+
 class LoadBackendTestCase(TestCase):
     def test_load_google(self):
         backend = get_backend({"BACKEND": "treasuremap.backends.google.GoogleMapBackend"})
@@ -125,6 +1774,26 @@ class LoadBackendTestCase(TestCase):
     def test_load_not_subclass_mapbackend(self):
         self.assertRaises(ImproperlyConfigured, get_backend, {"BACKEND": "django.test.TestCase"})
 
+    def test_load_once(self):
+        config = {"BACKEND": "treasuremap.backends.yandex.YandexMapBackend"}
+        self.assertIs(get_backend(config), get_backend(config))
+        self.assertIs(get_backend(config), load_backend(config["BACKEND"]))
+
+    def test_load_without_backend_keep_config(self):
+        config = {}
+        get_backend(config)
+        self.assertEqual(config, {})
+
+    def test_reset_on_setting_changed(self):
+        backend = get_backend({})
+
+        with override_settings(TREASURE_MAP={"SIZE": (500, 500)}):
+            new_backend = get_backend({})
+            self.assertIsNot(new_backend, backend)
+            self.assertEqual(new_backend.width, 500)
+
+        self.assertEqual(get_backend({}).width, 400)
+
 
 class ImportClassTestCase(TestCase):
     def test_import_from_string(self):
@@ -237,6 +1906,39 @@ class BaseMapBackendTestCase(TestCase):
             backend.get_map_options(), {"latitude": 44.1, "longitude": -55.1, "zoom": 1}
         )
 
+    def test_base_map_options_json(self):
+        backend = BaseMapBackend()
+
+        self.assertEqual(
+            backend.map_options_json, '{"latitude": 51.562519, "longitude": -1.603156, "zoom": 5}'
+        )
+        self.assertIs(backend.map_options_json, backend.map_options_json)
+
+    @override_settings(TREASURE_MAP={"SIZE": (300, 200), "ADMIN_SIZE": (600, 500)})
+    def test_base_widget_context(self):
+        backend = BaseMapBackend()
+
+        self.assertEqual(
+            backend.widget_context,
+            {
+                "map_options": backend.map_options_json,
+                "width": 300,
+                "height": 200,
+                "only_map": True,
+                "lazy_init": False,
+            },
+        )
+        self.assertEqual(
+            backend.admin_widget_context,
+            {
+                "map_options": backend.map_options_json,
+                "width": 600,
+                "height": 500,
+                "only_map": True,
+                "lazy_init": False,
+            },
+        )
+
 
 class GoogleMapBackendTestCase(TestCase):
     def test_get_api_js_default(self):
@@ -267,6 +1969,25 @@ class YandexMapBackendTestCase(TestCase):
             backend.get_api_js(), "//api-maps.yandex.ru/2.1/?lang=en-us&apikey=random_string"
         )
 
+    def test_get_api_js_active_language(self):
+        backend = YandexMapBackend()
+
+        with translation.override("ru"):
+            self.assertEqual(backend.get_api_js(), "//api-maps.yandex.ru/2.1/?lang=ru")
+
+    def test_get_media_per_language(self):
+        backend = YandexMapBackend()
+
+        media = backend.get_media()
+        self.assertIs(backend.get_media(), media)
+        self.assertIn("lang=en-us", str(media))
+
+        with translation.override("ru"):
+            self.assertIn("lang=ru", str(backend.get_media()))
+            self.assertIs(backend.get_media(), backend.get_media())
+
+        self.assertIs(backend.get_media(), media)
+
 
 class FormTestCase(TestCase):
     def test_witget_render(self):
@@ -305,3 +2026,118 @@ class FormTestCase(TestCase):
         out_html = str(witget.media)
         self.assertIn("//maps.googleapis.com/maps/api/js?v=3.exp", out_html)
         self.assertIn("/static/treasuremap/default/js/jquery.treasuremap-google.js", out_html)
+
+    def test_witget_backend_override(self):
+        witget = MapWidget(backend="treasuremap.backends.yandex.YandexMapBackend")
+
+        self.assertEqual(witget.map_backend.NAME, "yandex")
+        self.assertIn("jquery.treasuremap-yandex.js", str(witget.media))
+
+    @override_settings(TREASURE_MAP={"BACKEND": "treasuremap.backends.yandex.YandexMapBackend"})
+    def test_witget_backend_settings(self):
+        witget = MapWidget()
+
+        self.assertEqual(witget.map_backend.NAME, "yandex")
+
+    def test_witget_backend_lazy(self):
+        witget = MapWidget(backend="treasuremap.backends.unknown.UnknownMapBackend")
+
+        self.assertRaises(ImportError, witget.render, "name", None, renderer=get_default_renderer())
+
+    def test_witget_render_only_map(self):
+        witget = MapWidget()
+
+        out_html = witget.render("name", LatLong(22.1, 33.6), renderer=get_default_renderer())
+        self.assertIn('<input type="hidden" name="name_0" value="22.100000">', out_html)
+        self.assertIn('<input type="hidden" name="name_1" value="33.600000">', out_html)
+
+    @override_settings(TREASURE_MAP={"ONLY_MAP": False})
+    def test_witget_render_inputs(self):
+        witget = MapWidget()
+
+        out_html = witget.render("name", LatLong(22.1, 33.6), renderer=get_default_renderer())
+        self.assertIn('<input type="number" name="name_0" value="22.100000">', out_html)
+        self.assertIn('<input type="number" name="name_1" value="33.600000">', out_html)
+
+    def test_witget_context_not_shared(self):
+        witget = MapWidget()
+
+        context = witget.get_context_widgets()
+        context["width"] = 1
+        self.assertEqual(witget.get_context_widgets()["width"], 400)
+
+    def test_witget_render_settings_changed(self):
+        witget = MapWidget()
+        renderer = get_default_renderer()
+
+        self.assertIn('"zoom": 5', witget.render("name", None, renderer=renderer))
+        with override_settings(TREASURE_MAP={"MAP_OPTIONS": {"zoom": 7}}):
+            self.assertIn('"zoom": 7', witget.render("name", None, renderer=renderer))
+
+    def test_witget_media_shared(self):
+        self.assertIs(MapWidget().media, MapWidget().media)
+        self.assertIs(MapWidget().media, AdminMapWidget().media)
+
+    def assertFastRenderEqual(self, witget, *args, **kwargs):
+        renderer = get_default_renderer()
+        out_html = witget.render(*args, renderer=renderer, **kwargs)
+
+        with override_settings(TREASURE_MAP=dict(settings.TREASURE_MAP, FAST_RENDER=True)):
+            self.assertTrue(witget.map_backend.fast_render)
+            self.assertEqual(witget.render(*args, renderer=renderer, **kwargs), out_html)
+
+    def test_witget_fast_render(self):
+        for witget_class in (MapWidget, AdminMapWidget):
+            witget = witget_class(attrs={"class": "point", "required": True, "disabled": False})
+
+            self.assertFastRenderEqual(witget, "name", LatLong(22.123456, -33.654321))
+            self.assertFastRenderEqual(witget, "name", None)
+            self.assertFastRenderEqual(
+                witget, "na<me>", LatLong(1, 2), attrs={"id": "id_name", "data-x": '"<&>'}
+            )
+
+    @override_settings(TREASURE_MAP={"ONLY_MAP": False, "SIZE": (300, 200)})
+    def test_witget_fast_render_inputs(self):
+        self.assertFastRenderEqual(MapWidget(), "name", LatLong(22.123456, -33.654321))
+
+    @override_settings(
+        TREASURE_MAP={"FAST_RENDER": True, "WIDGET_TEMPLATE": "treasuremap/custom.html"}
+    )
+    def test_witget_fast_render_custom_template(self):
+        witget = MapWidget()
+
+        self.assertRaises(
+            TemplateDoesNotExist, witget.render, "name", None, renderer=get_default_renderer()
+        )
+
+    @override_settings(TREASURE_MAP={"LAZY_INIT": True})
+    def test_witget_lazy_init_media(self):
+        out_html = str(MapWidget().media)
+
+        self.assertNotIn("//maps.googleapis.com/maps/api/js", out_html)
+        self.assertIn("/static/treasuremap/default/js/jquery.treasuremap-google.js", out_html)
+
+    @override_settings(TREASURE_MAP={"LAZY_INIT": True})
+    def test_witget_lazy_init_render(self):
+        witget = MapWidget()
+
+        out_html = witget.render("name", LatLong(22.1, 33.6), renderer=get_default_renderer())
+        self.assertIn(
+            '<span class="treasure-map" style="display: inline-block;" data-lazy-init="true" '
+            'data-api-js="//maps.googleapis.com/maps/api/js?v=3.exp" data-only-map="true">',
+            out_html,
+        )
+        self.assertIn('<input type="number" name="name_0" value="22.100000">', out_html)
+        self.assertFastRenderEqual(witget, "name", LatLong(22.1, 33.6))
+
+    @override_settings(TREASURE_MAP={"LAZY_INIT": True, "ONLY_MAP": False, "API_KEY": "a&b"})
+    def test_witget_lazy_init_render_inputs(self):
+        witget = MapWidget()
+
+        out_html = witget.render("name", None, renderer=get_default_renderer())
+        self.assertIn(
+            'data-lazy-init="true" data-api-js="//maps.googleapis.com/maps/api/js?v=3.exp&amp;'
+            'key=a%26b">',
+            out_html,
+        )
+        self.assertFastRenderEqual(witget, "name", None)
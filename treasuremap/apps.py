@@ -3,9 +3,15 @@
 from __future__ import unicode_literals
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 from django.utils.translation import gettext_lazy as _
 
 
 class TreasureMapConfig(AppConfig):
     name = "treasuremap"
     verbose_name = _("Treasure Map")
+
+    def ready(self):
+        from .functions import register_functions  # pylint: disable=import-outside-toplevel
+
+        connection_created.connect(register_functions, dispatch_uid="treasuremap_functions")
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from .compat import iterator
+from .functions import raw_column
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def parse_values(values):
+    """
+    Parse stored ``"lat;lng"`` strings to an (N, 2) float64 array, ``None``
+    becomes NaN and an empty string ``(0, 0)`` like ``LatLong()``
+    """
+    if not values:
+        return np.empty((0, 2), dtype=np.float64)
+
+    text = ";".join("nan;nan" if value is None else value or "0;0" for value in values)
+    return np.array(text.split(";"), dtype=np.float64).reshape(-1, 2)
+
+
+def parse_points(values):
+    """
+    Parse PostgreSQL points ``"(lng,lat)"`` to an (N, 2) float64 array of latitude, longitude
+    """
+    if not values:
+        return np.empty((0, 2), dtype=np.float64)
+
+    text = ",".join("nan,nan" if value is None else value.strip("()") for value in values)
+    return np.array(text.split(","), dtype=np.float64).reshape(-1, 2)[:, ::-1]
+
+
+def parse_packed(values):
+    """
+    Unpack ``PackedLatLongField`` integers to an (N, 2) float64 array, see ``fields._pack``
+    """
+    array = np.array([-1 if value is None else value for value in values], dtype=np.int64)
+
+    result = np.empty((len(array), 2), dtype=np.float64)
+    result[:, 0] = ((array >> 32) - 90000000) / 1e6
+    result[:, 1] = ((array & 0xFFFFFFFF) - 180000000) / 1e6
+    result[array < 0] = np.nan
+    return result
+
+
+def to_numpy(queryset, field_name, chunk_size=10000):
+    """
+    Coordinates of ``LatLongField`` ``field_name`` in ``queryset`` as an
+    (N, 2) float64 array of latitude, longitude, ``NULL`` rows are NaN
+
+    Stored values are fetched as they are and parsed in chunks of
+    ``chunk_size`` rows, no ``LatLong`` is created.
+    """
+    if np is None:
+        raise ImproperlyConfigured("to_numpy requires NumPy, install it with pip install numpy")
+
+    field = queryset.model._meta.get_field(field_name)  # pylint: disable=protected-access
+    connection = connections[queryset.db]
+
+    if getattr(field, "packed", False):
+        parse = parse_packed
+    elif getattr(field, "native_point", False) and field.uses_native_point(connection):
+        parse = parse_points
+    else:
+        parse = parse_values
+
+    rows = iterator(queryset.values_list(raw_column(field_name), flat=True), chunk_size)
+
+    chunks = []
+    chunk = []
+    for value in rows:
+        chunk.append(value)
+        if len(chunk) >= chunk_size:
+            chunks.append(parse(chunk))
+            chunk = []
+    chunks.append(parse(chunk))
+
+    return np.concatenate(chunks)
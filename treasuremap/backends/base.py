@@ -2,10 +2,16 @@
 
 from __future__ import unicode_literals
 
+import json
 from collections import OrderedDict
 
+from django import forms
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+from django.utils.translation import get_language
+
+DEFAULT_WIDGET_TEMPLATE = "treasuremap/widgets/map.html"
 
 
 class BaseMapBackend(object):
@@ -18,6 +24,7 @@ class BaseMapBackend(object):
 
     def __init__(self):
         self.options = getattr(settings, "TREASURE_MAP", {})
+        self._media = {}
         self.API_KEY = self.options.get("API_KEY", None)
 
         try:
@@ -50,13 +57,37 @@ class BaseMapBackend(object):
         """
         raise NotImplementedError()
 
+    def get_media(self):
+        """
+        Get widget media, built once per active language
+        """
+        language = get_language()
+        try:
+            return self._media[language]
+        except KeyError:
+            if self.lazy_init:
+                # the plugin loads the API itself
+                media = forms.Media(js=(self.get_js(),))
+            else:
+                media = forms.Media(js=(self.get_api_js(), self.get_js()))
+            self._media[language] = media
+            return media
+
     def get_widget_template(self):
-        return self.options.get("WIDGET_TEMPLATE", "treasuremap/widgets/map.html")
+        return self.options.get("WIDGET_TEMPLATE", DEFAULT_WIDGET_TEMPLATE)
 
     @property
     def only_map(self):
         return self.options.get("ONLY_MAP", True)
 
+    @property
+    def lazy_init(self):
+        return self.options.get("LAZY_INIT", False)
+
+    @property
+    def fast_render(self):
+        return self.options.get("FAST_RENDER", False)
+
     def get_map_options(self):
         map_options = self.options.get("MAP_OPTIONS", {})
         map_options = OrderedDict(sorted(map_options.items(), key=lambda x: x[1], reverse=True))
@@ -71,3 +102,27 @@ class BaseMapBackend(object):
             map_options["zoom"] = 5
 
         return map_options
+
+    @cached_property
+    def map_options_json(self):
+        """
+        Serialized map options, computed once per backend instance
+        """
+        return json.dumps(self.get_map_options())
+
+    @cached_property
+    def widget_context(self):
+        return {
+            "map_options": self.map_options_json,
+            "width": self.width,
+            "height": self.height,
+            "only_map": self.only_map,
+            "lazy_init": self.lazy_init,
+        }
+
+    @cached_property
+    def admin_widget_context(self):
+        context = dict(self.widget_context)
+        context["width"] = self.admin_width
+        context["height"] = self.admin_height
+        return context
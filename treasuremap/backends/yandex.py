@@ -10,6 +10,7 @@ except ImportError:
     from urllib.parse import urlencode
 
 from django.conf import settings
+from django.utils.translation import get_language
 
 from .base import BaseMapBackend
 
@@ -20,7 +21,7 @@ class YandexMapBackend(BaseMapBackend):
 
     def get_api_js(self):
         params = OrderedDict()
-        params["lang"] = settings.LANGUAGE_CODE
+        params["lang"] = get_language() or settings.LANGUAGE_CODE
 
         if self.API_KEY:
             params["apikey"] = self.API_KEY
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models import Avg, Count, Min, signals
+
+from .functions import GridIndex
+from .geo import bbox_tiles, tile_bbox
+from .tiles import tile_queryset
+
+
+def cluster_tile(queryset, field_name, zoom, x, y, cells=8):
+    """
+    Clusters of the points of ``queryset`` in the web map tile ``zoom/x/y``
+
+    Points are grouped in the database by a grid of ``cells`` by ``cells``
+    over the tile. A cluster is a dict of ``latitude`` and ``longitude``,
+    the centroid of its points, and ``count``, with ``pk`` of the point
+    when there is one, see ``tiles.tile_queryset``.
+    """
+    south, west, north, east = tile_bbox(zoom, x, y)
+    height = (north - south) / cells
+    width = (east - west) / cells
+
+    queryset = tile_queryset(queryset, field_name, zoom, x, y)
+
+    rows = (
+        queryset.annotate(
+            treasuremap_row=GridIndex("treasuremap_latitude", south, height),
+            treasuremap_col=GridIndex("treasuremap_longitude", west, width),
+        )
+        .order_by()
+        .values("treasuremap_row", "treasuremap_col")
+        .annotate(
+            treasuremap_count=Count("pk"),
+            treasuremap_centroid_latitude=Avg("treasuremap_latitude"),
+            treasuremap_centroid_longitude=Avg("treasuremap_longitude"),
+            treasuremap_pk=Min("pk"),
+        )
+    )
+
+    # the edges of the tile round to a cell outside of it
+    clusters = {}
+    for row in rows:
+        key = (
+            min(max(row["treasuremap_row"], 0), cells - 1),
+            min(max(row["treasuremap_col"], 0), cells - 1),
+        )
+        count = row["treasuremap_count"]
+        latitude = row["treasuremap_centroid_latitude"] * count
+        longitude = row["treasuremap_centroid_longitude"] * count
+        if key in clusters:
+            total, latitude_sum, longitude_sum, _ = clusters[key]
+            clusters[key] = (
+                total + count,
+                latitude_sum + latitude,
+                longitude_sum + longitude,
+                None,
+            )
+        else:
+            clusters[key] = (count, latitude, longitude, row["treasuremap_pk"])
+
+    result = []
+    for key in sorted(clusters):
+        count, latitude, longitude, pk = clusters[key]
+        item = {
+            "latitude": round(latitude / count, 6),
+            "longitude": round(longitude / count, 6),
+            "count": count,
+        }
+        if count == 1:
+            item["pk"] = pk
+        result.append(item)
+    return result
+
+
+def _version_key(model):
+    # pylint: disable=protected-access
+    return "treasuremap:clusters:{}".format(model._meta.label_lower)
+
+
+def _new_version():
+    # a counter lost from the cache restarts above the old one
+    return int(time.time() * 1000)
+
+
+def get_clusters_version(model, cache):
+    """
+    Version of the cached clusters of ``model``, changed by ``invalidate_clusters``
+    """
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_clusters(model, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Make the cached clusters of ``model`` stale
+    """
+    cache = caches[cache_alias]
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_version(), None)
+
+
+def connect_clusters(model, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Invalidate the cached clusters of ``model`` on ``post_save`` and
+    ``post_delete``, connecting twice is harmless
+    """
+
+    def handler(sender, **kwargs):  # pylint: disable=unused-argument
+        invalidate_clusters(sender, cache_alias)
+
+    # pylint: disable=protected-access
+    uid = "treasuremap_clusters_{}_{}".format(model._meta.label_lower, cache_alias)
+    signals.post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    signals.post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+def disconnect_clusters(model, cache_alias=DEFAULT_CACHE_ALIAS):
+    # pylint: disable=protected-access
+    uid = "treasuremap_clusters_{}_{}".format(model._meta.label_lower, cache_alias)
+    signals.post_save.disconnect(sender=model, dispatch_uid=uid)
+    signals.post_delete.disconnect(sender=model, dispatch_uid=uid)
+
+
+def cluster(
+    queryset,
+    field_name,
+    bbox,
+    zoom,
+    cells=8,
+    cache_alias=None,
+    key_prefix=None,
+    timeout=DEFAULT_TIMEOUT,
+    max_tiles=None,
+):
+    """
+    Clusters of the web map tiles at ``zoom`` that cover ``bbox``
+    ``(south, west, north, east)``, see ``cluster_tile``
+
+    With ``cache_alias`` the clusters of every tile are cached until
+    ``invalidate_clusters`` is called for the model, ``connect_clusters``
+    does it on saves. ``key_prefix`` tells querysets filtered in
+    different ways apart. Raises ``ValueError`` when the box takes more
+    than ``max_tiles`` tiles.
+    """
+    tiles = bbox_tiles(zoom, *bbox, max_tiles=max_tiles)
+
+    if cache_alias is None:
+        return [
+            item
+            for x, y in tiles
+            for item in cluster_tile(queryset, field_name, zoom, x, y, cells=cells)
+        ]
+
+    if key_prefix is None:
+        # pylint: disable=protected-access
+        key_prefix = "{}.{}".format(queryset.model._meta.label_lower, field_name)
+
+    cache = caches[cache_alias]
+    version = get_clusters_version(queryset.model, cache)
+    keys = [
+        "treasuremap:clusters:{}:{}:{}:{}:{}".format(key_prefix, cells, zoom, x, y)
+        for x, y in tiles
+    ]
+
+    found = cache.get_many(keys, version=version)
+    missing = {}
+    for key, (x, y) in zip(keys, tiles):
+        if key not in found:
+            missing[key] = cluster_tile(queryset, field_name, zoom, x, y, cells=cells)
+    if missing:
+        cache.set_many(missing, timeout, version=version)
+        found.update(missing)
+
+    return [item for key in keys for item in found[key]]
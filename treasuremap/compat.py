@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import django
+
+
+def iterator(queryset, chunk_size):
+    """
+    ``queryset.iterator(chunk_size=chunk_size)``, Django < 2.0 has no ``chunk_size``
+    """
+    if django.VERSION >= (2, 0):
+        return queryset.iterator(chunk_size=chunk_size)
+    return queryset.iterator()
+
+
+def bulk_update(manager, objs, fields):
+    """
+    ``manager.bulk_update(objs, fields)``, an ``UPDATE`` per object on Django < 2.2
+    """
+    if django.VERSION >= (2, 2):
+        manager.bulk_update(objs, fields)
+        return
+    for obj in objs:
+        manager.filter(pk=obj.pk).update(**{name: getattr(obj, name) for name in fields})
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import csv
+import io
+import math
+import re
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+from .compat import iterator
+from .fields import LatLong
+from .functions import raw_column
+
+# stored coordinates that are already JSON and CSV numbers
+_NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?\Z")
+
+FORMATS = {
+    "geojson": "application/geo+json",
+    "csv": "text/csv",
+}
+
+
+class JSONEncoder(DjangoJSONEncoder):
+    """
+    ``DjangoJSONEncoder`` that writes ``LatLong`` as stored, ``"lat;lng"``
+    """
+
+    def default(self, o):  # pylint: disable=method-hidden
+        if isinstance(o, LatLong):
+            return str(o)
+        return super(JSONEncoder, self).default(o)
+
+
+def _float_text(value):
+    value = float(value)
+    if math.isinf(value) or math.isnan(value):
+        raise ValueError("{!r} is not a coordinate".format(value))
+    return repr(value)
+
+
+def get_text_decoder(field, connection):
+    """
+    Function from a raw column value to ``(latitude, longitude)`` number
+    strings, the stored text is used as it is when it is a plain number
+    """
+    if getattr(field, "packed", False):
+        decode = field.get_float_decoder(connection)
+
+        def decode_packed(value):
+            latitude, longitude = decode(value)
+            return repr(latitude), repr(longitude)
+
+        return decode_packed
+
+    if getattr(field, "native_point", False) and field.uses_native_point(connection):
+
+        def split_point(value):
+            longitude, _, latitude = value.strip("()").partition(",")
+            return latitude, longitude
+
+        split = split_point
+    else:
+
+        def split_text(value):
+            if not value:
+                # LatLong(), see LatLongField.to_python
+                return "0.000000", "0.000000"
+            latitude, _, longitude = value.partition(";")
+            return latitude, longitude
+
+        split = split_text
+
+    def decode_text(value):
+        latitude, longitude = split(value)
+        if not (_NUMBER.match(latitude) and _NUMBER.match(longitude)):
+            latitude, longitude = _float_text(latitude), _float_text(longitude)
+        return latitude, longitude
+
+    return decode_text
+
+
+def _rows(queryset, field_name, fields, chunk_size):
+    field = queryset.model._meta.get_field(field_name)  # pylint: disable=protected-access
+    decode = get_text_decoder(field, connections[queryset.db])
+
+    rows = iterator(queryset.values_list("pk", raw_column(field_name), *fields), chunk_size)
+    for row in rows:
+        yield row[0], None if row[1] is None else decode(row[1]), row[2:]
+
+
+def iter_geojson(queryset, field_name, fields=(), chunk_size=2000):
+    """
+    GeoJSON ``FeatureCollection`` of ``queryset`` in chunks of text
+
+    ``fields`` are the properties of the features, rows without a point
+    have a ``null`` geometry. Rows are read with ``iterator()`` and every
+    chunk holds ``chunk_size`` features, no ``LatLong`` is created.
+    """
+    encode = JSONEncoder().encode
+    fields = tuple(fields)
+
+    yield '{"type": "FeatureCollection", "features": ['
+
+    separator = ""
+    features = []
+    for pk, coordinates, values in _rows(queryset, field_name, fields, chunk_size):
+        if coordinates is None:
+            geometry = "null"
+        else:
+            geometry = '{{"type": "Point", "coordinates": [{1}, {0}]}}'.format(*coordinates)
+        features.append(
+            '{{"type": "Feature", "id": {}, "geometry": {}, "properties": {}}}'.format(
+                encode(pk), geometry, encode(dict(zip(fields, values)))
+            )
+        )
+
+        if len(features) >= chunk_size:
+            yield separator + ",\n".join(features)
+            separator = ",\n"
+            features = []
+
+    if features:
+        yield separator + ",\n".join(features)
+    yield "]}\n"
+
+
+def iter_csv(queryset, field_name, fields=(), chunk_size=2000, header=True):
+    """
+    CSV of ``queryset`` in chunks of text, the columns are the primary
+    key, ``latitude``, ``longitude`` and ``fields``
+
+    Rows without a point have empty coordinates. Rows are read with
+    ``iterator()`` and every chunk holds ``chunk_size`` rows.
+    """
+    fields = tuple(fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if header:
+        # pylint: disable=protected-access
+        writer.writerow((queryset.model._meta.pk.name, "latitude", "longitude") + fields)
+
+    count = 0
+    for pk, coordinates, values in _rows(queryset, field_name, fields, chunk_size):
+        writer.writerow((pk,) + (coordinates or ("", "")) + values)
+        count += 1
+
+        if count >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_export(
+    queryset, field_name, format="geojson", **kwargs
+):  # pylint: disable=redefined-builtin
+    """
+    ``iter_geojson`` or ``iter_csv`` by ``format``
+    """
+    if format == "geojson":
+        return iter_geojson(queryset, field_name, **kwargs)
+    if format == "csv":
+        return iter_csv(queryset, field_name, **kwargs)
+    raise ValueError("Unknown export format {!r}, use one of {}".format(format, sorted(FORMATS)))
+
+
+def export_response(
+    queryset, field_name, format="geojson", filename=None, **kwargs
+):  # pylint: disable=redefined-builtin
+    """
+    ``StreamingHttpResponse`` with the export of ``queryset``, an attachment with ``filename``
+    """
+    response = StreamingHttpResponse(
+        iter_export(queryset, field_name, format=format, **kwargs), content_type=FORMATS[format]
+    )
+    if filename is not None:
+        response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
+    return response
@@ -2,56 +2,322 @@
 
 from __future__ import unicode_literals
 
+import math
+import weakref
 from decimal import Decimal
+from functools import lru_cache
 
+import django
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.utils.deconstruct import deconstructible
+from django.db.models import signals
+from django.db.models.query_utils import DeferredAttribute
 from django.utils.translation import gettext_lazy as _
 
 from .forms import LatLongField as FormLatLongField
+from .geo import geohash_encode
+from .lookups import LatLongExact, Near, WithinBBox
+from .validators import validate_latlong
+
+_MICRODEGREES = 1000000
+# integer microdegrees below this bound survive a round trip through float
+_FLOAT_EXACT = 2**52
+
+
+def _decode(value):
+    """
+    Decode the ``"%.6f;%.6f"`` storage format to a pair of integer
+    microdegrees, return ``None`` for values in any other format
+    """
+    latitude, _, longitude = value.partition(";")
+    # floats round longer fractions to the nearest microdegree
+    dot = latitude.find(".")
+    if dot >= 0 and len(latitude) - dot > 7:
+        return None
+    dot = longitude.find(".")
+    if dot >= 0 and len(longitude) - dot > 7:
+        return None
+    try:
+        latitude = float(latitude)
+        longitude = float(longitude)
+    except ValueError:
+        return None
+    if not (-1e9 < latitude < 1e9 and -1e9 < longitude < 1e9):
+        return None
+
+    latitude_micro = int(latitude * 1e6 + (0.5 if latitude > 0 else -0.5))
+    longitude_micro = int(longitude * 1e6 + (0.5 if longitude > 0 else -0.5))
+    if (
+        latitude_micro / 1e6 == latitude
+        and longitude_micro / 1e6 == longitude
+        and (latitude_micro or math.copysign(1.0, latitude) > 0)
+        and (longitude_micro or math.copysign(1.0, longitude) > 0)
+    ):
+        return latitude_micro, longitude_micro
+    return None
+
+
+def _to_internal(value):
+    """
+    Convert a coordinate to its internal representation: integer
+    microdegrees when the value is exact at six decimal places,
+    otherwise the original ``float`` or a ``Decimal``
+    """
+    if isinstance(value, str):
+        # floats round longer fractions to the nearest microdegree
+        dot = value.find(".")
+        if dot < 0 or len(value) - dot <= 7:
+            try:
+                number = float(value)
+            except ValueError:
+                number = None
+            if number is not None and -1e9 < number < 1e9:
+                micro = int(number * 1e6 + (0.5 if number > 0 else -0.5))
+                # keep the sign of negative zero
+                if micro / 1e6 == number and (micro or math.copysign(1.0, number) > 0):
+                    return micro
+    elif isinstance(value, float):
+        return value
+    elif isinstance(value, int):
+        return value * _MICRODEGREES
+
+    if not isinstance(value, Decimal):
+        value = Decimal(value)
+
+    if value.is_finite():
+        scaled = value.scaleb(6)
+        if scaled == scaled.to_integral_value() and not (scaled.is_zero() and scaled.is_signed()):
+            return int(scaled)
+    return value
+
+
+def _to_decimal(value):
+    if isinstance(value, int):
+        return Decimal(value).scaleb(-6)
+    return Decimal(value)
+
+
+def _to_rounded(value):
+    """
+    Round a coordinate to six decimal places, as integer microdegrees
+    """
+    if isinstance(value, int):
+        return value
+    try:
+        return int("{:.6f}".format(value).replace(".", ""))
+    except ValueError:
+        # NaN and infinity
+        return value
+
+
+def _format(value):
+    if isinstance(value, int):
+        if -_FLOAT_EXACT < value < _FLOAT_EXACT:
+            return "%.6f" % (value / 1e6)
+        degrees, micro = divmod(abs(value), _MICRODEGREES)
+        return "{}{}.{:06d}".format("-" if value < 0 else "", degrees, micro)
+    return "{:.6f}".format(value)
+
+
+def _decode_point(value):
+    """
+    Decode a PostgreSQL ``point``, ``"(longitude,latitude)"``, to internal coordinates
+    """
+    longitude, _, latitude = value.strip("()").partition(",")
+    return _to_internal(latitude), _to_internal(longitude)
+
+
+def _decode_floats(value):
+    if not value:
+        # LatLong(), see to_python
+        return 0.0, 0.0
+    latitude, _, longitude = value.partition(";")
+    return float(latitude), float(longitude)
+
+
+def _decode_point_floats(value):
+    longitude, _, latitude = value.strip("()").partition(",")
+    return float(latitude), float(longitude)
+
+
+def _encode(latitude, longitude):
+    return "{};{}".format(_format(latitude), _format(longitude))
+
+
+# PackedLatLongField keeps (latitude + 90) << 32 | (longitude + 180) in microdegrees
+_PACK_SHIFT = 32
+_PACK_MASK = (1 << _PACK_SHIFT) - 1
+_LATITUDE_OFFSET = 90 * _MICRODEGREES
+_LONGITUDE_OFFSET = 180 * _MICRODEGREES
+
+
+def _pack(latitude, longitude):
+    """
+    Pack internal coordinates to a non-negative 64-bit integer, return
+    ``None`` when they are out of range
+    """
+    latitude = _to_rounded(latitude)
+    longitude = _to_rounded(longitude)
+    if (
+        not isinstance(latitude, int)
+        or not isinstance(longitude, int)
+        or not -_LATITUDE_OFFSET <= latitude <= _LATITUDE_OFFSET
+        or not -_LONGITUDE_OFFSET <= longitude <= _LONGITUDE_OFFSET
+    ):
+        return None
+    return (latitude + _LATITUDE_OFFSET) << _PACK_SHIFT | (longitude + _LONGITUDE_OFFSET)
+
+
+def _unpack(value):
+    return (value >> _PACK_SHIFT) - _LATITUDE_OFFSET, (value & _PACK_MASK) - _LONGITUDE_OFFSET
+
+
+def _unpack_floats(value):
+    latitude, longitude = _unpack(value)
+    return latitude / 1e6, longitude / 1e6
+
+
+def _to_deconstruct(value):
+    if isinstance(value, int):
+        if value % _MICRODEGREES:
+            return value / 1e6
+        return value // _MICRODEGREES
+    return value
 
 
-@deconstructible
 class LatLong(object):
+    """
+    Geographic coordinate
+
+    Coordinates are kept as integer microdegrees where possible and
+    exposed as ``Decimal`` through ``latitude`` and ``longitude``.
+    The hash follows equality (six decimal places), do not modify an
+    instance while it is a key in a dict or set.
+    """
+
+    __slots__ = ("_latitude", "_longitude", "__weakref__")
+
     def __init__(self, latitude=0.0, longitude=0.0):
-        self.latitude = Decimal(latitude)
-        self.longitude = Decimal(longitude)
+        self._latitude = _to_internal(latitude)
+        self._longitude = _to_internal(longitude)
+
+    @classmethod
+    def _from_internal(cls, latitude, longitude):
+        obj = cls.__new__(cls)
+        obj._latitude = latitude
+        obj._longitude = longitude
+        return obj
+
+    @property
+    def latitude(self):
+        return _to_decimal(self._latitude)
+
+    @latitude.setter
+    def latitude(self, value):
+        self._latitude = _to_internal(value)
 
-    @staticmethod
-    def _equals_to_the_cent(a, b):
-        return round(a, 6) == round(b, 6)
+    @property
+    def longitude(self):
+        return _to_decimal(self._longitude)
 
-    @staticmethod
-    def _no_equals_to_the_cent(a, b):
-        return round(a, 6) != round(b, 6)
+    @longitude.setter
+    def longitude(self, value):
+        self._longitude = _to_internal(value)
 
     @property
     def format_latitude(self):
-        return "{:.6f}".format(self.latitude)
+        return _format(self._latitude)
 
     @property
     def format_longitude(self):
-        return "{:.6f}".format(self.longitude)
+        return _format(self._longitude)
+
+    def deconstruct(self):
+        return (
+            "treasuremap.fields.LatLong",
+            (_to_deconstruct(self._latitude), _to_deconstruct(self._longitude)),
+            {},
+        )
 
     def __repr__(self):
-        return "{}({:.6f}, {:.6f})".format(self.__class__.__name__, self.latitude, self.longitude)
+        return "{}({}, {})".format(
+            self.__class__.__name__, _format(self._latitude), _format(self._longitude)
+        )
 
     def __str__(self):
-        return "{:.6f};{:.6f}".format(self.latitude, self.longitude)
+        return _encode(self._latitude, self._longitude)
 
     def __eq__(self, other):
         return isinstance(other, LatLong) and (
-            self._equals_to_the_cent(self.latitude, other.latitude)
-            and self._equals_to_the_cent(self.longitude, other.longitude)
+            _to_rounded(self._latitude) == _to_rounded(other._latitude)
+            and _to_rounded(self._longitude) == _to_rounded(other._longitude)
         )
 
     def __ne__(self, other):
         return isinstance(other, LatLong) and (
-            self._no_equals_to_the_cent(self.latitude, other.latitude)
-            or self._no_equals_to_the_cent(self.longitude, other.longitude)
+            _to_rounded(self._latitude) != _to_rounded(other._latitude)
+            or _to_rounded(self._longitude) != _to_rounded(other._longitude)
         )
 
+    def __hash__(self):
+        return hash((_to_rounded(self._latitude), _to_rounded(self._longitude)))
+
+
+class LatLongPool(object):
+    """
+    Flyweight factory for ``LatLong``
+
+    Equal keys share one instance for as long as it is referenced
+    somewhere, shared instances must not be modified.
+    """
+
+    def __init__(self):
+        self._objects = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def lookup(self, key):
+        return self._objects.get(key)
+
+    def intern(self, key, latlong):
+        return self._objects.setdefault(key, latlong)
+
+    def get(self, latitude=0.0, longitude=0.0):
+        latlong = LatLong(latitude, longitude)
+        # keep the type, 1000000 microdegrees and 1000000.0 degrees are equal numbers
+        key = (
+            type(latlong._latitude),  # pylint: disable=protected-access
+            latlong._latitude,  # pylint: disable=protected-access
+            type(latlong._longitude),  # pylint: disable=protected-access
+            latlong._longitude,  # pylint: disable=protected-access
+        )
+        return self.intern(key, latlong)
+
+
+class LatLongDescriptor(DeferredAttribute):
+    """
+    Updates the geohash field when a value is assigned after the instance is created
+    """
+
+    def __init__(self, field):
+        # pylint: disable=too-many-function-args
+        if django.VERSION >= (3, 0):
+            super(LatLongDescriptor, self).__init__(field)
+        elif django.VERSION >= (2, 0):
+            super(LatLongDescriptor, self).__init__(field.attname)
+        else:
+            super(LatLongDescriptor, self).__init__(field.attname, field.model)
+        self.field = field
+
+    def __set__(self, instance, value):
+        previous = self.field.attname in instance.__dict__
+        instance.__dict__[self.field.attname] = value
+        # rows from the database are no longer adding after __init__, this
+        # covers a point that was deferred
+        if previous or not instance._state.adding:  # pylint: disable=protected-access
+            self.field.update_geohash(instance, force=True)
+
 
 class LatLongField(models.Field):
     description = _("Geographic coordinate system fields")
@@ -59,14 +325,133 @@ class LatLongField(models.Field):
         "invalid": _("'%(value)s' both values must be a decimal number or integer."),
         "invalid_separator": _("As the separator value '%(value)s' must be ';'"),
     }
+    default_validators = [validate_latlong]
 
     def __init__(self, *args, **kwargs):
+        self.decode_cache_size = kwargs.pop("decode_cache_size", None)
+        self.intern_values = kwargs.pop("intern_values", False)
+        self.geohash_field = kwargs.pop("geohash_field", None)
+        self.geohash_precision = kwargs.pop("geohash_precision", 12)
+        self.native_point = kwargs.pop("native_point", False)
         kwargs["max_length"] = 24
         super(LatLongField, self).__init__(*args, **kwargs)
 
+        if self.decode_cache_size:
+            self._decode = lru_cache(maxsize=self.decode_cache_size)(_decode)
+        else:
+            self._decode = _decode
+
+        # rows with the same stored value share one LatLong
+        self._pool = LatLongPool() if self.intern_values else None
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(LatLongField, self).deconstruct()
+        if self.decode_cache_size:
+            kwargs["decode_cache_size"] = self.decode_cache_size
+        if self.intern_values:
+            kwargs["intern_values"] = True
+        if self.geohash_field:
+            kwargs["geohash_field"] = self.geohash_field
+        if self.geohash_precision != 12:
+            kwargs["geohash_precision"] = self.geohash_precision
+        if self.native_point:
+            kwargs["native_point"] = True
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):  # pylint: disable=arguments-differ
+        super(LatLongField, self).contribute_to_class(cls, name, **kwargs)
+
+        if self.geohash_field and not cls._meta.abstract:  # pylint: disable=protected-access
+            setattr(cls, self.attname, LatLongDescriptor(self))
+            signals.post_init.connect(self.update_geohash, sender=cls)
+            signals.pre_save.connect(self.save_geohash, sender=cls)
+
+    def get_geohash(self, value):
+        """
+        Geohash of a value for the geohash field
+        """
+        if value is not None and not isinstance(value, LatLong):
+            try:
+                value = self.to_python(value)
+            except (ValidationError, ArithmeticError, ValueError):
+                # invalid values are reported by validation
+                value = None
+
+        if value is None:
+            # pylint: disable=protected-access
+            return None if self.model._meta.get_field(self.geohash_field).null else ""
+        return geohash_encode(float(value.latitude), float(value.longitude), self.geohash_precision)
+
+    def update_geohash(
+        self, instance, force=False, *args, **kwargs
+    ):  # pylint: disable=unused-argument
+        """
+        Set the geohash field from the value, connected to ``post_init``
+
+        Unless ``force`` is set, a geohash that is already there is kept,
+        so rows loaded from the database are not encoded again. With
+        ``force`` a deferred geohash is set too, so ``save()`` writes it.
+        """
+        # pylint: disable=protected-access
+        attname = self.model._meta.get_field(self.geohash_field).attname
+        if self.attname not in instance.__dict__:
+            # deferred
+            return
+        if not force and instance.__dict__.get(attname, True):
+            return
+
+        instance.__dict__[attname] = self.get_geohash(instance.__dict__[self.attname])
+
+    def save_geohash(
+        self, instance, raw=False, update_fields=None, *args, **kwargs
+    ):  # pylint: disable=unused-argument
+        """
+        Set the geohash field before a save, connected to ``pre_save``
+
+        ``update_fields`` with the point must have the geohash field too,
+        otherwise the stored geohash would not match the point.
+        """
+        if raw:
+            return
+        self.update_geohash(instance, force=True)
+
+        # pylint: disable=protected-access
+        geohash_field = self.model._meta.get_field(self.geohash_field)
+        if update_fields is None or not {self.name, self.attname} & set(update_fields):
+            return
+        if not {geohash_field.name, geohash_field.attname} & set(update_fields):
+            raise ValueError(
+                "update_fields with '{}' must include '{}'.".format(self.name, geohash_field.name)
+            )
+
     def get_internal_type(self):
         return "CharField"
 
+    def uses_native_point(self, connection):
+        """
+        Whether the column is a PostgreSQL ``point``
+        """
+        return self.native_point and connection.vendor == "postgresql"
+
+    def get_float_decoder(self, connection):
+        """
+        Function from a raw column value to ``(latitude, longitude)``
+        floats, for bulk reads that skip ``LatLong``
+        """
+        if self.uses_native_point(connection):
+            return _decode_point_floats
+        return _decode_floats
+
+    def db_type(self, connection):
+        if self.uses_native_point(connection):
+            return "point"
+        return super(LatLongField, self).db_type(connection)
+
+    def get_placeholder(self, value, compiler, connection):  # pylint: disable=unused-argument
+        if self.uses_native_point(connection):
+            return "%s::point"
+        return "%s"
+
     def to_python(self, value):
         if value is None:
             return None
@@ -92,20 +477,134 @@ class LatLongField(models.Field):
     def get_db_prep_value(
         self, value, connection, prepared=False  # pylint: disable=unused-argument
     ):
+        if self.uses_native_point(connection):
+            if value is None:
+                return None
+            value = self.to_python(value)
+            return "({},{})".format(value.format_longitude, value.format_latitude)
+
+        if isinstance(value, LatLong):
+            return str(value)
+
         value = super(LatLongField, self).get_prep_value(value)
         if value is None:
             return None
 
-        value = self.to_python(value)
+        if isinstance(value, str):
+            decoded = _decode(value)
+            if decoded is not None:
+                return _encode(*decoded)
+        elif isinstance(value, (list, tuple)) and len(value) == 2:
+            return _encode(_to_internal(value[0]), _to_internal(value[1]))
 
-        return str(value)
+        return str(self.to_python(value))
 
     def from_db_value(
         self, value, expression, connection, *args, **kwargs
     ):  # pylint: disable=unused-argument
-        return self.to_python(value)
+        if value is None:
+            return None
+
+        if self._pool is not None:
+            latlong = self._pool.lookup(value)
+            if latlong is not None:
+                return latlong
+
+        if value[:1] == "(":
+            # PostgreSQL point
+            decoded = _decode_point(value)
+        else:
+            decoded = self._decode(value)
+
+        if decoded is None:
+            # legacy or hand-written values
+            latlong = self.to_python(value)
+        else:
+            latlong = LatLong._from_internal(*decoded)  # pylint: disable=protected-access
+
+        if self._pool is not None:
+            latlong = self._pool.intern(value, latlong)
+        return latlong
 
     def formfield(self, _form_class=None, choices_form_class=None, **kwargs):
         return super(LatLongField, self).formfield(
             form_class=FormLatLongField, choices_form_class=choices_form_class, **kwargs
         )
+
+
+class PackedLatLongField(LatLongField):
+    """
+    ``LatLongField`` stored as one 64-bit integer instead of a string
+
+    Coordinates are kept at six decimal places, latitude must be within
+    [-90, 90] and longitude within [-180, 180]. Rows sort by latitude,
+    then longitude.
+    """
+
+    description = _("Geographic coordinate packed to an integer")
+    default_error_messages = {
+        "out_of_range": _(
+            "'%(value)s' latitude must be between -90 and 90 and longitude between -180 and 180."
+        ),
+    }
+    packed = True
+
+    def __init__(self, *args, **kwargs):
+        super(PackedLatLongField, self).__init__(*args, **kwargs)
+        self.max_length = None
+
+    def get_internal_type(self):
+        return "BigIntegerField"
+
+    def get_float_decoder(self, connection):
+        return _unpack_floats
+
+    def pack(self, value):
+        """
+        Packed integer of a value, ``ValueError`` when it is out of range
+        """
+        value = self.to_python(value)
+        packed = _pack(value._latitude, value._longitude)  # pylint: disable=protected-access
+        if packed is None:
+            raise ValueError("{!r} is out of range for {}".format(value, self.__class__.__name__))
+        return packed
+
+    def validate(self, value, model_instance):
+        super(PackedLatLongField, self).validate(value, model_instance)
+
+        if (
+            value is not None
+            and _pack(value._latitude, value._longitude) is None  # pylint: disable=protected-access
+        ):
+            raise ValidationError(
+                self.error_messages["out_of_range"], code="out_of_range", params={"value": value}
+            )
+
+    def get_db_prep_value(
+        self, value, connection, prepared=False  # pylint: disable=unused-argument
+    ):
+        if value is None:
+            return None
+        return self.pack(value)
+
+    def from_db_value(
+        self, value, expression, connection, *args, **kwargs
+    ):  # pylint: disable=unused-argument
+        if value is None:
+            return None
+
+        if self._pool is not None:
+            latlong = self._pool.lookup(value)
+            if latlong is not None:
+                return latlong
+
+        latlong = LatLong._from_internal(*_unpack(value))  # pylint: disable=protected-access
+
+        if self._pool is not None:
+            latlong = self._pool.intern(value, latlong)
+        return latlong
+
+
+LatLongField.register_lookup(LatLongExact)
+LatLongField.register_lookup(WithinBBox)
+LatLongField.register_lookup(Near)
@@ -6,6 +6,7 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
+from .validators import validate_latlong
 from .widgets import MapWidget
 
 
@@ -33,5 +34,6 @@ class LatLongField(forms.MultiValueField):
                 raise ValidationError(self.error_messages["invalid_coordinates"], code="invalid")
             if data_list[1] in self.empty_values:
                 raise ValidationError(self.error_messages["invalid_coordinates"], code="invalid")
+            validate_latlong(data_list)
             return data_list
         return None
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import math
+
+from django.db.models import ExpressionWrapper, F, Field, FloatField, Func, IntegerField
+
+from .geo import EARTH_RADIUS, haversine, to_point
+
+
+class LatLongPart(Func):  # pylint: disable=abstract-method
+    """
+    Base for functions that extract a coordinate from ``LatLongField`` in the database
+    """
+
+    arity = 1
+    output_field = FloatField()
+
+    # position of the coordinate in "lat;lng", 1 or 2
+    position = None
+
+    def compile_source(self, compiler):
+        return compiler.compile(self.source_expressions[0])
+
+    @property
+    def packed(self):
+        # pylint: disable=protected-access
+        return getattr(self.source_expressions[0]._output_field_or_none, "packed", False)
+
+    def packed_sql(self, sql):
+        """
+        Integer microdegrees from ``PackedLatLongField``, see ``fields._pack``
+        """
+        if self.position == 1:
+            return "(({} >> 32) - 90000000)".format(sql)
+        return "(({} & 4294967295) - 180000000)".format(sql)
+
+    def as_sql(self, compiler, connection, **extra_context):  # pylint: disable=arguments-differ
+        sql, params = self.compile_source(compiler)
+
+        if self.packed:
+            # 1e6 is a float literal in SQLite and MySQL
+            return "({} / 1e6)".format(self.packed_sql(sql)), tuple(params)
+
+        if self.position == 1:
+            template = "CAST(SUBSTR({sql}, 1, INSTR({sql}, ';') - 1) AS REAL)"
+        else:
+            template = "CAST(SUBSTR({sql}, INSTR({sql}, ';') + 1) AS REAL)"
+
+        return template.format(sql=sql), tuple(params) * 2
+
+    def as_postgresql(
+        self, compiler, connection, **extra_context
+    ):  # pylint: disable=unused-argument
+        sql, params = self.compile_source(compiler)
+
+        if self.packed:
+            return (
+                "(CAST({} AS double precision) / 1000000)".format(self.packed_sql(sql)),
+                tuple(params),
+            )
+
+        # pylint: disable=protected-access
+        if getattr(self.source_expressions[0]._output_field_or_none, "native_point", False):
+            # point is (longitude, latitude)
+            return "({})[{}]".format(sql, 2 - self.position), tuple(params)
+
+        # an empty value is 0 as on SQLite and MySQL
+        return (
+            "CASE {sql} WHEN '' THEN 0 "
+            "ELSE CAST(SPLIT_PART({sql}, ';', {position}) AS double precision) END".format(
+                sql=sql, position=self.position
+            ),
+            tuple(params) * 2,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        if self.packed:
+            return self.as_sql(compiler, connection, **extra_context)
+
+        sql, params = self.compile_source(compiler)
+
+        # adding a number converts the string to DOUBLE
+        return (
+            "(SUBSTRING_INDEX({}, ';', {}) + 0.0)".format(sql, 1 if self.position == 1 else -1),
+            tuple(params),
+        )
+
+
+class Latitude(LatLongPart):  # pylint: disable=abstract-method
+    position = 1
+
+
+class Longitude(LatLongPart):  # pylint: disable=abstract-method
+    position = 2
+
+
+class GridIndex(Func):  # pylint: disable=abstract-method
+    """
+    Index of the cell of width ``size`` that contains a number, counted
+    from ``start``, values below ``start`` are not expected::
+
+        GridIndex(Latitude("point"), south, cell_height)
+    """
+
+    arity = 1
+    output_field = IntegerField()
+
+    def __init__(self, expression, start, size, **extra):
+        self.start = float(start)
+        self.size = float(size)
+        super(GridIndex, self).__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):  # pylint: disable=arguments-differ
+        sql, params = compiler.compile(self.source_expressions[0])
+        # truncation is floor for non-negative values, SQLite may have no FLOOR
+        return "CAST(({} - %s) / %s AS INTEGER)".format(sql), tuple(params) + (
+            self.start,
+            self.size,
+        )
+
+    def as_postgresql(
+        self, compiler, connection, **extra_context
+    ):  # pylint: disable=unused-argument
+        sql, params = compiler.compile(self.source_expressions[0])
+        # a cast to integer rounds
+        return "CAST(FLOOR(({} - %s) / %s) AS integer)".format(sql), tuple(params) + (
+            self.start,
+            self.size,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):  # pylint: disable=unused-argument
+        sql, params = compiler.compile(self.source_expressions[0])
+        return "FLOOR(({} - %s) / %s)".format(sql), tuple(params) + (self.start, self.size)
+
+
+def raw_column(field_name):
+    """
+    Column without converters, its values stay as the database returns them
+    """
+    return ExpressionWrapper(F(field_name), output_field=Field())
+
+
+def distance_sql(connection, latitude, longitude, point):
+    """
+    SQL and params for the great-circle distance in km between the
+    compiled ``(sql, params)`` coordinates and a ``(latitude, longitude)``
+    point in degrees
+    """
+    lat_sql, lat_params = latitude
+    lng_sql, lng_params = longitude
+    point_latitude, point_longitude = point
+
+    if connection.vendor == "sqlite":
+        # SQLite may be built without math functions, see register_functions
+        return (
+            "treasuremap_distance({}, {}, %s, %s)".format(lat_sql, lng_sql),
+            tuple(lat_params) + tuple(lng_params) + (point_latitude, point_longitude),
+        )
+
+    sql = (
+        # LEAST keeps rounding errors out of the domain of ASIN
+        "(2 * {radius} * ASIN(LEAST(1, SQRT("
+        "POWER(SIN(({lat} - %s) * {half_rad}), 2)"
+        " + COS({lat} * {rad}) * %s * POWER(SIN(({lng} - %s) * {half_rad}), 2)))))"
+    ).format(
+        radius=EARTH_RADIUS,
+        lat=lat_sql,
+        lng=lng_sql,
+        rad=repr(math.pi / 180),
+        half_rad=repr(math.pi / 360),
+    )
+    params = (
+        tuple(lat_params)
+        + (point_latitude,)
+        + tuple(lat_params)
+        + (math.cos(math.radians(point_latitude)),)
+        + tuple(lng_params)
+        + (point_longitude,)
+    )
+    return sql, params
+
+
+class Distance(Func):  # pylint: disable=abstract-method
+    """
+    Great-circle distance in km from ``LatLongField`` to a point::
+
+        Distance("point", LatLong(55.75, 37.61))
+    """
+
+    arity = 1
+    output_field = FloatField()
+
+    def __init__(self, expression, point, **extra):
+        self.point = to_point(point)
+        super(Distance, self).__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):  # pylint: disable=arguments-differ
+        source = self.source_expressions[0]
+        return distance_sql(
+            connection,
+            compiler.compile(Latitude(source)),
+            compiler.compile(Longitude(source)),
+            self.point,
+        )
+
+
+def sqlite_distance(lat1, lng1, lat2, lng2):
+    """
+    ``treasuremap_distance`` user function for SQLite
+    """
+    if None in (lat1, lng1, lat2, lng2):
+        return None
+    return haversine(lat1, lng1, lat2, lng2)
+
+
+def register_functions(sender, connection, **kwargs):  # pylint: disable=unused-argument
+    """
+    Register the functions SQLite does not have, connected to ``connection_created``
+    """
+    if connection.vendor != "sqlite":
+        return
+
+    try:
+        connection.connection.create_function(
+            "treasuremap_distance", 4, sqlite_distance, deterministic=True
+        )
+    except (TypeError, connection.Database.NotSupportedError):
+        # Python < 3.8 or SQLite < 3.8.3
+        connection.connection.create_function("treasuremap_distance", 4, sqlite_distance)
@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .pool import ordered_map
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# mean Earth radius, km
+EARTH_RADIUS = 6371.0088
+
+
+def to_point(value):
+    """
+    ``(latitude, longitude)`` floats of a ``LatLong``, a pair or a ``"lat;lng"`` string
+    """
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        return float(value.latitude), float(value.longitude)
+
+    if isinstance(value, str):
+        value = value.split(";")
+    try:
+        latitude, longitude = value
+        return float(latitude), float(longitude)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Expected a point, got {!r}".format(value)) from exc
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance in km between two points given in degrees
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bearing_degrees(lat1, lng1, lat2, lng2):
+    """
+    Initial bearing in degrees, [0, 360), from the first point to the second
+    """
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+
+    y = math.sin(lng2 - lng1) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(lng2 - lng1)
+    return math.degrees(math.atan2(y, x)) % 360
+
+
+def distance(origin, destination):
+    """
+    Great-circle distance in km between two points, see ``to_point``
+    """
+    return haversine(*(to_point(origin) + to_point(destination)))
+
+
+def bearing(origin, destination):
+    """
+    Initial bearing in degrees from ``origin`` to ``destination``, see ``to_point``
+    """
+    return bearing_degrees(*(to_point(origin) + to_point(destination)))
+
+
+def bounding_box(latitude, longitude, radius):
+    """
+    Box (south, west, north, east) in degrees around a point that contains
+    every point within ``radius`` km. ``west > east`` when the box
+    crosses the antimeridian.
+    """
+    angular = radius / EARTH_RADIUS
+    delta = math.degrees(angular)
+
+    south = latitude - delta
+    north = latitude + delta
+
+    if south <= -90 or north >= 90 or angular >= math.pi / 2:
+        # a pole is inside, every longitude is
+        return max(south, -90.0), -180.0, min(north, 90.0), 180.0
+
+    delta_lng = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(latitude))))
+    west = longitude - delta_lng
+    east = longitude + delta_lng
+
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+
+    return south, west, north, east
+
+
+# latitude limit of web map tiles, the Mercator projection of the world is square
+TILE_MAX_LATITUDE = 85.0511287798066
+
+
+def tile_bbox(zoom, x, y):
+    """
+    Box (south, west, north, east) of the web map tile ``zoom/x/y``
+    """
+    count = 1 << zoom
+    west = x * 360.0 / count - 180
+    east = (x + 1) * 360.0 / count - 180
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2.0 * y / count))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2.0 * (y + 1) / count))))
+    return south, west, north, east
+
+
+def tile_at(zoom, latitude, longitude):
+    """
+    ``(x, y)`` of the web map tile that contains a point
+    """
+    count = 1 << zoom
+    latitude = math.radians(min(max(latitude, -TILE_MAX_LATITUDE), TILE_MAX_LATITUDE))
+    x = int((longitude + 180) / 360 * count)
+    y = int((1 - math.log(math.tan(latitude) + 1 / math.cos(latitude)) / math.pi) / 2 * count)
+    return min(max(x, 0), count - 1), min(max(y, 0), count - 1)
+
+
+def bbox_tiles(zoom, south, west, north, east, max_tiles=None):
+    """
+    ``[(x, y), ...]`` of the web map tiles that cover a box, ``west > east``
+    when the box crosses the antimeridian. Raises ``ValueError`` when
+    there are more than ``max_tiles``.
+    """
+    west_x, north_y = tile_at(zoom, north, west)
+    east_x, south_y = tile_at(zoom, south, east)
+
+    if west <= east:
+        columns = range(west_x, east_x + 1)
+    else:
+        columns = list(range(west_x, 1 << zoom)) + list(range(0, min(east_x + 1, west_x)))
+    rows = range(north_y, south_y + 1)
+
+    if max_tiles is not None and len(columns) * len(rows) > max_tiles:
+        raise ValueError(
+            "The box takes {} tiles at zoom {}, at most {} are allowed".format(
+                len(columns) * len(rows), zoom, max_tiles
+            )
+        )
+    return [(x, y) for y in rows for x in columns]
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _geohash_bits(precision):
+    """
+    Number of latitude and longitude bits in a geohash of ``precision`` characters
+    """
+    bits = precision * 5
+    return bits // 2, bits - bits // 2
+
+
+def _geohash_cell(latitude, longitude, precision):
+    """
+    Row and column of the cell that contains a point
+    """
+    lat_bits, lng_bits = _geohash_bits(precision)
+    row = int((latitude + 90) / 180 * (1 << lat_bits))
+    col = int((longitude + 180) / 360 * (1 << lng_bits))
+    return min(max(row, 0), (1 << lat_bits) - 1), min(max(col, 0), (1 << lng_bits) - 1)
+
+
+def _geohash_code(row, col, precision):
+    """
+    Interleave the bits of a cell, longitude first, to the integer geohash
+    """
+    lat_bits, lng_bits = _geohash_bits(precision)
+    code = 0
+    for i in range(lng_bits):
+        code = code << 1 | (col >> (lng_bits - 1 - i)) & 1
+        if i < lat_bits:
+            code = code << 1 | (row >> (lat_bits - 1 - i)) & 1
+    return code
+
+
+def _geohash_string(code, precision):
+    chars = []
+    for _ in range(precision):
+        chars.append(GEOHASH_ALPHABET[code & 31])
+        code >>= 5
+    return "".join(reversed(chars))
+
+
+def geohash_encode(latitude, longitude, precision=12):
+    """
+    Geohash of a point in degrees, coordinates out of range are clamped
+    """
+    row, col = _geohash_cell(latitude, longitude, precision)
+    return _geohash_string(_geohash_code(row, col, precision), precision)
+
+
+def geohash_cell_size(precision):
+    """
+    Height and width in degrees of a cell of ``precision`` characters
+    """
+    lat_bits, lng_bits = _geohash_bits(precision)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_cover(south, west, north, east, max_cells=16, max_precision=12):
+    """
+    Ranges ``(start, stop)`` of geohashes that cover the box, ``stop`` is
+    exclusive and ``None`` for the end of the key space
+
+    The precision is the largest that needs at most ``max_cells`` cells,
+    adjacent cells are merged to one range. Returns ``None`` when even
+    the largest cells are too many.
+    """
+    if west > east:
+        # the box crosses the antimeridian
+        boxes = ((south, west, north, 180.0), (south, -180.0, north, east))
+    else:
+        boxes = ((south, west, north, east),)
+
+    cells = None
+    for precision in range(1, max_precision + 1):
+        spans = []
+        count = 0
+        for box in boxes:
+            bottom, left = _geohash_cell(box[0], box[1], precision)
+            top, right = _geohash_cell(box[2], box[3], precision)
+            spans.append((bottom, top, left, right))
+            count += (top - bottom + 1) * (right - left + 1)
+        if count > max_cells:
+            break
+        cells = (precision, spans)
+
+    if cells is None:
+        return None
+
+    precision, spans = cells
+    codes = sorted(
+        {
+            _geohash_code(row, col, precision)
+            for bottom, top, left, right in spans
+            for row in range(bottom, top + 1)
+            for col in range(left, right + 1)
+        }
+    )
+
+    ranges = []
+    for code in codes:
+        if ranges and ranges[-1][1] == code:
+            ranges[-1][1] = code + 1
+        else:
+            ranges.append([code, code + 1])
+
+    last = 1 << (precision * 5)
+    return [
+        (
+            _geohash_string(start, precision),
+            _geohash_string(stop, precision) if stop < last else None,
+        )
+        for start, stop in ranges
+    ]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImproperlyConfigured(
+            "Batched functions require NumPy, install it with pip install numpy"
+        )
+
+
+def to_array(points):
+    """
+    (N, 2) float64 array of latitude, longitude from an array, a
+    sequence of points or a single point, see ``to_point``
+    """
+    _require_numpy()
+
+    if isinstance(points, np.ndarray):
+        array = points.astype(np.float64, copy=False)
+    elif hasattr(points, "latitude") or isinstance(points, str):
+        array = np.array([to_point(points)], dtype=np.float64)
+    else:
+        points = list(points)
+        try:
+            array = np.array(points, dtype=np.float64)
+        except (TypeError, ValueError):
+            array = np.array([to_point(point) for point in points], dtype=np.float64)
+
+    if array.ndim == 1 and array.shape == (2,):
+        array = array.reshape(1, 2)
+    if array.ndim != 2 or array.shape[1] != 2:
+        if not array.size:
+            return array.reshape(0, 2)
+        raise ValueError("Expected points or an (N, 2) array, got shape {}".format(array.shape))
+    return array
+
+
+def _haversine_radians(lat1, lng1, lat2, lng2):
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def distance_array(origins, destinations):
+    """
+    Great-circle distances in km between ``origins`` and ``destinations``
+    pairwise, a single point is broadcast to the other side
+    """
+    origins = np.radians(to_array(origins))
+    destinations = np.radians(to_array(destinations))
+
+    return _haversine_radians(origins[:, 0], origins[:, 1], destinations[:, 0], destinations[:, 1])
+
+
+def bearing_array(origins, destinations):
+    """
+    Initial bearings in degrees from ``origins`` to ``destinations``
+    pairwise, a single point is broadcast to the other side
+    """
+    origins = np.radians(to_array(origins))
+    destinations = np.radians(to_array(destinations))
+    lat1, lng1 = origins[:, 0], origins[:, 1]
+    lat2, lng2 = destinations[:, 0], destinations[:, 1]
+
+    y = np.sin(lng2 - lng1) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lng2 - lng1)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+def _matrix_block(origins, destinations):
+    """
+    Distances between (N, 2) and (M, 2) arrays in radians as an (N, M) block
+    """
+    return _haversine_radians(
+        origins[:, 0:1], origins[:, 1:2], destinations[:, 0], destinations[:, 1]
+    )
+
+
+# destinations of the worker processes of iter_distance_matrix
+_destinations = None
+
+
+def _init_destinations(destinations):
+    global _destinations  # pylint: disable=global-statement
+    _destinations = destinations
+
+
+def _worker_block(origins):
+    return _matrix_block(origins, _destinations)
+
+
+def iter_distance_matrix(origins, destinations, chunk_size=1000, workers=None):
+    """
+    Yield ``(start, block)`` with the distances in km from origins
+    ``start:start + len(block)`` to every destination
+
+    With ``workers`` greater than one, blocks are computed in a process
+    pool and yielded in order. The destinations are sent once to every
+    worker and at most two blocks per worker are in flight.
+    """
+    origins = np.radians(to_array(origins))
+    destinations = np.radians(to_array(destinations))
+    starts = range(0, len(origins), chunk_size)
+
+    if not workers or workers < 2:
+        for start in starts:
+            yield start, _matrix_block(origins[start : start + chunk_size], destinations)
+        return
+
+    if sys.version_info >= (3, 7):
+        executor = ProcessPoolExecutor(
+            workers, initializer=_init_destinations, initargs=(destinations,)
+        )
+        func = _worker_block
+    else:  # pragma: no cover
+        executor = ProcessPoolExecutor(workers)
+        func = partial(_matrix_block, destinations=destinations)
+
+    with executor:
+        blocks = ordered_map(
+            executor,
+            func,
+            (origins[start : start + chunk_size] for start in starts),
+            workers * 2,
+        )
+        for start, block in zip(starts, blocks):
+            yield start, block
+
+
+def distance_matrix(origins, destinations, chunk_size=1000, workers=None):
+    """
+    Great-circle distances in km from every origin to every destination as an (N, M) array
+
+    The matrix is filled in blocks of ``chunk_size`` origins, so the
+    temporary arrays stay bounded, see ``iter_distance_matrix``.
+    """
+    origins = to_array(origins)
+    destinations = to_array(destinations)
+
+    matrix = np.empty((len(origins), len(destinations)), dtype=np.float64)
+    for start, block in iter_distance_matrix(
+        origins, destinations, chunk_size=chunk_size, workers=workers
+    ):
+        matrix[start : start + len(block)] = block
+    return matrix
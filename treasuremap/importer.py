@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import collections
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+
+from .pool import ordered_map
+from .validators import check_latlongs
+
+LATITUDE = "latitude"
+LONGITUDE = "longitude"
+
+
+def read_csv(path, latitude_column=LATITUDE, longitude_column=LONGITUDE):
+    """
+    ``(columns, rows)`` of a CSV file with a header, ``rows`` is an
+    iterator of lists, the coordinate columns are renamed to
+    ``latitude`` and ``longitude``
+    """
+    with io.open(path, encoding="utf-8", newline="") as f:
+        header = next(csv.reader(f), [])
+
+    names = {latitude_column: LATITUDE, longitude_column: LONGITUDE}
+    columns = [names.get(name, name) for name in header]
+
+    def rows():
+        # the file is opened when the rows are read
+        with io.open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield row
+
+    return columns, rows()
+
+
+def read_geojson(path):
+    """
+    ``(columns, rows)`` of the ``Point`` features of a GeoJSON file, the
+    properties are the other columns
+
+    The whole file is parsed at once, use CSV for files that do not fit in memory.
+    """
+    with io.open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    features = data.get("features", []) if data.get("type") == "FeatureCollection" else [data]
+    properties = sorted({name for feature in features for name in feature.get("properties") or {}})
+    columns = [LATITUDE, LONGITUDE] + properties
+
+    def rows():
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point":
+                longitude, latitude = geometry["coordinates"][:2]
+            else:
+                latitude = longitude = None
+            values = feature.get("properties") or {}
+            yield [latitude, longitude] + [values.get(name) for name in properties]
+
+    return columns, rows()
+
+
+def _init_worker():
+    # processes started with "spawn" import nothing of the parent
+    if not apps.ready:
+        import django  # pylint: disable=import-outside-toplevel
+
+        django.setup()
+
+
+def parse_batch(model_label, field_name, columns, batch):
+    """
+    ``(start, count, values, errors)`` of a batch ``(start, rows)``:
+    field values of the valid rows and ``(row number, message)`` of the others
+
+    The coordinates of the whole batch are validated in one call, see
+    ``validators.check_latlongs``.
+    """
+    start, rows = batch
+    model = apps.get_model(model_label)
+    # pylint: disable=protected-access
+    field = model._meta.get_field(field_name)
+    latitude_index = columns.index(LATITUDE)
+    longitude_index = columns.index(LONGITUDE)
+    others = [
+        (i, model._meta.get_field(name))
+        for i, name in enumerate(columns)
+        if name not in (LATITUDE, LONGITUDE)
+    ]
+
+    points = []
+    for row in rows:
+        try:
+            latitude, longitude = row[latitude_index], row[longitude_index]
+        except IndexError:
+            latitude = longitude = None
+        if latitude in (None, "") and longitude in (None, ""):
+            points.append(None)
+        else:
+            points.append((latitude, longitude))
+    invalid = check_latlongs(points)
+
+    values = []
+    errors = []
+    for index, (number, row) in enumerate(enumerate(rows, start)):
+        try:
+            if index in invalid:
+                raise invalid[index]
+
+            point = points[index]
+            if point is None:
+                if not field.null:
+                    raise ValueError("The point is required")
+            else:
+                point = "{:.6f};{:.6f}".format(float(point[0]), float(point[1]))
+
+            item = {field.attname: point}
+            for i, other in others:
+                value = row[i]
+                if value in (None, "") and other.null:
+                    item[other.attname] = None
+                else:
+                    item[other.attname] = other.to_python(value)
+            values.append(item)
+        except (TypeError, ValueError, IndexError) as e:
+            errors.append((number, str(e)))
+        except ValidationError as e:
+            errors.append((number, "; ".join(e.messages)))
+
+    return start, len(rows), values, errors
+
+
+def _batches(rows, batch_size, skip):
+    batch = []
+    start = 1
+    for number, row in enumerate(rows, 1):
+        if number <= skip:
+            start = number + 1
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield start, batch
+            start += len(batch)
+            batch = []
+    if batch:
+        yield start, batch
+
+
+ImportStats = collections.namedtuple("ImportStats", "rows imported invalid seconds")
+
+
+def import_points(
+    model,
+    field_name,
+    columns,
+    rows,
+    batch_size=1000,
+    workers=0,
+    skip=0,
+    using=None,
+    ignore_conflicts=False,
+    on_batch=None,
+):
+    """
+    Create ``model`` objects from ``rows`` with ``bulk_create``
+
+    ``columns`` are the names of the values in the rows, ``latitude``,
+    ``longitude`` and fields of the model. Batches of ``batch_size`` rows
+    are parsed and validated in this process, or in a pool of ``workers``
+    processes, one per CPU with ``None``, and saved in order, each in a
+    transaction. The pool helps only when parsing costs more than the
+    ``INSERT``.
+    The first ``skip`` rows are not read again. ``on_batch(stats,
+    errors)`` is called after every saved batch with the totals and the
+    ``(row number, message)`` of its invalid rows.
+    """
+    using = using or router.db_for_write(model)
+    # pylint: disable=protected-access
+    parse = partial(parse_batch, model._meta.label, field_name, list(columns))
+    batches = _batches(rows, batch_size, skip)
+
+    # Django 2.2+
+    options = {"ignore_conflicts": True} if ignore_conflicts else {}
+
+    started = time.time()
+    total = imported = invalid = 0
+    executor = None
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0:
+        results = (parse(batch) for batch in batches)
+    else:
+        if sys.version_info >= (3, 7):
+            executor = ProcessPoolExecutor(workers, initializer=_init_worker)
+        else:  # pragma: no cover
+            # forked workers have Django set up
+            executor = ProcessPoolExecutor(workers)
+        results = ordered_map(executor, parse, batches, workers * 2)
+
+    try:
+        for _, count, values, errors in results:
+            with transaction.atomic(using=using):
+                model._base_manager.using(using).bulk_create(
+                    [model(**item) for item in values], batch_size=batch_size, **options
+                )
+            total += count
+            imported += len(values)
+            invalid += len(errors)
+            if on_batch is not None:
+                on_batch(
+                    ImportStats(skip + total, imported, invalid, time.time() - started), errors
+                )
+    finally:
+        if executor is not None:
+            # at most a window of batches is still running
+            executor.shutdown()
+
+    return ImportStats(skip + total, imported, invalid, time.time() - started)
@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import heapq
+import math
+import sys
+import threading
+import time
+from array import array
+from functools import partial
+
+from django.db import transaction
+from django.db.models import signals
+
+from .functions import Latitude, Longitude
+from .geo import EARTH_RADIUS, np, to_point
+
+_indexes = {}
+
+
+def _to_vector(latitude, longitude):
+    """
+    Unit vector of a point, chord distances between them follow great-circle distances
+    """
+    latitude = math.radians(latitude)
+    longitude = math.radians(longitude)
+    cos_latitude = math.cos(latitude)
+    return (
+        cos_latitude * math.cos(longitude),
+        cos_latitude * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+def _chord_to_km(chord_squared):
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+def _km_to_chord(distance):
+    if distance >= math.pi * EARTH_RADIUS:
+        return 2.0
+    return 2 * math.sin(distance / (2 * EARTH_RADIUS))
+
+
+class KDTree(object):
+    """
+    Static 3-d tree over unit vectors
+
+    Points are reordered so that every node covers a contiguous range,
+    nodes are kept in flat arrays.
+    """
+
+    def __init__(self, keys, vectors, leaf_size=16):
+        self.leaf_size = leaf_size
+
+        order = list(range(len(keys)))
+        columns = [[v[axis] for v in vectors] for axis in range(3)]
+
+        self.node_lo = array("l")
+        self.node_hi = array("l")
+        self.node_axis = array("b")
+        self.node_split = array("d")
+        self.node_left = array("l")
+        self.node_right = array("l")
+        if order:
+            self._build(order, columns, 0, len(order))
+
+        self.keys = [keys[i] for i in order]
+        self.coords = [array("d", (column[i] for i in order)) for column in columns]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _build(self, order, columns, lo, hi):
+        node = len(self.node_lo)
+        self.node_lo.append(lo)
+        self.node_hi.append(hi)
+        self.node_axis.append(-1)
+        self.node_split.append(0.0)
+        self.node_left.append(-1)
+        self.node_right.append(-1)
+
+        if hi - lo <= self.leaf_size:
+            return node
+
+        # split on the axis with the largest spread, estimated on a sample
+        sample = order[lo : hi : max(1, (hi - lo) // 128)]
+        spreads = []
+        for column in columns:
+            values = [column[i] for i in sample]
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+
+        column = columns[axis]
+        order[lo:hi] = sorted(order[lo:hi], key=column.__getitem__)
+        mid = (lo + hi) // 2
+
+        self.node_axis[node] = axis
+        self.node_split[node] = column[order[mid]]
+        self.node_left[node] = self._build(order, columns, lo, mid)
+        self.node_right[node] = self._build(order, columns, mid, hi)
+        return node
+
+    def search(self, vector, visit, bound):
+        """
+        Call ``visit(key, chord_squared)`` for the points that may be
+        within ``bound()``, a squared chord distance, nearest leaves first
+        """
+        if self.keys:
+            self._search(0, vector, visit, bound)
+
+    def _search(self, node, vector, visit, bound):
+        axis = self.node_axis[node]
+        if axis < 0:
+            xs, ys, zs = self.coords
+            qx, qy, qz = vector
+            for i in range(self.node_lo[node], self.node_hi[node]):
+                visit(self.keys[i], (xs[i] - qx) ** 2 + (ys[i] - qy) ** 2 + (zs[i] - qz) ** 2)
+            return
+
+        diff = vector[axis] - self.node_split[node]
+        if diff < 0:
+            near, far = self.node_left[node], self.node_right[node]
+        else:
+            near, far = self.node_right[node], self.node_left[node]
+
+        self._search(near, vector, visit, bound)
+        if diff * diff < bound():
+            self._search(far, vector, visit, bound)
+
+    def _leaf_ranges(self, vector, limit):
+        """
+        ``(lo, hi)`` of the leaves that may have points within ``limit``
+        """
+        ranges = []
+        node_axis = self.node_axis
+        node_split = self.node_split
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            axis = node_axis[node]
+            if axis < 0:
+                ranges.append((self.node_lo[node], self.node_hi[node]))
+                continue
+
+            diff = vector[axis] - node_split[node]
+            both = diff * diff < limit
+            if diff < 0 or both:
+                stack.append(self.node_left[node])
+            if diff >= 0 or both:
+                stack.append(self.node_right[node])
+        return ranges
+
+    def within(self, vector, limit):
+        """
+        Lists of squared chord distances and keys of the points within
+        ``limit``, a squared chord distance, nearest first
+
+        The candidate leaves are collected first and checked together,
+        with NumPy when it is installed.
+        """
+        if not self.keys:
+            return [], []
+
+        ranges = self._leaf_ranges(vector, limit)
+        qx, qy, qz = vector
+        keys = self.keys
+
+        if np is not None:
+            xs, ys, zs = (np.frombuffer(column, dtype=np.float64) for column in self.coords)
+            index = np.concatenate([np.arange(lo, hi) for lo, hi in ranges])
+            chords = (xs[index] - qx) ** 2 + (ys[index] - qy) ** 2 + (zs[index] - qz) ** 2
+            inside = chords <= limit
+            chords = chords[inside]
+            index = index[inside]
+            order = np.argsort(chords, kind="stable")
+            return chords[order].tolist(), [keys[i] for i in index[order].tolist()]
+
+        xs, ys, zs = self.coords
+        found = []
+        for lo, hi in ranges:
+            for i in range(lo, hi):
+                dx = xs[i] - qx
+                dy = ys[i] - qy
+                dz = zs[i] - qz
+                chord_squared = dx * dx + dy * dy + dz * dz
+                if chord_squared <= limit:
+                    found.append((chord_squared, i))
+        found.sort()
+        return [chord for chord, _ in found], [keys[i] for _, i in found]
+
+    def memory_bytes(self):
+        """
+        Approximate memory used by the tree, keys included
+        """
+        size = sys.getsizeof(self.keys) + sum(sys.getsizeof(key) for key in self.keys)
+        for values in self.coords + [
+            self.node_lo,
+            self.node_hi,
+            self.node_axis,
+            self.node_split,
+            self.node_left,
+            self.node_right,
+        ]:
+            size += sys.getsizeof(values)
+        return size
+
+
+class SpatialIndex(object):
+    """
+    In-memory nearest neighbour index of a ``LatLongField``, answers with primary keys
+
+    The tree is built from the table on the first query. Saved and
+    deleted instances go, once the transaction commits, to a small buffer that is searched directly
+    and merged into the tree when it grows past ``rebuild_threshold``.
+    ``QuerySet.update()``, ``bulk_create()`` and changes made by other
+    processes send no signals, call ``rebuild()`` or set ``max_age``
+    (seconds) to reload the table periodically.
+    """
+
+    def __init__(self, model, field_name, leaf_size=16, rebuild_threshold=1024, max_age=None):
+        self.model = model
+        self.field_name = field_name
+        self.leaf_size = leaf_size
+        self.rebuild_threshold = rebuild_threshold
+        self.max_age = max_age
+
+        self._lock = threading.RLock()
+        self._tree = None
+        # changes since the tree was built: pk -> vector, or None when deleted
+        self._changes = {}
+        self._built_at = None
+        self.build_seconds = None
+
+    @property
+    def field(self):
+        return self.model._meta.get_field(self.field_name)  # pylint: disable=protected-access
+
+    def load(self):
+        """
+        Primary keys and unit vectors of the rows with a value, empty
+        values are (0, 0) as ``Latitude`` and ``Longitude`` return them
+        """
+        rows = (
+            # pylint: disable=protected-access
+            self.model._base_manager.exclude(**{self.field_name: None})
+            .values_list("pk", Latitude(self.field_name), Longitude(self.field_name))
+            .iterator()
+        )
+        keys = []
+        vectors = []
+        for pk, latitude, longitude in rows:
+            keys.append(pk)
+            vectors.append(_to_vector(latitude, longitude))
+        return keys, vectors
+
+    def rebuild(self, keys=None, vectors=None):
+        """
+        Build the tree from the table, or from ``keys`` and ``vectors``
+        """
+        # saves wait for the build, they would be lost otherwise
+        with self._lock:
+            started = time.time()
+            if keys is None:
+                keys, vectors = self.load()
+            self._tree = KDTree(keys, vectors, leaf_size=self.leaf_size)
+            self._changes = {}
+            self._built_at = time.time()
+            self.build_seconds = self._built_at - started
+
+    def _merge(self):
+        """
+        Rebuild the tree in memory with the buffered changes
+        """
+        tree = self._tree
+        keys = []
+        vectors = []
+        for i, key in enumerate(tree.keys):
+            if key not in self._changes:
+                keys.append(key)
+                vectors.append((tree.coords[0][i], tree.coords[1][i], tree.coords[2][i]))
+        for key, vector in self._changes.items():
+            if vector is not None:
+                keys.append(key)
+                vectors.append(vector)
+        self.rebuild(keys, vectors)
+
+    def _ensure_built(self):
+        with self._lock:
+            expired = (
+                self.max_age is not None
+                and self._built_at is not None
+                and time.time() - self._built_at > self.max_age
+            )
+            if self._tree is None or expired:
+                self.rebuild()
+            elif len(self._changes) > self.rebuild_threshold:
+                self._merge()
+            return self._tree, dict(self._changes)
+
+    def add(self, pk, value):
+        """
+        Add or move a point, ``None`` removes it
+        """
+        if value is None:
+            return self.remove(pk)
+        if value == "":
+            # empty stored value, LatLong() as in from_db_value
+            value = (0.0, 0.0)
+
+        with self._lock:
+            if self._tree is not None:
+                self._changes[pk] = _to_vector(*to_point(value))
+
+    def remove(self, pk):
+        with self._lock:
+            if self._tree is not None:
+                self._changes[pk] = None
+
+    def _search(self, point, visit, bound):
+        vector = _to_vector(*to_point(point))
+        tree, changes = self._ensure_built()
+
+        def visit_tree(key, chord_squared):
+            if key not in changes:
+                visit(key, chord_squared)
+
+        tree.search(vector, visit_tree, bound)
+        for key, other in changes.items():
+            if other is not None:
+                visit(key, sum((a - b) ** 2 for a, b in zip(vector, other)))
+
+    def nearest(self, point, k=1):
+        """
+        ``[(pk, km), ...]`` of the ``k`` nearest points, nearest first
+        """
+        heap = []
+
+        def visit(key, chord_squared):
+            if len(heap) < k:
+                heapq.heappush(heap, (-chord_squared, key))
+            elif chord_squared < -heap[0][0]:
+                heapq.heapreplace(heap, (-chord_squared, key))
+
+        def bound():
+            return -heap[0][0] if len(heap) >= k else float("inf")
+
+        self._search(point, visit, bound)
+        return [
+            (key, _chord_to_km(-chord_squared)) for chord_squared, key in sorted(heap, reverse=True)
+        ]
+
+    def within(self, point, distance):
+        """
+        ``[(pk, km), ...]`` of the points within ``distance`` km, nearest first
+        """
+        limit = _km_to_chord(distance) ** 2
+        vector = _to_vector(*to_point(point))
+        tree, changes = self._ensure_built()
+
+        chords, keys = tree.within(vector, limit)
+        if changes:
+            found = [item for item in zip(chords, keys) if item[1] not in changes]
+            for key, other in changes.items():
+                if other is not None:
+                    chord_squared = sum((a - b) ** 2 for a, b in zip(vector, other))
+                    if chord_squared <= limit:
+                        found.append((chord_squared, key))
+            found.sort(key=lambda item: item[0])
+            chords = [chord for chord, _ in found]
+            keys = [key for _, key in found]
+
+        if np is not None:
+            distances = (
+                2 * EARTH_RADIUS * np.arcsin(np.minimum(1.0, np.sqrt(np.array(chords)) / 2))
+            ).tolist()
+        else:
+            distances = [_chord_to_km(chord) for chord in chords]
+        return list(zip(keys, distances))
+
+    def stats(self):
+        """
+        Size, pending changes, last build time in seconds and approximate memory in bytes
+        """
+        with self._lock:
+            tree = self._tree
+            return {
+                "size": len(tree) if tree is not None else 0,
+                "changes": len(self._changes),
+                "build_seconds": self.build_seconds,
+                "memory_bytes": tree.memory_bytes() if tree is not None else 0,
+            }
+
+    def handle_save(
+        self, sender, instance, using=None, **kwargs
+    ):  # pylint: disable=unused-argument
+        # a rolled back save leaves the index alone
+        transaction.on_commit(
+            partial(self.add, instance.pk, getattr(instance, self.field.attname)), using=using
+        )
+
+    def handle_delete(
+        self, sender, instance, using=None, **kwargs
+    ):  # pylint: disable=unused-argument
+        transaction.on_commit(partial(self.remove, instance.pk), using=using)
+
+    def connect(self):
+        # pylint: disable=protected-access
+        uid = "treasuremap_index_{}_{}".format(self.model._meta.label_lower, self.field_name)
+        signals.post_save.connect(self.handle_save, sender=self.model, dispatch_uid=uid)
+        signals.post_delete.connect(self.handle_delete, sender=self.model, dispatch_uid=uid)
+
+    def disconnect(self):
+        # pylint: disable=protected-access
+        uid = "treasuremap_index_{}_{}".format(self.model._meta.label_lower, self.field_name)
+        signals.post_save.disconnect(sender=self.model, dispatch_uid=uid)
+        signals.post_delete.disconnect(sender=self.model, dispatch_uid=uid)
+
+
+def register_index(model, field_name, **kwargs):
+    """
+    Create the index of ``model.field_name`` and keep it in sync with
+    ``post_save``/``post_delete``, the table is read on the first query
+    """
+    key = (model._meta.label_lower, field_name)  # pylint: disable=protected-access
+    if key in _indexes:
+        _indexes[key].disconnect()
+
+    index = SpatialIndex(model, field_name, **kwargs)
+    index.connect()
+    _indexes[key] = index
+    return index
+
+
+def unregister_index(model, field_name):
+    # pylint: disable=protected-access
+    index = _indexes.pop((model._meta.label_lower, field_name), None)
+    if index is not None:
+        index.disconnect()
+
+
+def get_index(model, field_name):
+    """
+    Index registered with ``register_index``, ``KeyError`` when there is none
+    """
+    return _indexes[(model._meta.label_lower, field_name)]  # pylint: disable=protected-access
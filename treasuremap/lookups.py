@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import math
+
+from django.db.models import Lookup
+from django.db.models.expressions import Col
+from django.db.models.lookups import Exact
+
+from .functions import Latitude, Longitude, distance_sql
+from .geo import bounding_box, geohash_cover
+
+
+def bbox_sql(latitude, longitude, bbox):
+    """
+    SQL and params that match the compiled ``(sql, params)`` coordinates
+    inside the ``(south, west, north, east)`` box
+    """
+    lat_sql, lat_params = latitude
+    lng_sql, lng_params = longitude
+    south, west, north, east = bbox
+
+    if west <= east:
+        lng_condition = "{lng} BETWEEN %s AND %s".format(lng=lng_sql)
+        params = tuple(lng_params) + (west, east)
+    else:
+        # the box crosses the antimeridian
+        lng_condition = "({lng} >= %s OR {lng} <= %s)".format(lng=lng_sql)
+        params = tuple(lng_params) + (west,) + tuple(lng_params) + (east,)
+
+    return (
+        "({lat} BETWEEN %s AND %s AND {lng})".format(lat=lat_sql, lng=lng_condition),
+        tuple(lat_params) + (south, north) + params,
+    )
+
+
+def geohash_sql(geohash, ranges):
+    """
+    SQL and params that match the compiled ``(sql, params)`` geohash in any of ``ranges``
+    """
+    sql, params = geohash
+    conditions = []
+    all_params = ()
+    for start, stop in ranges:
+        if stop is None:
+            conditions.append("{} >= %s".format(sql))
+            all_params += tuple(params) + (start,)
+        else:
+            conditions.append("({sql} >= %s AND {sql} < %s)".format(sql=sql))
+            all_params += tuple(params) + (start,) + tuple(params) + (stop,)
+    return "({})".format(" OR ".join(conditions)), all_params
+
+
+def packed_sql(value, bbox):
+    """
+    SQL and params that match the compiled ``(sql, params)`` packed value
+    in the latitude band of the box, see ``fields._pack``
+    """
+    # rounded outwards, the exact check follows
+    sql, params = value
+    south = min(max(math.floor(bbox[0] * 1000000), -90000000), 90000000)
+    north = min(max(math.ceil(bbox[2] * 1000000), -90000000), 90000000)
+    return (
+        "{} BETWEEN %s AND %s".format(sql),
+        tuple(params) + ((south + 90000000) << 32, (north + 90000000) << 32 | 4294967295),
+    )
+
+
+def point_sql(value, bbox):
+    """
+    SQL and params that match the compiled ``(sql, params)`` PostgreSQL
+    point in the box, a GiST index on the column serves it
+    """
+    sql, params = value
+    south, west, north, east = bbox
+
+    if west <= east:
+        boxes = ((west, east),)
+    else:
+        # the box crosses the antimeridian
+        boxes = ((west, 180.0), (-180.0, east))
+
+    conditions = []
+    all_params = ()
+    for left, right in boxes:
+        conditions.append("{} <@ box(point(%s, %s), point(%s, %s))".format(sql))
+        all_params += tuple(params) + (left, south, right, north)
+    return "({})".format(" OR ".join(conditions)), all_params
+
+
+class LatLongExact(Exact):  # pylint: disable=abstract-method
+    """
+    ``exact`` that compares PostgreSQL points with ``~=``, they have no ``=``
+    """
+
+    def as_postgresql(self, compiler, connection):
+        if not getattr(self.lhs.output_field, "native_point", False):
+            return self.as_sql(compiler, connection)
+
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return (
+            "{} ~= {}::point".format(lhs_sql, rhs_sql),
+            tuple(lhs_params) + tuple(rhs_params),
+        )
+
+
+class LatLongLookup(Lookup):  # pylint: disable=abstract-method
+    """
+    Base for lookups that compare the coordinates of ``LatLongField`` in the database
+    """
+
+    prepare_rhs = False
+
+    def compile_coordinates(self, compiler, connection):  # pylint: disable=unused-argument
+        return compiler.compile(Latitude(self.lhs)), compiler.compile(Longitude(self.lhs))
+
+    def compile_bbox(self, compiler, connection, bbox):
+        """
+        Condition for the box, with an indexed condition in front of it when
+        the field is packed, a PostgreSQL point or has a geohash field
+        """
+        latitude, longitude = self.compile_coordinates(compiler, connection)
+        sql, params = bbox_sql(latitude, longitude, bbox)
+
+        field = self.lhs.output_field
+        if getattr(field, "packed", False):
+            range_sql, range_params = packed_sql(compiler.compile(self.lhs), bbox)
+        elif getattr(field, "native_point", False) and field.uses_native_point(connection):
+            range_sql, range_params = point_sql(compiler.compile(self.lhs), bbox)
+        elif isinstance(self.lhs, Col) and getattr(field, "geohash_field", None):
+            ranges = geohash_cover(*bbox, max_precision=field.geohash_precision)
+            if ranges is None:
+                return sql, params
+            # pylint: disable=protected-access
+            geohash = field.model._meta.get_field(field.geohash_field).get_col(self.lhs.alias)
+            range_sql, range_params = geohash_sql(compiler.compile(geohash), ranges)
+        else:
+            return sql, params
+
+        return "({} AND {})".format(range_sql, sql), tuple(range_params) + tuple(params)
+
+
+class WithinBBox(LatLongLookup):  # pylint: disable=abstract-method
+    """
+    ``point__within_bbox=(south, west, north, east)``, ``west > east`` for a
+    box that crosses the antimeridian
+    """
+
+    lookup_name = "within_bbox"
+
+    def get_prep_lookup(self):
+        try:
+            south, west, north, east = (float(v) for v in self.rhs)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(
+                "within_bbox expects (south, west, north, east), got {!r}".format(self.rhs)
+            ) from exc
+        return south, west, north, east
+
+    def as_sql(self, compiler, connection):
+        return self.compile_bbox(compiler, connection, self.rhs)
+
+
+class Near(LatLongLookup):  # pylint: disable=abstract-method
+    """
+    ``point__near=(LatLong(...), km)``, the point can be anything ``LatLongField`` accepts
+
+    The bounding box of the circle is checked first, so the geohash field
+    or an index on ``Latitude`` can be used, the exact distance is checked
+    after it.
+    """
+
+    lookup_name = "near"
+
+    def get_prep_lookup(self):
+        try:
+            point, distance = self.rhs
+            distance = float(distance)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(
+                "near expects (point, distance in km), got {!r}".format(self.rhs)
+            ) from exc
+
+        point = self.lhs.output_field.to_python(point)
+        if point is None:
+            raise ValueError("near expects (point, distance in km), got {!r}".format(self.rhs))
+        return (float(point.latitude), float(point.longitude)), distance
+
+    def as_sql(self, compiler, connection):
+        latitude, longitude = self.compile_coordinates(compiler, connection)
+        point, distance = self.rhs
+
+        bbox, bbox_params = self.compile_bbox(
+            compiler, connection, bounding_box(point[0], point[1], distance)
+        )
+        sql, params = distance_sql(connection, latitude, longitude, point)
+
+        return (
+            "({} AND {} <= %s)".format(bbox, sql),
+            tuple(bbox_params) + tuple(params) + (distance,),
+        )
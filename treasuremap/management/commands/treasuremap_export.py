@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import io
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from treasuremap.export import FORMATS, iter_export
+from treasuremap.fields import LatLongField
+
+
+class Command(BaseCommand):
+    help = "Export the points of a LatLongField as GeoJSON or CSV, streamed in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", help="Model as app_label.ModelName.")
+        parser.add_argument("field", help="Name of the LatLongField.")
+        parser.add_argument("--format", choices=sorted(FORMATS), default="geojson")
+        parser.add_argument(
+            "--fields", default="", help="Comma separated fields to export with the points."
+        )
+        parser.add_argument("-o", "--output", help="File to write, standard output by default.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        # pylint: disable=protected-access
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))  # pylint: disable=raise-missing-from
+
+        try:
+            field = model._meta.get_field(options["field"])
+        except FieldDoesNotExist as e:
+            raise CommandError(str(e))  # pylint: disable=raise-missing-from
+        if not isinstance(field, LatLongField):
+            raise CommandError("{} is not a LatLongField.".format(field))
+
+        queryset = model._default_manager.using(options["database"])
+        fields = [name for name in options["fields"].split(",") if name]
+        try:
+            # before anything is written
+            queryset.values_list(*fields)
+        except FieldError as e:
+            raise CommandError(str(e))  # pylint: disable=raise-missing-from
+
+        chunks = iter_export(
+            queryset,
+            field.name,
+            format=options["format"],
+            fields=fields,
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["output"]:
+            with io.open(options["output"], "w", encoding="utf-8", newline="") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import csv
+import io
+import json
+import os
+
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+
+from treasuremap.fields import LatLongField
+from treasuremap.importer import LATITUDE, LONGITUDE, import_points, read_csv, read_geojson
+
+# invalid rows printed, the others are counted
+MAX_REPORTED = 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Import points into a LatLongField from a CSV or GeoJSON file, validated in "
+        "batches and saved with bulk_create. An interrupted import continues with "
+        "--resume. Progress is written after each batch commits, so the last batch "
+        "may be imported twice: resuming is at-least-once, use --ignore-conflicts "
+        "with a unique column to skip the duplicates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", help="Model as app_label.ModelName.")
+        parser.add_argument("field", help="Name of the LatLongField.")
+        parser.add_argument("path", help="CSV file with a header or GeoJSON file.")
+        parser.add_argument(
+            "--format", choices=("csv", "geojson"), help="By the file extension by default."
+        )
+        parser.add_argument("--latitude-column", default=LATITUDE)
+        parser.add_argument("--longitude-column", default=LONGITUDE)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Processes that parse the batches, 0 (default) parses in this process.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue an interrupted import, the last saved batch may be imported again.",
+        )
+        parser.add_argument(
+            "--progress-file", help="Progress of the import, PATH.progress by default."
+        )
+        parser.add_argument("--errors", help="CSV file to write the invalid rows to.")
+        parser.add_argument(
+            "--ignore-conflicts",
+            action="store_true",
+            help="Skip rows that violate a unique constraint.",
+        )
+        parser.add_argument("--database")
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))  # pylint: disable=raise-missing-from
+
+        try:
+            field = model._meta.get_field(options["field"])  # pylint: disable=protected-access
+        except FieldDoesNotExist as e:
+            raise CommandError(str(e))  # pylint: disable=raise-missing-from
+        if not isinstance(field, LatLongField):
+            raise CommandError("{} is not a LatLongField.".format(field))
+
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError("{} does not exist.".format(path))
+
+        progress_file = options["progress_file"] or path + ".progress"
+        skip = self.load_progress(progress_file, path, options["resume"])
+
+        if (options["format"] or os.path.splitext(path)[1].lstrip(".").lower()) == "csv":
+            columns, rows = read_csv(path, options["latitude_column"], options["longitude_column"])
+        else:
+            columns, rows = read_geojson(path)
+        self.check_columns(model, columns)
+
+        errors_file = None
+        if options["errors"]:
+            errors_file = io.open(
+                options["errors"], "a" if skip else "w", encoding="utf-8", newline=""
+            )
+        reported = []
+
+        def on_batch(stats, errors):
+            if errors_file is not None:
+                csv.writer(errors_file).writerows(errors)
+                errors_file.flush()
+            reported.extend(errors[: MAX_REPORTED - len(reported)])
+            self.save_progress(progress_file, path, stats)
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    "{} rows, {:.0f} rows/s".format(stats.rows, self.rate(stats, skip))
+                )
+
+        try:
+            stats = import_points(
+                model,
+                field.name,
+                columns,
+                rows,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                skip=skip,
+                using=options["database"],
+                ignore_conflicts=options["ignore_conflicts"],
+                on_batch=on_batch,
+            )
+        finally:
+            if errors_file is not None:
+                errors_file.close()
+
+        if os.path.exists(progress_file):
+            os.remove(progress_file)
+
+        for number, message in reported:
+            self.stderr.write("Row {}: {}".format(number, message))
+        self.stdout.write(
+            "Imported {} rows, {} invalid, in {:.1f} s ({:.0f} rows/s).".format(
+                stats.imported, stats.invalid, stats.seconds, self.rate(stats, skip)
+            )
+        )
+
+    @staticmethod
+    def rate(stats, skip):
+        return (stats.rows - skip) / stats.seconds if stats.seconds else 0
+
+    @staticmethod
+    def check_columns(model, columns):
+        if LATITUDE not in columns or LONGITUDE not in columns:
+            raise CommandError("The file has no latitude and longitude columns.")
+        for name in columns:
+            if name not in (LATITUDE, LONGITUDE):
+                try:
+                    model._meta.get_field(name)  # pylint: disable=protected-access
+                except FieldDoesNotExist as e:
+                    raise CommandError(str(e))  # pylint: disable=raise-missing-from
+
+    @staticmethod
+    def load_progress(progress_file, path, resume):
+        """
+        Number of rows already imported
+        """
+        if not os.path.exists(progress_file):
+            if resume:
+                raise CommandError("There is no progress file {}.".format(progress_file))
+            return 0
+        if not resume:
+            raise CommandError(
+                "{} exists, an import was interrupted. Continue it with --resume "
+                "or remove the file.".format(progress_file)
+            )
+
+        with io.open(progress_file, encoding="utf-8") as f:
+            progress = json.load(f)
+        if progress["size"] != os.path.getsize(path):
+            raise CommandError("{} has changed since the import started.".format(path))
+        return progress["rows"]
+
+    @staticmethod
+    def save_progress(progress_file, path, stats):
+        temporary = progress_file + ".tmp"
+        with io.open(temporary, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "path": os.path.abspath(path),
+                    "size": os.path.getsize(path),
+                    "rows": stats.rows,
+                    "imported": stats.imported,
+                    "invalid": stats.invalid,
+                },
+                f,
+            )
+        # the old progress stays if this process is killed while writing
+        os.replace(temporary, progress_file)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.db import router
+from django.db.migrations.operations import RunPython
+
+from .compat import bulk_update, iterator
+
+
+def backfill_geohash(model, name, using=None, batch_size=1000):
+    """
+    Fill the geohash field of ``LatLongField`` ``name`` for the existing rows of ``model``
+    """
+    # pylint: disable=protected-access
+    field = model._meta.get_field(name)
+    geohash_field = model._meta.get_field(field.geohash_field)
+    manager = model._base_manager.db_manager(using)
+    pk = model._meta.pk.attname
+
+    # from_db takes the values in the order of the fields
+    names = [
+        f.attname for f in model._meta.concrete_fields if f.attname in (pk, geohash_field.attname)
+    ]
+
+    rows = manager.values_list(pk, field.attname, geohash_field.attname)
+
+    batch = []
+    for row in iterator(rows, batch_size):
+        geohash = field.get_geohash(row[1])
+        if row[2] != geohash:
+            # the other fields are deferred, post_init leaves the geohash alone
+            values = {pk: row[0], geohash_field.attname: geohash}
+            batch.append(model.from_db(manager.db, names, [values[name] for name in names]))
+        if len(batch) >= batch_size:
+            bulk_update(manager, batch, [geohash_field.attname])
+            batch = []
+
+    if batch:
+        bulk_update(manager, batch, [geohash_field.attname])
+
+
+class BackfillGeohash(RunPython):
+    """
+    Migration operation that runs ``backfill_geohash``, add it after the
+    migration that adds the geohash field::
+
+        operations = [BackfillGeohash("post", "point")]
+    """
+
+    def __init__(self, model_name, name, batch_size=1000):
+        self.model_name = model_name
+        self.name = name
+        self.batch_size = batch_size
+        super(BackfillGeohash, self).__init__(
+            self.backfill, RunPython.noop, hints={"model_name": model_name}
+        )
+
+    def deconstruct(self):
+        kwargs = {}
+        if self.batch_size != 1000:
+            kwargs["batch_size"] = self.batch_size
+        return self.__class__.__name__, [self.model_name, self.name], kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        # the model is resolved here because RunPython code does not get app_label
+        self.app_label = app_label  # pylint: disable=attribute-defined-outside-init
+        super(BackfillGeohash, self).database_forwards(
+            app_label, schema_editor, from_state, to_state
+        )
+
+    def backfill(self, apps, schema_editor):
+        model = apps.get_model(self.app_label, self.model_name)
+        if router.allow_migrate_model(schema_editor.connection.alias, model):
+            backfill_geohash(
+                model, self.name, using=schema_editor.connection.alias, batch_size=self.batch_size
+            )
+
+    def describe(self):
+        return "Backfill the geohash of {}.{}".format(self.model_name, self.name)
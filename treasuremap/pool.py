@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import collections
+
+
+def ordered_map(executor, func, iterable, window):
+    """
+    ``executor.map`` that keeps at most ``window`` items in flight, so
+    neither the submitted items nor the results pile up
+    """
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
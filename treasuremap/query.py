@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import heapq
+
+from django.db import connections, models
+
+from .arrays import to_numpy
+from .compat import iterator
+from .functions import raw_column
+from .geo import bounding_box, haversine, to_point
+
+
+def nearest(queryset, field_name, point, k=10, max_distance=None, chunk_size=2000):
+    """
+    ``[(pk, km), ...]`` of the ``k`` rows of ``queryset`` nearest to
+    ``point``, nearest first, the distance is computed in Python
+
+    Rows are streamed in chunks of ``chunk_size`` and only the ``k``
+    nearest are kept, no ``LatLong`` is created. With ``max_distance``
+    (km) the rows are filtered by the bounding box of the circle in the
+    database first.
+    """
+    field = queryset.model._meta.get_field(field_name)  # pylint: disable=protected-access
+    decode = field.get_float_decoder(connections[queryset.db])
+    latitude, longitude = to_point(point)
+
+    queryset = queryset.exclude(**{field_name: None})
+    if max_distance is not None:
+        queryset = queryset.filter(
+            **{field_name + "__within_bbox": bounding_box(latitude, longitude, max_distance)}
+        )
+
+    rows = iterator(queryset.values_list("pk", raw_column(field_name)), chunk_size)
+
+    # max-heap of the k nearest by negative distance
+    heap = []
+    for pk, value in rows:
+        other_latitude, other_longitude = decode(value)
+        distance = haversine(latitude, longitude, other_latitude, other_longitude)
+        if max_distance is not None and distance > max_distance:
+            continue
+        if len(heap) < k:
+            heapq.heappush(heap, (-distance, pk))
+        elif -distance > heap[0][0]:
+            heapq.heapreplace(heap, (-distance, pk))
+
+    return [(pk, -distance) for distance, pk in sorted(heap, reverse=True)]
+
+
+class LatLongQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers for ``LatLongField``, use it as a manager::
+
+        objects = LatLongQuerySet.as_manager()
+    """
+
+    def to_numpy(self, field_name, chunk_size=10000):
+        """
+        Coordinates as an (N, 2) float64 NumPy array, see ``arrays.to_numpy``
+        """
+        return to_numpy(self, field_name, chunk_size=chunk_size)
+
+    def nearest(self, field_name, point, k=10, max_distance=None, chunk_size=2000):
+        """
+        ``[(pk, km), ...]`` of the ``k`` nearest rows, see ``query.nearest``
+        """
+        return nearest(
+            self, field_name, point, k=k, max_distance=max_distance, chunk_size=chunk_size
+        )
@@ -1,4 +1,6 @@
 (function($) {
+    var apiLoading = null;
+
     function addMarker(position, map, latinput, lnginput, markers) {
         // del markers
         deleteMarkers(null, markers);
@@ -27,40 +29,183 @@
         markers = [];
     }
 
-    $(document).ready(function() {
-        $('.treasure-map').each(function (index, element) {
-            var map_element = $(element).children('.map').get(0);
-            var latitude_input = $(element).children('input:eq(0)');
-            var longitude_input = $(element).children('input:eq(1)');
+    function normalizeLng(lng) {
+        return ((lng + 180) % 360 + 360) % 360 - 180;
+    }
 
-            var options = $.parseJSON($(element).children('script').text()) || {};
-            var markers = [];
+    function clustersParams(south, west, north, east, zoom) {
+        if (east - west >= 360) {
+            west = -180;
+            east = 180;
+        } else {
+            west = normalizeLng(west);
+            east = normalizeLng(east);
+        }
+        return {
+            bbox: [south, west, north, east].map(function (value) {
+                return value.toFixed(6);
+            }).join(','),
+            zoom: Math.round(zoom)
+        };
+    }
 
-            // var zoom = options.zoom || 4;
+    function initClusterMap(element, options) {
+        // read-only map of the clusters served by ClusterView
+        var url = $(element).data('clusters-url');
+        var markers = [];
+        var request = null;
 
-            var defaultMapOptions = {};
+        var mapOptions = $.extend({
+            center: new google.maps.LatLng(options.latitude, options.longitude)
+        }, options);
+        var map = new google.maps.Map($(element).children('.map').get(0), mapOptions);
 
-            // init default map options
-            defaultMapOptions.center = new google.maps.LatLng(
-                parseFloat(latitude_input.val()) || options.latitude,
-                parseFloat(longitude_input.val()) || options.longitude
-            );
+        google.maps.event.addListener(map, 'idle', function () {
+            var bounds = map.getBounds();
+            if (!bounds) {
+                return;
+            }
+            var south_west = bounds.getSouthWest();
+            var north_east = bounds.getNorthEast();
+            var east = north_east.lng();
+            if (east < south_west.lng() || bounds.toSpan().lng() >= 360) {
+                east += 360;
+            }
 
-            // merge user and default options
-            var mapOptions = $.extend(defaultMapOptions, options);
+            if (request !== null) {
+                request.abort();
+            }
+            request = $.getJSON(url, clustersParams(
+                south_west.lat(), south_west.lng(), north_east.lat(), east, map.getZoom()
+            )).done(function (data) {
+                for (var i = 0; i < markers.length; i++) {
+                    markers[i].setMap(null);
+                }
+                markers = [];
 
-            // create map
-            var map = new google.maps.Map(map_element, mapOptions);
+                $.each(data.clusters, function (index, cluster) {
+                    var marker = new google.maps.Marker({
+                        position: new google.maps.LatLng(cluster.latitude, cluster.longitude),
+                        label: cluster.count > 1 ? String(cluster.count) : null,
+                        map: map
+                    });
+                    if (cluster.count > 1) {
+                        // zoom in to split the cluster
+                        marker.addListener('click', function () {
+                            map.setZoom(data.zoom + 2);
+                            map.panTo(marker.getPosition());
+                        });
+                    }
+                    markers.push(marker);
+                });
+            });
+        });
+    }
 
-            // add default marker
-            if (latitude_input.val() && longitude_input.val()) {
-                addMarker(defaultMapOptions.center, map, latitude_input, longitude_input, markers);
+    function loadApi(url) {
+        // load the API script once, asynchronously
+        if (apiLoading === null) {
+            apiLoading = $.Deferred();
+
+            if (typeof window.google != 'undefined' && typeof window.google.maps != 'undefined') {
+                apiLoading.resolve();
+            } else {
+                window.treasureMapGoogleReady = function () {
+                    apiLoading.resolve();
+                };
+
+                var script = document.createElement('script');
+                script.async = true;
+                script.src = url + (url.indexOf('?') >= 0 ? '&' : '?') + 'callback=treasureMapGoogleReady';
+                document.getElementsByTagName('head')[0].appendChild(script);
             }
+        }
+        return apiLoading.promise();
+    }
+
+    function initMap(element) {
+        if ($(element).data('treasure-map-init')) {
+            return;
+        }
+        $(element).data('treasure-map-init', true);
+
+        if ($(element).data('clusters-url')) {
+            return initClusterMap(element, $.parseJSON($(element).children('script').text()) || {});
+        }
+
+        var map_element = $(element).children('.map').get(0);
+        var latitude_input = $(element).children('input:eq(0)');
+        var longitude_input = $(element).children('input:eq(1)');
+
+        var options = $.parseJSON($(element).children('script').text()) || {};
+        var markers = [];
+
+        // var zoom = options.zoom || 4;
 
-            // init listener
-            google.maps.event.addListener(map, 'click', function (e) {
-                addMarker(e.latLng, map, latitude_input, longitude_input, markers);
+        var defaultMapOptions = {};
+
+        // init default map options
+        defaultMapOptions.center = new google.maps.LatLng(
+            parseFloat(latitude_input.val()) || options.latitude,
+            parseFloat(longitude_input.val()) || options.longitude
+        );
+
+        // merge user and default options
+        var mapOptions = $.extend(defaultMapOptions, options);
+
+        // create map
+        var map = new google.maps.Map(map_element, mapOptions);
+
+        // inputs are shown until the map is ready
+        if ($(element).data('only-map')) {
+            latitude_input.hide();
+            longitude_input.hide();
+        }
+
+        // add default marker
+        if (latitude_input.val() && longitude_input.val()) {
+            addMarker(defaultMapOptions.center, map, latitude_input, longitude_input, markers);
+        }
+
+        // init listener
+        google.maps.event.addListener(map, 'click', function (e) {
+            addMarker(e.latLng, map, latitude_input, longitude_input, markers);
+        });
+    }
+
+    function lazyInitMap(element) {
+        var init = function () {
+            loadApi($(element).data('api-js')).done(function () {
+                initMap(element);
             });
+        };
+
+        // init on click
+        $(element).children('.map').one('click', init);
+
+        // init when visible
+        if (typeof window.IntersectionObserver == 'undefined') {
+            return init();
+        }
+
+        var observer = new IntersectionObserver(function (entries) {
+            for (var i = 0; i < entries.length; i++) {
+                if (entries[i].isIntersecting) {
+                    observer.disconnect();
+                    init();
+                }
+            }
+        });
+        observer.observe(element);
+    }
+
+    $(document).ready(function() {
+        $('.treasure-map').each(function (index, element) {
+            if ($(element).data('lazy-init')) {
+                lazyInitMap(element);
+            } else {
+                initMap(element);
+            }
         });
     });
 })((typeof window.jQuery == 'undefined' && typeof window.django != 'undefined') ? django.jQuery : jQuery);
@@ -1,4 +1,6 @@
 (function($) {
+    var apiLoading = null;
+
     function addMarker(position, map, latinput, lnginput, markers) {
         // del markers
         deleteMarkers(map, markers);
@@ -27,42 +29,185 @@
         markers = [];
     }
 
-    $(document).ready(function() {
-        return ymaps.ready(function() {
-            $('.treasure-map').each(function (index, element) {
-                var map_element = $(element).children('.map').get(0);
-                var latitude_input = $(element).children('input:eq(0)');
-                var longitude_input = $(element).children('input:eq(1)');
-
-                var options = $.parseJSON($(element).children('script').text()) || {};
-                var markers = [];
+    function normalizeLng(lng) {
+        return ((lng + 180) % 360 + 360) % 360 - 180;
+    }
 
-                var defaultMapOptions = {};
+    function clustersParams(south, west, north, east, zoom) {
+        if (east - west >= 360) {
+            west = -180;
+            east = 180;
+        } else {
+            west = normalizeLng(west);
+            east = normalizeLng(east);
+        }
+        return {
+            bbox: [south, west, north, east].map(function (value) {
+                return value.toFixed(6);
+            }).join(','),
+            zoom: Math.round(zoom)
+        };
+    }
 
-                // init default map options
-                defaultMapOptions.center = [
-                    parseFloat(latitude_input.val()) || options.latitude,
-                    parseFloat(longitude_input.val()) || options.longitude
-                ];
+    function initClusterMap(element, options) {
+        // read-only map of the clusters served by ClusterView
+        var url = $(element).data('clusters-url');
+        var placemarks = new ymaps.GeoObjectCollection();
+        var request = null;
 
-                // merge user and default options
-                var mapOptions = $.extend(defaultMapOptions, options);
+        var mapOptions = $.extend({
+            center: [options.latitude, options.longitude]
+        }, options);
+        var map = new ymaps.Map($(element).children('.map').get(0), mapOptions);
+        map.geoObjects.add(placemarks);
 
-                // create map
-                var map = new ymaps.Map(map_element, mapOptions);
+        var update = function () {
+            var bounds = map.getBounds();
 
-                // add default marker
-                if (latitude_input.val() && longitude_input.val()) {
-                    addMarker(defaultMapOptions.center, map, latitude_input, longitude_input, markers);
-                }
+            if (request !== null) {
+                request.abort();
+            }
+            request = $.getJSON(url, clustersParams(
+                bounds[0][0], bounds[0][1], bounds[1][0], bounds[1][1], map.getZoom()
+            )).done(function (data) {
+                placemarks.removeAll();
 
-                // init listener
-                return map.events.add("click",
-                    function(e) {
-                        addMarker(e.get('coords'), map, latitude_input, longitude_input, markers);
+                $.each(data.clusters, function (index, cluster) {
+                    var coords = [cluster.latitude, cluster.longitude];
+                    var placemark = new ymaps.Placemark(coords, {
+                        iconContent: cluster.count > 1 ? cluster.count : ''
+                    }, {
+                        preset: cluster.count > 1 ? 'islands#blueCircleIcon' : 'islands#blueDotIcon'
+                    });
+                    if (cluster.count > 1) {
+                        // zoom in to split the cluster
+                        placemark.events.add('click', function () {
+                            map.setCenter(coords, data.zoom + 2);
+                        });
                     }
-                );
+                    placemarks.add(placemark);
+                });
             });
+        };
+
+        map.events.add('boundschange', update);
+        update();
+    }
+
+    function loadApi(url) {
+        // load the API script once, asynchronously
+        if (apiLoading === null) {
+            apiLoading = $.Deferred();
+
+            if (typeof window.ymaps != 'undefined') {
+                ymaps.ready(apiLoading.resolve);
+            } else {
+                var script = document.createElement('script');
+                script.async = true;
+                script.src = url;
+                script.onload = function () {
+                    ymaps.ready(apiLoading.resolve);
+                };
+                document.getElementsByTagName('head')[0].appendChild(script);
+            }
+        }
+        return apiLoading.promise();
+    }
+
+    function initMap(element) {
+        if ($(element).data('treasure-map-init')) {
+            return;
+        }
+        $(element).data('treasure-map-init', true);
+
+        if ($(element).data('clusters-url')) {
+            return initClusterMap(element, $.parseJSON($(element).children('script').text()) || {});
+        }
+
+        var map_element = $(element).children('.map').get(0);
+        var latitude_input = $(element).children('input:eq(0)');
+        var longitude_input = $(element).children('input:eq(1)');
+
+        var options = $.parseJSON($(element).children('script').text()) || {};
+        var markers = [];
+
+        var defaultMapOptions = {};
+
+        // init default map options
+        defaultMapOptions.center = [
+            parseFloat(latitude_input.val()) || options.latitude,
+            parseFloat(longitude_input.val()) || options.longitude
+        ];
+
+        // merge user and default options
+        var mapOptions = $.extend(defaultMapOptions, options);
+
+        // create map
+        var map = new ymaps.Map(map_element, mapOptions);
+
+        // inputs are shown until the map is ready
+        if ($(element).data('only-map')) {
+            latitude_input.hide();
+            longitude_input.hide();
+        }
+
+        // add default marker
+        if (latitude_input.val() && longitude_input.val()) {
+            addMarker(defaultMapOptions.center, map, latitude_input, longitude_input, markers);
+        }
+
+        // init listener
+        return map.events.add("click",
+            function(e) {
+                addMarker(e.get('coords'), map, latitude_input, longitude_input, markers);
+            }
+        );
+    }
+
+    function lazyInitMap(element) {
+        var init = function () {
+            loadApi($(element).data('api-js')).done(function () {
+                initMap(element);
+            });
+        };
+
+        // init on click
+        $(element).children('.map').one('click', init);
+
+        // init when visible
+        if (typeof window.IntersectionObserver == 'undefined') {
+            return init();
+        }
+
+        var observer = new IntersectionObserver(function (entries) {
+            for (var i = 0; i < entries.length; i++) {
+                if (entries[i].isIntersecting) {
+                    observer.disconnect();
+                    init();
+                }
+            }
         });
+        observer.observe(element);
+    }
+
+    $(document).ready(function() {
+        var elements = $('.treasure-map');
+
+        elements.filter(function () {
+            return $(this).data('lazy-init');
+        }).each(function (index, element) {
+            lazyInitMap(element);
+        });
+
+        elements = elements.filter(function () {
+            return !$(this).data('lazy-init');
+        });
+        if (elements.length) {
+            return ymaps.ready(function() {
+                elements.each(function (index, element) {
+                    initMap(element);
+                });
+            });
+        }
     });
 })((typeof window.jQuery == 'undefined' && typeof window.django != 'undefined') ? django.jQuery : jQuery);
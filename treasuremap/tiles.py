@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+import uuid
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import signals
+
+from .compat import iterator
+from .functions import Latitude, Longitude, raw_column
+from .geo import tile_at, tile_bbox, to_point
+
+# coordinates in tiles are integer microdegrees
+TILE_SCALE = 1000000
+
+
+def tile_queryset(queryset, field_name, zoom, x, y):
+    """
+    Rows of ``queryset`` in the web map tile ``zoom/x/y``, annotated with
+    ``treasuremap_latitude`` and ``treasuremap_longitude``
+
+    A point on the edge of two tiles is in the one to the north or to the east.
+    """
+    south, west, north, east = tile_bbox(zoom, x, y)
+
+    queryset = queryset.filter(
+        **{field_name + "__within_bbox": (south, west, north, east)}
+    ).annotate(
+        treasuremap_latitude=Latitude(field_name),
+        treasuremap_longitude=Longitude(field_name),
+    )
+    if y > 0:
+        queryset = queryset.filter(treasuremap_latitude__lt=north)
+    if x < (1 << zoom) - 1:
+        queryset = queryset.filter(treasuremap_longitude__lt=east)
+    return queryset
+
+
+def iter_tile_json(queryset, field_name, zoom, x, y, chunk_size=2000):
+    """
+    JSON of the points of ``queryset`` in the tile ``zoom/x/y`` in chunks of text::
+
+        {"tile": [zoom, x, y], "scale": 1000000, "points": [pk, lat, lng, pk, lat, lng, ...]}
+
+    Rows are ordered by primary key and read with ``iterator()``.
+    Coordinates are integers, divide them by ``scale`` for degrees, and
+    the difference to the previous point, the first one to ``(0, 0)``.
+    """
+    field = queryset.model._meta.get_field(field_name)  # pylint: disable=protected-access
+    decode = field.get_float_decoder(connections[queryset.db])
+    encode_pk = DjangoJSONEncoder().encode
+
+    rows = iterator(
+        tile_queryset(queryset, field_name, zoom, x, y)
+        .order_by("pk")
+        .values_list("pk", raw_column(field_name)),
+        chunk_size,
+    )
+
+    yield '{{"tile": [{}, {}, {}], "scale": {}, "points": ['.format(zoom, x, y, TILE_SCALE)
+
+    previous_latitude = previous_longitude = 0
+    separator = ""
+    parts = []
+    for pk, value in rows:
+        latitude, longitude = decode(value)
+        latitude = int(round(latitude * TILE_SCALE))
+        longitude = int(round(longitude * TILE_SCALE))
+        parts.append(
+            "{},{},{}".format(
+                encode_pk(pk), latitude - previous_latitude, longitude - previous_longitude
+            )
+        )
+        previous_latitude, previous_longitude = latitude, longitude
+
+        if len(parts) >= chunk_size:
+            yield separator + ",".join(parts)
+            separator = ","
+            parts = []
+
+    if parts:
+        yield separator + ",".join(parts)
+    yield "]}"
+
+
+def decode_tile_json(content):
+    """
+    ``[(pk, latitude, longitude), ...]`` of a tile from ``iter_tile_json``
+    """
+    data = json.loads(content)
+    scale = float(data["scale"])
+    values = data["points"]
+
+    points = []
+    latitude = longitude = 0
+    for i in range(0, len(values), 3):
+        latitude += values[i + 1]
+        longitude += values[i + 2]
+        points.append((values[i], latitude / scale, longitude / scale))
+    return points
+
+
+def _version_key(model, field_name, zoom, x, y):
+    return "treasuremap:tiles:{}.{}:{}:{}:{}".format(
+        model._meta.label_lower, field_name, zoom, x, y  # pylint: disable=protected-access
+    )
+
+
+def get_tile_version(model, field_name, zoom, x, y, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Version of the tile ``zoom/x/y``, changed by ``invalidate_tiles``
+    """
+    cache = caches[cache_alias]
+    key = _version_key(model, field_name, zoom, x, y)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_tiles(model, field_name, points, max_zoom=20, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Change the versions of the tiles that contain ``points`` at every
+    zoom up to ``max_zoom``
+    """
+    keys = set()
+    for point in points:
+        if point is None:
+            continue
+        # an empty stored value is served at (0, 0)
+        latitude, longitude = (0.0, 0.0) if point == "" else to_point(point)
+        for zoom in range(max_zoom + 1):
+            x, y = tile_at(zoom, latitude, longitude)
+            keys.add(_version_key(model, field_name, zoom, x, y))
+
+    if keys:
+        version = uuid.uuid4().hex
+        caches[cache_alias].set_many(dict.fromkeys(keys, version), None)
+
+
+class TileInvalidation(object):
+    """
+    Signal handlers that invalidate the tiles of the old and the new
+    position of saved and deleted instances
+
+    The old position is read from the database before the save.
+    """
+
+    def __init__(self, model, field_name, max_zoom=20, cache_alias=DEFAULT_CACHE_ALIAS):
+        self.model = model
+        self.field_name = field_name
+        self.max_zoom = max_zoom
+        self.cache_alias = cache_alias
+        self.uid = "treasuremap_tiles_{}_{}_{}_{}".format(
+            model._meta.label_lower, field_name, max_zoom, cache_alias
+        )
+
+    @property
+    def attname(self):
+        # pylint: disable=protected-access
+        return self.model._meta.get_field(self.field_name).attname
+
+    def skip(self, update_fields):
+        return update_fields is not None and self.field_name not in update_fields
+
+    def handle_pre_save(
+        self, sender, instance, raw=False, using=None, update_fields=None, **kwargs
+    ):
+        # pylint: disable=unused-argument
+        # pylint: disable=protected-access
+        if instance._state.adding or instance.pk is None or self.skip(update_fields):
+            return
+        old = (
+            sender._base_manager.using(using)
+            .filter(pk=instance.pk)
+            .values_list(self.field_name, flat=True)
+            .first()
+        )
+        instance.__dict__["_treasuremap_tiles_" + self.field_name] = old
+
+    def handle_save(self, sender, instance, update_fields=None, **kwargs):
+        # pylint: disable=unused-argument
+        if self.skip(update_fields):
+            return
+        old = instance.__dict__.pop("_treasuremap_tiles_" + self.field_name, None)
+        self.invalidate([old, getattr(instance, self.attname)])
+
+    def handle_delete(self, sender, instance, **kwargs):  # pylint: disable=unused-argument
+        self.invalidate([getattr(instance, self.attname)])
+
+    def invalidate(self, points):
+        invalidate_tiles(
+            self.model,
+            self.field_name,
+            points,
+            max_zoom=self.max_zoom,
+            cache_alias=self.cache_alias,
+        )
+
+    def connect(self):
+        signals.pre_save.connect(
+            self.handle_pre_save, sender=self.model, weak=False, dispatch_uid=self.uid
+        )
+        signals.post_save.connect(
+            self.handle_save, sender=self.model, weak=False, dispatch_uid=self.uid
+        )
+        signals.post_delete.connect(
+            self.handle_delete, sender=self.model, weak=False, dispatch_uid=self.uid
+        )
+
+    def disconnect(self):
+        signals.pre_save.disconnect(sender=self.model, dispatch_uid=self.uid)
+        signals.post_save.disconnect(sender=self.model, dispatch_uid=self.uid)
+        signals.post_delete.disconnect(sender=self.model, dispatch_uid=self.uid)
+
+
+def connect_tiles(model, field_name, max_zoom=20, cache_alias=DEFAULT_CACHE_ALIAS):
+    """
+    Invalidate the tiles of ``model.field_name`` on saves and deletes,
+    connecting twice is harmless
+    """
+    invalidation = TileInvalidation(model, field_name, max_zoom=max_zoom, cache_alias=cache_alias)
+    invalidation.connect()
+    return invalidation
+
+
+def disconnect_tiles(model, field_name, max_zoom=20, cache_alias=DEFAULT_CACHE_ALIAS):
+    TileInvalidation(model, field_name, max_zoom=max_zoom, cache_alias=cache_alias).disconnect()
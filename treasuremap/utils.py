@@ -5,9 +5,16 @@ from __future__ import unicode_literals
 import importlib
 
 from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 from .backends.base import BaseMapBackend
 
+DEFAULT_BACKEND = "treasuremap.backends.google.GoogleMapBackend"
+
+# backend instances by dotted path
+_backends = {}
+
 
 def import_class(path):
     path_bits = path.split(".")
@@ -22,12 +29,28 @@ def import_class(path):
 
 
 def get_backend(map_config):
-    if not map_config.get("BACKEND"):
-        map_config["BACKEND"] = "treasuremap.backends.google.GoogleMapBackend"
+    return load_backend(map_config.get("BACKEND") or DEFAULT_BACKEND)
+
 
-    backend = import_class(map_config["BACKEND"])
+def load_backend(path):
+    """
+    Import, check and instantiate a backend once per process
+    """
+    try:
+        return _backends[path]
+    except KeyError:
+        pass
+
+    backend = import_class(path)
 
     if not issubclass(backend, BaseMapBackend):
         raise ImproperlyConfigured("Is backend {} is not instance BaseMapBackend.".format(backend))
 
-    return backend()
+    _backends[path] = backend = backend()
+    return backend
+
+
+@receiver(setting_changed)
+def reset_backends(setting, **kwargs):  # pylint: disable=unused-argument
+    if setting == "TREASURE_MAP":
+        _backends.clear()
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.utils.deconstruct import deconstructible
+from django.utils.translation import gettext_lazy as _
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+MESSAGES = {
+    "invalid": _("'%(value)s' both values must be a decimal number or integer."),
+    "invalid_separator": _("As the separator value '%(value)s' must be ';'"),
+    "latitude_out_of_range": _("Latitude %(value)s must be between -90 and 90."),
+    "longitude_out_of_range": _("Longitude %(value)s must be between -180 and 180."),
+    "precision": _("'%(value)s' has more than %(precision)s decimal places."),
+}
+
+# codes in the order they are checked
+_CODES = ("invalid", "latitude_out_of_range", "longitude_out_of_range", "precision")
+
+
+def _error(code, value, precision=None):
+    params = {"value": value}
+    if precision is not None:
+        params["precision"] = precision
+    return ValidationError(MESSAGES[code], code=code, params=params)
+
+
+def decimal_places(value):
+    """
+    Number of significant decimal places of a number or a number string
+    """
+    if isinstance(value, float):
+        # NumPy scalars are floats with another repr
+        value = Decimal(float.__repr__(value))
+    elif not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    exponent = value.normalize().as_tuple().exponent
+    return max(0, -exponent) if isinstance(exponent, int) else 0
+
+
+def _latlong_parts(value):
+    # the values a LatLong was created with, integers are microdegrees
+    parts = []
+    for internal in (getattr(value, "_latitude", None), getattr(value, "_longitude", None)):
+        if internal is None:
+            return value.latitude, value.longitude
+        parts.append(Decimal(internal).scaleb(-6) if isinstance(internal, int) else internal)
+    return parts
+
+
+def check_latlong(value, precision=None):
+    """
+    ``ValidationError`` of a ``LatLong``, a ``"lat;lng"`` string or a
+    pair, ``None`` when it is valid. Latitude must be within [-90, 90],
+    longitude within [-180, 180] and, with ``precision``, both have at
+    most that many decimal places.
+    """
+    if value is None:
+        return None
+
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        latitude, longitude = _latlong_parts(value)
+    else:
+        parts = value.split(";") if isinstance(value, str) else value
+        try:
+            latitude, longitude = parts
+        except (TypeError, ValueError):
+            return _error("invalid_separator", value)
+
+    try:
+        latitude_float = float(latitude)
+        longitude_float = float(longitude)
+    except (TypeError, ValueError):
+        return _error("invalid", value)
+
+    if not -90 <= latitude_float <= 90:
+        return _error("latitude_out_of_range", latitude)
+    if not -180 <= longitude_float <= 180:
+        return _error("longitude_out_of_range", longitude)
+
+    if precision is not None:
+        try:
+            places = max(decimal_places(latitude), decimal_places(longitude))
+        except InvalidOperation:
+            return _error("invalid", value)
+        if places > precision:
+            return _error("precision", value, precision)
+    return None
+
+
+def validate_latlong(value, precision=None):
+    """
+    Raise the ``ValidationError`` of ``check_latlong``
+    """
+    error = check_latlong(value, precision)
+    if error is not None:
+        raise error
+
+
+@deconstructible
+class LatLongValidator(object):
+    """
+    ``validate_latlong`` with a ``precision`` for the ``validators`` of a field
+    """
+
+    def __init__(self, precision=None):
+        self.precision = precision
+
+    def __call__(self, value):
+        validate_latlong(value, self.precision)
+
+    def __eq__(self, other):
+        return isinstance(other, LatLongValidator) and self.precision == other.precision
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _to_float_array(values):
+    """
+    (N, 2) float array of ``values``, ``None`` when they are not all
+    numbers, pairs or ``"lat;lng"`` strings, ``None`` items are (0, 0)
+    """
+    if isinstance(values, np.ndarray):
+        try:
+            array = values.astype(np.float64)
+        except (TypeError, ValueError):
+            return None
+        return array if array.ndim == 2 and array.shape[1] == 2 else None
+
+    if not values:
+        return np.empty((0, 2), dtype=np.float64)
+
+    try:
+        if all(isinstance(value, str) or value is None for value in values):
+            text = ";".join("0;0" if value is None else value for value in values).split(";")
+            if len(text) != 2 * len(values):
+                return None
+            return np.array(text, dtype=np.float64).reshape(-1, 2)
+
+        array = np.array([(0, 0) if value is None else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return array if array.ndim == 2 and array.shape[1] == 2 else None
+
+
+def _check_array(values, array, precision):
+    """
+    ``{index: ValidationError}`` of a float array with NumPy, the
+    precision is checked on the floats
+    """
+    latitude = array[:, 0]
+    longitude = array[:, 1]
+
+    # NaN is out of range
+    failed = [
+        ~((latitude >= -90) & (latitude <= 90)),
+        ~((longitude >= -180) & (longitude <= 180)),
+    ]
+    if precision is not None:
+        scaled = array * 10.0**precision
+        failed.append((np.abs(scaled - np.round(scaled)) > 1e-6).any(axis=1))
+
+    errors = {}
+    for code, mask in reversed(list(zip(_CODES[1:], failed))):
+        for index in np.flatnonzero(mask).tolist():
+            value = values[index]
+            if code == "latitude_out_of_range":
+                errors[index] = _error(code, _part(value, 0, array[index]))
+            elif code == "longitude_out_of_range":
+                errors[index] = _error(code, _part(value, 1, array[index]))
+            else:
+                errors[index] = _error(code, value, precision)
+    return dict(sorted(errors.items()))
+
+
+def _part(value, index, floats):
+    if isinstance(value, str):
+        return value.split(";")[index]
+    if hasattr(value, "latitude"):
+        return _latlong_parts(value)[index]
+    try:
+        return value[index]
+    except (TypeError, IndexError):
+        return floats[index]
+
+
+def _text_places(value):
+    value = value.strip()
+    if "e" in value or "E" in value:
+        return decimal_places(value)
+    dot = value.find(".")
+    if dot < 0:
+        return 0
+    return len(value.rstrip("0")) - dot - 1
+
+
+def _check_strings(values, precision):
+    """
+    ``{index: ValidationError}`` of ``"lat;lng"`` strings split and
+    converted at once, ``None`` when one of them does not parse
+    """
+    text = ";".join("0;0" if value is None else value for value in values).split(";")
+    if len(text) != 2 * len(values):
+        return None
+    try:
+        floats = list(map(float, text))
+    except ValueError:
+        return None
+
+    errors = {}
+    for index, latitude, longitude in zip(range(len(values)), floats[0::2], floats[1::2]):
+        if not -90 <= latitude <= 90:
+            errors[index] = _error("latitude_out_of_range", text[2 * index])
+        elif not -180 <= longitude <= 180:
+            errors[index] = _error("longitude_out_of_range", text[2 * index + 1])
+        elif precision is not None and (
+            _text_places(text[2 * index]) > precision
+            or _text_places(text[2 * index + 1]) > precision
+        ):
+            errors[index] = _error("precision", values[index], precision)
+    return errors
+
+
+def check_latlongs(values, precision=None, use_numpy=None):
+    """
+    ``{index: ValidationError}`` of the invalid items of a sequence of
+    values or an (N, 2) array, see ``check_latlong``, ``None`` items are valid
+
+    Numbers, pairs and ``"lat;lng"`` strings are checked with NumPy when
+    it is installed, ``use_numpy`` forces it on or off. NumPy checks the
+    precision on float values, a difference below a millionth of the
+    last allowed place is not seen. Without NumPy a list of strings is
+    split and converted at once, other values one by one.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ImproperlyConfigured("use_numpy requires NumPy, install it with pip install numpy")
+
+    if use_numpy:
+        array = _to_float_array(values)
+        if array is not None:
+            return _check_array(values, array, precision)
+    elif all(isinstance(value, str) or value is None for value in values):
+        errors = _check_strings(values, precision)
+        if errors is not None:
+            return errors
+
+    errors = {}
+    for index, value in enumerate(values):
+        error = check_latlong(value, precision)
+        if error is not None:
+            errors[index] = error
+    return errors
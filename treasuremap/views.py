@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.generic import View
+
+from .clusters import cluster, connect_clusters
+from .tiles import connect_tiles, get_tile_version, iter_tile_json
+
+
+class LatLongViewMixin(object):
+    """
+    Model or queryset and ``LatLongField`` name of a view, set them as
+    attributes or ``as_view`` arguments
+    """
+
+    model = None
+    queryset = None
+    field_name = None
+
+    @classmethod
+    def get_model(cls, **initkwargs):
+        model = initkwargs.get("model", cls.model)
+        queryset = initkwargs.get("queryset", cls.queryset)
+        if model is None and queryset is None:
+            raise ImproperlyConfigured("{} is missing a model or a queryset.".format(cls.__name__))
+        return model if model is not None else queryset.model
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+        return self.model._default_manager.all()  # pylint: disable=protected-access
+
+
+class ClusterView(LatLongViewMixin, View):
+    """
+    JSON clusters of ``LatLongField`` points for a map view::
+
+        path("clusters/", ClusterView.as_view(model=Place, field_name="point"))
+
+    ``GET ?bbox=south,west,north,east&zoom=5`` returns
+    ``{"zoom": 5, "clusters": [{"latitude", "longitude", "count", "pk"}, ...]}``,
+    see ``clusters.cluster``. Clusters are cached per tile and zoom in
+    ``cache_alias`` until the model is saved or deleted, ``as_view``
+    connects the signals.
+    """
+
+    # grid over a web map tile, cells x cells
+    cells = 8
+    max_zoom = 20
+    max_tiles = 64
+    cache_alias = DEFAULT_CACHE_ALIAS
+    cache_timeout = 300
+    key_prefix = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super(ClusterView, cls).as_view(**initkwargs)
+
+        cache_alias = initkwargs.get("cache_alias", cls.cache_alias)
+        if cache_alias is not None:
+            connect_clusters(cls.get_model(**initkwargs), cache_alias)
+        return view
+
+    def get_key_prefix(self):
+        if self.key_prefix is not None:
+            return self.key_prefix
+        # views of other models share the class and may share the field name
+        return "{}.{}.{}.{}".format(
+            self.__class__.__module__,
+            self.__class__.__name__,
+            self.get_queryset().model._meta.label_lower,  # pylint: disable=protected-access
+            self.field_name,
+        )
+
+    def parse_params(self, params):
+        """
+        ``(bbox, zoom)`` of the request, ``ValueError`` when they are invalid
+        """
+        try:
+            south, west, north, east = (float(v) for v in params.get("bbox", "").split(","))
+            zoom = int(params.get("zoom", ""))
+        except ValueError:
+            raise ValueError(  # pylint: disable=raise-missing-from
+                "bbox=south,west,north,east and zoom are required"
+            )
+
+        if not -90 <= south <= north <= 90 or not (-180 <= west <= 180 and -180 <= east <= 180):
+            raise ValueError("bbox is out of range")
+        if zoom < 0:
+            raise ValueError("zoom must not be negative")
+        # maps zoom in further than clusters are useful
+        return (south, west, north, east), min(zoom, self.max_zoom)
+
+    def get(self, request, *args, **kwargs):  # pylint: disable=unused-argument
+        if self.field_name is None:
+            raise ImproperlyConfigured(
+                "{} is missing a field_name.".format(self.__class__.__name__)
+            )
+
+        try:
+            bbox, zoom = self.parse_params(request.GET)
+            clusters = cluster(
+                self.get_queryset(),
+                self.field_name,
+                bbox,
+                zoom,
+                cells=self.cells,
+                cache_alias=self.cache_alias,
+                key_prefix=self.get_key_prefix(),
+                timeout=self.cache_timeout,
+                max_tiles=self.max_tiles,
+            )
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+        return JsonResponse({"zoom": zoom, "clusters": clusters})
+
+
+class TileView(LatLongViewMixin, View):
+    """
+    Points of ``LatLongField`` in a web map tile as compact JSON::
+
+        path(
+            "tiles/<int:zoom>/<int:x>/<int:y>.json",
+            TileView.as_view(model=Place, field_name="point"),
+        )
+
+    The body is streamed from ``tiles.iter_tile_json``. The ``ETag`` is
+    the version of the tile, changed when a point in it is saved or
+    deleted, ``as_view`` connects the signals, so a repeated request
+    with ``If-None-Match`` gets ``304 Not Modified`` without a query.
+    """
+
+    max_zoom = 20
+    cache_alias = DEFAULT_CACHE_ALIAS
+    chunk_size = 2000
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super(TileView, cls).as_view(**initkwargs)
+
+        connect_tiles(
+            cls.get_model(**initkwargs),
+            initkwargs.get("field_name", cls.field_name),
+            max_zoom=initkwargs.get("max_zoom", cls.max_zoom),
+            cache_alias=initkwargs.get("cache_alias", cls.cache_alias),
+        )
+        return view
+
+    def get(self, request, zoom, x, y, *args, **kwargs):  # pylint: disable=unused-argument
+        zoom, x, y = int(zoom), int(x), int(y)
+        if not 0 <= zoom <= self.max_zoom or not (0 <= x < 1 << zoom and 0 <= y < 1 << zoom):
+            raise Http404("No such tile")
+
+        queryset = self.get_queryset()
+        version = get_tile_version(
+            queryset.model, self.field_name, zoom, x, y, cache_alias=self.cache_alias
+        )
+        etag = '"{}"'.format(version)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = StreamingHttpResponse(
+                iter_tile_json(queryset, self.field_name, zoom, x, y, chunk_size=self.chunk_size),
+                content_type="application/json",
+            )
+        response["ETag"] = etag
+        # browsers keep the tile and ask if it changed
+        response["Cache-Control"] = "no-cache"
+        return response
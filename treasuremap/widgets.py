@@ -2,33 +2,88 @@
 
 from __future__ import unicode_literals
 
-import json
-
 from django import forms
 from django.conf import settings
 from django.forms import MultiWidget
+from django.template.loader import render_to_string
+from django.utils.html import conditional_escape, html_safe
 from django.utils.safestring import mark_safe
 
-from .utils import get_backend
+from .backends.base import DEFAULT_WIDGET_TEMPLATE
+from .utils import get_backend, load_backend
+
+# treasuremap/widgets/map.html without the template engine
+_MAP_HTML = (
+    '<span class="treasure-map" style="display: inline-block;"{lazy_init}>\n'
+    "    {inputs}\n"
+    '    <script type="application/json">\n'
+    "        {map_options}\n"
+    "    </script>\n"
+    '    <span class="map" style="width: {width}px; height: {height}px; '
+    'display: block; margin-top: 10px"></span>\n'
+    "</span>"
+)
+
+
+def _render_input(widget):
+    """
+    Render a subwidget context like django/forms/widgets/input.html
+    """
+    html = ['<input type="', conditional_escape(widget["type"])]
+    html += ['" name="', conditional_escape(widget["name"]), '"']
+
+    if widget["value"] is not None:
+        html += [' value="', conditional_escape(str(widget["value"])), '"']
+
+    for name, value in widget["attrs"].items():
+        if value is not False:
+            html += [" ", conditional_escape(name)]
+            if value is not True:
+                html += ['="', conditional_escape(str(value)), '"']
+
+    html.append(">")
+    return "".join(html)
+
+
+def _render_map(context):
+    """
+    Render the default widget template without the template engine
+    """
+    lazy_init = ""
+    if context.get("lazy_init"):
+        lazy_init = ' data-lazy-init="true" data-api-js="{}"'.format(
+            conditional_escape(context["api_js"])
+        )
+        if context["only_map"]:
+            lazy_init += ' data-only-map="true"'
+
+    return _MAP_HTML.format(
+        lazy_init=lazy_init,
+        inputs="".join(_render_input(widget) for widget in context["widget"]["subwidgets"]),
+        map_options=context["map_options"],
+        width=conditional_escape(str(context["width"])),
+        height=conditional_escape(str(context["height"])),
+    )
 
 
 class MapWidget(MultiWidget):
-    def __init__(self, attrs=None):
-        self.map_backend = get_backend(settings.TREASURE_MAP)
-
-        if self.map_backend.only_map:
-            widgets = (
-                forms.HiddenInput(attrs=attrs),
-                forms.HiddenInput(attrs=attrs),
-            )
-        else:
-            widgets = (
-                forms.NumberInput(attrs=attrs),
-                forms.NumberInput(attrs=attrs),
-            )
+    def __init__(self, attrs=None, backend=None):
+        # dotted path to override the backend from settings, resolved on first use
+        self.backend = backend
+
+        widgets = (
+            forms.NumberInput(attrs=attrs),
+            forms.NumberInput(attrs=attrs),
+        )
 
         super(MapWidget, self).__init__(widgets, attrs)
 
+    @property
+    def map_backend(self):
+        if self.backend:
+            return load_backend(self.backend)
+        return get_backend(settings.TREASURE_MAP)
+
     def decompress(self, value):
         if value:
             return [value.format_latitude, value.format_longitude]
@@ -38,36 +93,79 @@ class MapWidget(MultiWidget):
     def is_hidden(self):
         return False
 
-    def get_context_widgets(self):
-        context = {
-            "map_options": json.dumps(self.map_backend.get_map_options()),
-            "width": self.map_backend.width,
-            "height": self.map_backend.height,
-            "only_map": self.map_backend.only_map,
-        }
+    def get_context(self, name, value, attrs):
+        context = super(MapWidget, self).get_context(name, value, attrs)
+
+        # with lazy init the inputs are shown until the map is ready
+        if self.map_backend.only_map and not self.map_backend.lazy_init:
+            for widget in context["widget"]["subwidgets"]:
+                widget["type"] = forms.HiddenInput.input_type
+                widget["template_name"] = forms.HiddenInput.template_name
+
         return context
 
+    def get_context_widgets(self):
+        return dict(self.map_backend.widget_context)
+
     def render(self, name, value, attrs=None, renderer=None):
         context = self.get_context(name, value, attrs)
         context.update(self.get_context_widgets())
-        return mark_safe(renderer.render(self.map_backend.get_widget_template(), context))
+        if context.get("lazy_init"):
+            context["api_js"] = self.map_backend.get_api_js()
 
-    def _get_media(self):
-        media = forms.Media()
-        for w in self.widgets:
-            media = media + w.media
+        template_name = self.map_backend.get_widget_template()
+        if self.map_backend.fast_render and template_name == DEFAULT_WIDGET_TEMPLATE:
+            return mark_safe(_render_map(context))
 
-        media += forms.Media(js=(self.map_backend.get_api_js(), self.map_backend.get_js()))
-        return media
+        return mark_safe(renderer.render(template_name, context))
+
+    def _get_media(self):
+        # the coordinate inputs have no media of their own
+        return self.map_backend.get_media()
 
     media = property(_get_media)
 
 
 class AdminMapWidget(MapWidget):
     def get_context_widgets(self):
-        context = super(AdminMapWidget, self).get_context_widgets()
+        return dict(self.map_backend.admin_widget_context)
+
+
+@html_safe
+class ClusterMap(object):
+    """
+    Read-only map of the clusters served by ``views.ClusterView`` at ``url``::
+
+        {{ cluster_map.media }}
+        {{ cluster_map }}
+    """
+
+    template_name = "treasuremap/widgets/clusters.html"
 
-        context["width"] = self.map_backend.admin_width
-        context["height"] = self.map_backend.admin_height
+    def __init__(self, url, backend=None):
+        self.url = url
+        # dotted path to override the backend from settings
+        self.backend = backend
 
+    @property
+    def map_backend(self):
+        if self.backend:
+            return load_backend(self.backend)
+        return get_backend(settings.TREASURE_MAP)
+
+    def get_context(self):
+        context = dict(self.map_backend.widget_context)
+        context["url"] = self.url
+        if context.get("lazy_init"):
+            context["api_js"] = self.map_backend.get_api_js()
         return context
+
+    def render(self):
+        return mark_safe(render_to_string(self.template_name, self.get_context()))
+
+    def __str__(self):
+        return self.render()
+
+    @property
+    def media(self):
+        return self.map_backend.get_media()